@@ -9,6 +9,7 @@ from categorizer import Categorizer
 from statements import income_statement, balance_sheet, income_statement_grouped, balance_sheet_grouped
 from pdf_render import income_statement_pdf, balance_sheet_pdf, income_statement_pdf_grouped, balance_sheet_pdf_grouped
 from file_loader import load_google_sheets, load_excel_files
+from transaction_store import load_transactions
 from plaid_loader import load_plaid_transactions
 from pathlib import Path
 
@@ -21,68 +22,26 @@ OUTPUT_DIR.mkdir(exist_ok=True)
 
 def load_config(path):
     with open(path, "r", encoding="utf-8") as f:
-    return yaml.safe_load(f)
+        return yaml.safe_load(f)
 # Load CSV transactions
 def load_csvs(globpat):
-    files = glob.glob(globpat)
-    # if not files:
-    #     return pd.DataFrame(columns=['date','description','amount','account','category'])
-    # df = pd.concat([pd.read_csv(f) for f in files], ignore_index=True)
-    # df['date'] = pd.to_datetime(df['date'], errors='coerce')
-    # df['amount'] = pd.to_numeric(df['amount'], errors='coerce')
-    # return df.dropna(subset=['date','amount'])
-    frames = []
-    for fp in files:
-        df = pd.read_csv(fp)
-        frames.append(df)
-    if not frames:
-        return pd.DataFrame(columns=['date','description','amount','account','category'])
-    df = pd.concat(frames, ignore_index=True)
-    # normalize columns
-    cols = {c.lower(): c for c in df.columns}
-    
-
-    def get(col):
-        for k in cols:
-            if k == col:
-                return cols[k]
-        return None
-    # create normalized columns
-    def pick(name, default=None):
-        col = get(name)
-        if col and col in df:
-            return df[col]
-        return default
-        out = pd.DataFrame({
-            'date': pd.to_datetime(pick('date'), errors='coerce'),
-            'description': pick('description', ''),
-            'amount': pd.to_numeric(pick('amount'), errors='coerce'),
-            'account': pick('account', ''),
-            'category': pick('category', ''),
-        })
-        out = out.dropna(subset=['date','amount'])
-        return out
+    # parsed once into the columnar store; only new or changed files are re-read
+    return load_transactions(globpat)
 
 def categorize(df, config, rules_path):
     cat = Categorizer(rules_path)
     # map categories into account types
     mapping = config.get('account_mapping', {})
-    def map_type(cat_name):
-        for typ, cats in mapping.items():
-        if cat_name in (cats or []):
-            return typ
-        return None
-    cats, types = [], []
-    for _, row in df.iterrows():
-        base = str(row.get('category') or '')
-        desc = str(row.get('description') or '')
-        detected, _ = cat.classify(desc, fallback=base if base else None)
-        ctype = map_type(detected) if detected else None
-        cats.append(detected or 'Uncategorized')
-        types.append(ctype or 'expense' if (row['amount']<0) else 'revenue')
+    type_of = {}
+    for typ, cats in mapping.items():
+        for c in (cats or []):
+            type_of.setdefault(c, typ)
+    base = df['category'].fillna('').astype(str) if 'category' in df else pd.Series('', index=df.index)
+    detected = cat.classify_series(df['description'], fallback=base.where(base != ''))
+    sign_type = pd.Series('expense', index=df.index).where(df['amount'] < 0, 'revenue')
     df = df.copy()
-    df['category'] = cats
-    df['category_type'] = types
+    df['category'] = detected.fillna('Uncategorized')
+    df['category_type'] = detected.map(type_of).fillna(sign_type)
     return df
 
 def main():
@@ -93,13 +52,23 @@ def main():
     ap.add_argument('--end', default=None, help='YYYY-MM-DD')
     ap.add_argument('--outdir', default='output')
     args = ap.parse_args()
-    cfg = load_config(args.config)
-    os.makedirs(args.outdir, exist_ok=True)
+    paths = generate_reports(args.config, args.period, args.start, args.end, args.outdir)
+
+    print("Generated:")
+    for p in paths:
+        print(p)
+
+def generate_reports(config_path='config.yaml', period='monthly', start=None, end=None, outdir='output'):
+    """Build the income statement and balance sheet PDFs; returns their paths."""
+    cfg = load_config(config_path)
+    os.makedirs(outdir, exist_ok=True)
 
     # Load transactions
     ds = cfg.get('datasource_csv', {})
     if ds.get('type') == 'csv':
-        df = load_csvs(ds.get('csv_glob', 'data/transactions/*.csv'))
+        # relative globs are resolved next to the config file, not the caller's cwd
+        base_dir = os.path.dirname(os.path.abspath(config_path))
+        df = load_csvs(os.path.join(base_dir, ds.get('csv_glob', 'data/transactions/*.csv')))
     else:
         # sheets support (optional; requires credentials), kept minimal here
         try:
@@ -111,7 +80,6 @@ def main():
             sh = client.open_by_key(ds['spreadsheet_key'])
             ws = sh.worksheet(ds.get('worksheet_name','Transactions'))
             records = ws.get_all_records()
-            import pandas as pd
             df = pd.DataFrame(records)
             df['date'] = pd.to_datetime(df['date'], errors='coerce')
             df['amount'] = pd.to_numeric(df['amount'], errors='coerce')
@@ -120,37 +88,34 @@ def main():
             raise SystemExit(f"Sheets error: {e}\\nSwitch datasource.type to 'csv' in config.yaml or provide credentials.")
 
     # Filter by date
-    if args.start:
-        df = df[df['date'] >= pd.Timestamp(args.start)]
-    if args.end:
-        df = df[df['date'] <= pd.Timestamp(args.end)]
+    if start:
+        df = df[df['date'] >= pd.Timestamp(start)]
+    if end:
+        df = df[df['date'] <= pd.Timestamp(end)]
 
     # Categorize
     # df = categorize(df, cfg, 'rules.yaml') old way
-    df = categorize(df, cfg.get('rules', {}), 'config.yaml') #config.yaml
+    df = categorize(df, cfg, config_path) #config.yaml
 
     # Build Income Statement
-    is_df = income_statement_grouped(df, period=args.period)
+    is_df = income_statement_grouped(df, period=period)
     # Build Balance Sheet as-of end date (or today)
-    as_of = args.end or pd.Timestamp.today().strftime('%Y-%m-%d')
+    as_of = end or pd.Timestamp.today().strftime('%Y-%m-%d')
     bs = balance_sheet_grouped(cfg.get('opening_balances', {}), df, as_of_date=as_of)
 
     company = cfg.get('company', {}).get('name', 'Company')
     currency = cfg.get('company', {}).get('currency', 'USD')
 
     # PDF outputs
-    is_path = os.path.join(args.outdir, f"Income_Statement_{args.period}_{args.start or 'start'}_{args.end or 'end'}.pdf")
-    bs_path = os.path.join(args.outdir, f"Balance_Sheet_{as_of}.pdf")
-    income_statement_pdf_grouped(is_path, company, f"{args.period} {args.start or ''} to {args.end or ''}".strip(), is_df, currency)
+    is_path = os.path.join(outdir, f"Income_Statement_{period}_{start or 'start'}_{end or 'end'}.pdf")
+    bs_path = os.path.join(outdir, f"Balance_Sheet_{as_of}.pdf")
+    income_statement_pdf_grouped(is_path, company, f"{period} {start or ''} to {end or ''}".strip(), is_df, currency)
     balance_sheet_pdf_grouped(bs_path, company, bs, currency)
 
     # Also save CSV summaries
-    is_df.to_csv(os.path.join(args.outdir, f"Income_Statement_{args.period}.csv"), index=False)
-    bs_df.to_csv(os.path.join(args.outdir, f"Balance_Sheet_{as_of}.csv"), index=False)
-
-    print("Generated:")
-    print(is_path)
-    print(bs_path)
+    is_df.to_csv(os.path.join(outdir, f"Income_Statement_{period}.csv"), index=False)
+    pd.DataFrame([bs['totals']]).to_csv(os.path.join(outdir, f"Balance_Sheet_{as_of}.csv"), index=False)
+    return [is_path, bs_path]
 
 def load_all_transactions(cfg):
     frames = []
@@ -176,7 +141,7 @@ def load_all_transactions(cfg):
 
     # Categorize
     cat = Categorizer('rules.yaml')
-    df['category'] = [cat.classify(r['description'], fallback=r.get('category','Uncategorized'))[0] for _,r in df.iterrows()]
+    df['category'] = cat.classify_series(df['description'], fallback=df['category'].fillna('Uncategorized'))
 
     # Generate PDFs
     is_df = income_statement(df)
@@ -185,6 +150,6 @@ def load_all_transactions(cfg):
     income_statement_pdf(OUTPUT_DIR / 'Income_Statement_monthly_2025-01-01_2025-03-31.pdf', cfg['company']['name'], 'Jan-Mar 2025', is_df, cfg['company']['currency'])
     balance_sheet_pdf(OUTPUT_DIR / 'Balance_Sheet_2025-03-31.pdf', cfg['company']['name'], bs, cfg['company']['currency'])
 
-if __name__ == 'main':
+if __name__ == '__main__':
     main()
 
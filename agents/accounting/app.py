@@ -5,9 +5,11 @@ from statements import income_statement, balance_sheet
 from pdf_render import income_statement_pdf, balance_sheet_pdf
 from categorizer import Categorizer
 from send_reports import send_telegram_reports, send_whatsapp_reports
-import os, werkzeug, subprocess
+import os, werkzeug
 import pandas as pd
 from pathlib import Path
+from agent import generate_reports
+from jobs import JobQueue, QueueFull, files_fingerprint
 
 # Add missing functions
 def classify_transactions(df):
@@ -25,6 +27,11 @@ OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 app = Flask(__name__)
 app.secret_key = os.environ.get('FLASK_SECRET','dev-secret')
 
+# Reports are generated on a bounded in-process worker pool; see jobs.py
+report_jobs = JobQueue(OUTPUT_DIR / 'jobs',
+                       workers=int(os.environ.get('REPORT_WORKERS', 2)),
+                       max_pending=int(os.environ.get('REPORT_MAX_PENDING', 16)))
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -143,20 +150,67 @@ def upload():
 
 @app.route('/generate', methods=['POST'])
 def generate():
-    subprocess.run(['python','agent.py'], cwd=str(BASE))
-    flash('Generated PDFs','success')
+    params = {
+        'config_path': str(BASE / 'config.yaml'),
+        'period': request.form.get('period', 'monthly'),
+        'start': request.form.get('start') or None,
+        'end': request.form.get('end') or None,
+    }
+    # open-ended reports are as of today, so a cached result only lives for the day
+    fingerprint = files_fingerprint(BASE / 'config.yaml', UPLOAD_DIR / '*.csv') + str(pd.Timestamp.today().date())
+    wants_json = request.accept_mimetypes.best == 'application/json' or request.is_json
+    try:
+        job, created = report_jobs.submit('generate_reports', params, generate_reports, fingerprint,
+                                          workdir_param='outdir')
+    except QueueFull as e:
+        if wants_json:
+            return jsonify({'error': str(e)}), 429
+        flash(f'Too many reports in progress, try again shortly ({e})', 'error')
+        return redirect(url_for('index'))
+    if wants_json:
+        return jsonify({'job_id': job['id'], 'status': job['status'], 'created': created,
+                        'status_url': url_for('job_status', job_id=job['id'])}), 202
+    if job['status'] == 'done':
+        flash('Reports already up to date', 'success')
+    else:
+        flash(f"Report generation started (job {job['id']})", 'success')
     return redirect(url_for('index'))
 
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = report_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'unknown job'}), 404
+    job.pop('key', None)
+    if job['status'] == 'done':
+        job['downloads'] = [url_for('job_file', job_id=job_id, filename=os.path.basename(p))
+                            for p in job.get('result') or []]
+    return jsonify(job)
+
+@app.route('/jobs/<job_id>/<path:filename>')
+def job_file(job_id, filename):
+    if report_jobs.get(job_id) is None:
+        return jsonify({'error': 'unknown job'}), 404
+    return send_from_directory(str(report_jobs.results_dir / job_id), filename, as_attachment=True)
+
 # @app.route('/output/<path:filename>')
 # def download(filename):
 #     return send_from_directory(str(OUTPUT_DIR), filename, as_attachment=True)
 
+def latest_report(prefix, legacy_name):
+    """Newest PDF named prefix* anywhere under output/ (job directories included)."""
+    found = sorted(OUTPUT_DIR.rglob(f"{prefix}*.pdf"), key=lambda p: p.stat().st_mtime)
+    if found:
+        return found[-1]
+    legacy = OUTPUT_DIR / legacy_name
+    return legacy if legacy.exists() else Path(legacy_name)
+
 @app.route("/download/<report>")
 def download(report):
     if report == "income":
-        return send_file("income_statement.pdf", as_attachment=True)
+        return send_file(latest_report("Income_Statement", "income_statement.pdf"), as_attachment=True)
     elif report == "balance":
-        return send_file("balance_sheet.pdf", as_attachment=True)
+        return send_file(latest_report("Balance_Sheet", "balance_sheet.pdf"), as_attachment=True)
     else:
         return "Invalid report"
 
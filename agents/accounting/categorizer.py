@@ -1,13 +1,84 @@
+import hashlib
+import re
 import yaml
+import pandas as pd
+from category_cache import normalize_description
+
 class Categorizer:
-    def __init__(self,p):
-        with open(p) as f:
-            data = yaml.safe_load(f) or {}
+    def __init__(self,p, cache=None):
+        with open(p, 'rb') as f:
+            raw = f.read()
+        data = yaml.safe_load(raw) or {}
         self.rules = data.get('rules',[])
-    def classify(self, desc, fallback=None):
-        text = (desc or '').lower()
-        for rule in self.rules:
+        # category -> revenue/cogs/expense, from config.yaml's account_mapping
+        self.category_types = {}
+        for typ, cats in (data.get('account_mapping') or {}).items():
+            for c in (cats or []):
+                self.category_types.setdefault(c, typ)
+        self._compile()
+        self.cache = cache
+        if cache is not None:
+            cache.bind_rules(hashlib.sha256(raw).hexdigest(),
+                             {kw: (i, self.rules[i].get('category')) for kw, i in self._rank.items()})
+
+    def _compile(self):
+        # keyword -> index of the first rule that lists it (rule order is priority)
+        self._rank = {}
+        for i, rule in enumerate(self.rules):
             for kw in rule.get('keywords',[]):
-                if kw.lower() in t:
-                    return r.get('category', fallback), None
-        return fallback, None
+                kw = normalize_description(kw)
+                if kw and kw not in self._rank:
+                    self._rank[kw] = i
+        if not self._rank:
+            self._pattern = None
+            return
+        # zero-width lookahead so overlapping keywords are all reported,
+        # e.g. "google ads" does not hide a higher priority "goo"
+        alts = '|'.join(re.escape(kw) for kw in sorted(self._rank, key=self._rank.get))
+        self._pattern = re.compile(f'(?=({alts}))')
+
+    def _match(self, text):
+        if self._pattern is None:
+            return None
+        hits = self._pattern.findall(text)
+        if not hits:
+            return None
+        return self.rules[min(self._rank[h] for h in hits)].get('category')
+
+    def _label(self, texts):
+        if self.cache is None:
+            return {t: self._match(t) for t in texts}
+        labels = self.cache.get_many(texts)
+        missing = {t: self._match(t) for t in texts if t not in labels}
+        self.cache.put_many(missing)
+        labels.update(missing)
+        return labels
+
+    def classify(self, desc, fallback=None):
+        text = normalize_description(desc)
+        detected = self._label([text])[text]
+        return (detected if detected is not None else fallback), None
+
+    def classify_series(self, descriptions: pd.Series, fallback=None) -> pd.Series:
+        """Label a whole description Series with one compiled pattern.
+
+        Same first-match priority as classify(); each distinct description is
+        matched once, and only on a cache miss when a CategoryCache is attached.
+        fallback may be a scalar or a Series aligned to descriptions.
+        """
+        text = descriptions.fillna('').astype(str).str.lower()
+        text = text.str.replace(r'\s+', ' ', regex=True).str.strip()
+        out = text.map(self._label(list(text.unique())))
+        if isinstance(fallback, pd.Series):
+            return out.where(out.notna(), fallback)
+        return out.fillna(fallback) if fallback is not None else out
+
+    def categorize(self, df: pd.DataFrame, fallback='Uncategorized') -> pd.DataFrame:
+        df = df.copy()
+        base = df['category'] if 'category' in df else pd.Series(None, index=df.index, dtype=object)
+        base = base.where(base.notna() & (base.astype(str) != ''), fallback)
+        df['category'] = self.classify_series(df['description'], fallback=base)
+        if 'amount' in df:
+            sign_type = pd.Series('expense', index=df.index).where(df['amount'] < 0, 'revenue')
+            df['category_type'] = df['category'].map(self.category_types).fillna(sign_type)
+        return df
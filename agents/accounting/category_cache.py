@@ -0,0 +1,139 @@
+"""
+Persistent categorization cache for Categorizer.
+
+Entries are keyed on (rules hash, normalized description) and live in a small
+SQLite file next to config.yaml. When the rules file changes only the entries
+whose description contains an added, removed or re-categorized keyword are
+dropped; the rest are carried over to the new rules hash.
+"""
+
+import json
+import re
+import sqlite3
+import time
+
+_WS = re.compile(r'\s+')
+_CHUNK = 500  # stay well under SQLite's bound-parameter limit
+
+
+def normalize_description(desc):
+    return _WS.sub(' ', str(desc or '')).strip().lower()
+
+
+class CategoryCache:
+    def __init__(self, path, max_entries=100_000):
+        self.path = str(path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.rules_hash = None
+        self.conn = sqlite3.connect(self.path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                rules_hash TEXT NOT NULL,
+                description TEXT NOT NULL,
+                category TEXT,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (rules_hash, description)
+            );
+            CREATE INDEX IF NOT EXISTS entries_last_used ON entries(last_used);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+
+    def bind_rules(self, rules_hash, keyword_map):
+        """Switch the cache to a rule set. keyword_map is {keyword: (rank, category)}."""
+        row = self.conn.execute("SELECT value FROM meta WHERE key='rules'").fetchone()
+        if row:
+            old = json.loads(row[0])
+            if old['hash'] != rules_hash:
+                self._migrate(old['hash'], old['keywords'], rules_hash, keyword_map)
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta(key, value) VALUES ('rules', ?)",
+                (json.dumps({'hash': rules_hash, 'keywords': keyword_map}),),
+            )
+        self.rules_hash = rules_hash
+
+    def _migrate(self, old_hash, old_map, new_hash, new_map):
+        old_map = {k: tuple(v) for k, v in old_map.items()}
+        new_map = {k: tuple(v) for k, v in new_map.items()}
+        changed = {kw for kw in set(old_map) | set(new_map)
+                   if (old_map.get(kw) or (None, None))[1] != (new_map.get(kw) or (None, None))[1]}
+        # a reshuffle of category priority can flip any entry, so start over
+        if _category_order(old_map, new_map) != _category_order(new_map, old_map):
+            with self.conn:
+                self.conn.execute("DELETE FROM entries")
+            return
+        with self.conn:
+            self.conn.execute("DELETE FROM entries WHERE rules_hash != ?", (old_hash,))
+            if changed:
+                affected = re.compile('|'.join(re.escape(kw) for kw in changed))
+                stale = [(old_hash, d) for (d,) in self.conn.execute(
+                    "SELECT description FROM entries WHERE rules_hash=?", (old_hash,))
+                    if affected.search(d)]
+                self.conn.executemany(
+                    "DELETE FROM entries WHERE rules_hash=? AND description=?", stale)
+            self.conn.execute(
+                "UPDATE entries SET rules_hash=? WHERE rules_hash=?", (new_hash, old_hash))
+
+    def get_many(self, descriptions):
+        """Return {description: category} for cached entries; misses are absent."""
+        found = {}
+        for i in range(0, len(descriptions), _CHUNK):
+            chunk = descriptions[i:i + _CHUNK]
+            marks = ','.join('?' * len(chunk))
+            found.update(self.conn.execute(
+                f"SELECT description, category FROM entries "
+                f"WHERE rules_hash=? AND description IN ({marks})",
+                [self.rules_hash, *chunk]))
+        if found:
+            now = time.time()
+            with self.conn:
+                self.conn.executemany(
+                    "UPDATE entries SET last_used=? WHERE rules_hash=? AND description=?",
+                    [(now, self.rules_hash, d) for d in found])
+        self.hits += len(found)
+        self.misses += len(descriptions) - len(found)
+        return found
+
+    def put_many(self, labels):
+        if not labels:
+            return
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO entries(rules_hash, description, category, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                [(self.rules_hash, d, c, now) for d, c in labels.items()])
+            self._evict()
+
+    def _evict(self):
+        (count,) = self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+        if count > self.max_entries:
+            self.conn.execute(
+                "DELETE FROM entries WHERE rowid IN "
+                "(SELECT rowid FROM entries ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,))
+
+    def stats(self):
+        total = self.hits + self.misses
+        (size,) = self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+            'entries': size,
+        }
+
+    def close(self):
+        self.conn.close()
+
+
+def _category_order(a, b):
+    # category precedence among keywords both rule sets agree on
+    common = sorted((v[0], v[1]) for k, v in a.items() if k in b and b[k][1] == v[1])
+    order = []
+    for _, cat in common:
+        if cat not in order:
+            order.append(cat)
+    return order
@@ -1,13 +1,87 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+
 import pandas as pd
 import requests
 import io
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-def fetch_excel_from_url(url: str, sheet_name: str = None):
-    """Fetch Excel file from a cloud URL (Dropbox, OneDrive, Google Drive direct link)"""
-    r = requests.get(url)
+CACHE_DIR = Path(__file__).resolve().parent.parent / 'data' / 'excel_cache'
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def http_session(pool_size: int = 16) -> requests.Session:
+    """Process-wide pooled session (keep-alive, retries on 429/5xx) shared by all loaders."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            s = requests.Session()
+            retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                          allowed_methods=frozenset(['GET', 'HEAD']), respect_retry_after_header=True)
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+            s.mount('https://', adapter)
+            s.mount('http://', adapter)
+            _session = s
+        return _session
+
+
+def _write_atomic(path: Path, data: bytes):
+    # unique temp name: loaders for the same URL run concurrently
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def download_conditional(url: str, session: requests.Session = None, timeout: float = 30,
+                         cache_dir=CACHE_DIR):
+    """
+    GET url with If-None-Match / If-Modified-Since from the last download.
+    Returns (content bytes, changed flag); a 304 serves the cached body.
+    """
+    session = session or http_session()
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    stem = hashlib.sha1(url.encode()).hexdigest()[:16]
+    body_path, meta_path = cache_dir / f"{stem}.bin", cache_dir / f"{stem}.json"
+
+    headers = {}
+    if body_path.exists() and meta_path.exists():
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+    r = session.get(url, headers=headers, timeout=timeout)
+    if r.status_code == 304:
+        return body_path.read_bytes(), False
     r.raise_for_status()
 
-    excel_data = io.BytesIO(r.content)
+    meta = {'url': url, 'etag': r.headers.get('ETag'), 'last_modified': r.headers.get('Last-Modified')}
+    _write_atomic(body_path, r.content)
+    _write_atomic(meta_path, json.dumps(meta).encode())
+    return r.content, True
+
+
+def fetch_excel_from_url(url: str, sheet_name: str = None, session: requests.Session = None,
+                         timeout: float = 30):
+    """Fetch Excel file from a cloud URL (Dropbox, OneDrive, Google Drive direct link)"""
+    content, _ = download_conditional(url, session=session, timeout=timeout)
+
+    excel_data = io.BytesIO(content)
     df = pd.read_excel(excel_data, sheet_name=sheet_name)
 
     if "date" in df.columns:
@@ -1,16 +1,22 @@
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
 import pandas as pd
+from connectors.sheets_sync import SheetSync
 
-def fetch_google_sheets(sheet_name: str, worksheet: str, creds_path: str = "credentials.json"):
+def fetch_google_sheets(sheet_name: str, worksheet: str, creds_path: str = "credentials.json",
+                        incremental: bool = True, client=None):
     """Fetch data from a Google Sheet and return as DataFrame"""
-    scope = ["https://spreadsheets.google.com/feeds","https://www.googleapis.com/auth/drive"]
-    creds = ServiceAccountCredentials.from_json_keyfile_name(creds_path, scope)
-    client = gspread.authorize(creds)
+    if client is None:
+        scope = ["https://spreadsheets.google.com/feeds","https://www.googleapis.com/auth/drive"]
+        creds = ServiceAccountCredentials.from_json_keyfile_name(creds_path, scope)
+        client = gspread.authorize(creds)
 
-    sheet = client.open(sheet_name).worksheet(worksheet)
-    data = sheet.get_all_records()
-    df = pd.DataFrame(data)
+    if incremental:
+        df = SheetSync(client).sync(sheet_name, worksheet)
+    else:
+        sheet = client.open(sheet_name).worksheet(worksheet)
+        data = sheet.get_all_records()
+        df = pd.DataFrame(data)
     if "date" in df.columns:
         df["date"] = pd.to_datetime(df["date"], errors="coerce")
     return df
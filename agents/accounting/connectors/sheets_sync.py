@@ -0,0 +1,165 @@
+"""
+Incremental Google Sheets sync.
+
+For every configured worksheet a small JSON state file under data/sheets_cache/
+keeps the header, the cached rows, a hash per row and the spreadsheet revision
+(Drive modifiedTime) seen on the last run.
+
+- revision unchanged  -> served from the cache, no values are downloaded
+- revision changed    -> the worksheet is read again in one batch_get and
+                         diffed against the cached row hashes, so the report
+                         says what was appended or modified anywhere
+- tail_rows=N         -> opt-in for append-only sheets: a revision change
+                         reads only the header plus the last N cached rows
+                         and everything after them. Edits above the tail are
+                         not seen until the next full read, which happens
+                         when rows were removed, the header changed or every
+                         `full_every` syncs
+
+The client only needs open_by_url/open_by_key/open, worksheet/sheet1 and
+Worksheet.batch_get, so a small fake client can drive it in tests
+(see test_sheets_sync.py).
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+BASE = Path(__file__).resolve().parent.parent
+CACHE_DIR = BASE / 'data' / 'sheets_cache'
+
+READ_OPTS = {
+    # numbers come back as numbers, dates as the text shown in the sheet
+    'value_render_option': 'UNFORMATTED_VALUE',
+    'date_time_render_option': 'FORMATTED_STRING',
+}
+
+
+def row_hash(row):
+    return hashlib.sha1(json.dumps(row, default=str).encode()).hexdigest()
+
+
+def spreadsheet_revision(sh):
+    try:
+        rev = getattr(sh, 'lastUpdateTime', None)
+        if rev is None and hasattr(sh, 'get_lastUpdateTime'):
+            rev = sh.get_lastUpdateTime()
+        return str(rev) if rev else None
+    except Exception:
+        # revision metadata needs Drive scope; without it every sync reads the tail
+        return None
+
+
+class SheetSync:
+    def __init__(self, client, cache_dir=CACHE_DIR, tail_rows=None, full_every=24):
+        self.client = client
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.tail_rows = tail_rows
+        self.full_every = full_every
+        self.last_report = {}
+
+    def _state_path(self, key):
+        return self.cache_dir / f"{hashlib.sha1(key.encode()).hexdigest()[:16]}.json"
+
+    def _load_state(self, key):
+        path = self._state_path(key)
+        if path.exists():
+            with open(path) as f:
+                return json.load(f)
+        return None
+
+    def _save_state(self, key, state):
+        path = self._state_path(key)
+        # unique temp name: concurrent loaders may sync the same worksheet
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(state, f, default=str)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def _open(self, sheet):
+        # accepts a sheet URL, a spreadsheet key or a spreadsheet title
+        if sheet.startswith('http'):
+            return self.client.open_by_url(sheet)
+        if len(sheet) >= 40 and ' ' not in sheet:
+            return self.client.open_by_key(sheet)
+        return self.client.open(sheet)
+
+    def sync(self, sheet, worksheet=None) -> pd.DataFrame:
+        """Return the worksheet as a DataFrame, downloading only what changed."""
+        key = f"{sheet}::{worksheet or ''}"
+        sh = self._open(sheet)
+        ws = sh.worksheet(worksheet) if worksheet else sh.sheet1
+        revision = spreadsheet_revision(sh)
+        state = self._load_state(key)
+
+        if state and revision and state.get('revision') == revision:
+            self.last_report[key] = {'mode': 'cached', 'appended': 0, 'modified': 0}
+            return self._frame(state)
+
+        full = (not state or not self.tail_rows
+                or (state.get('syncs', 0) + 1) % self.full_every == 0)
+        if not full:
+            n = len(state['rows'])
+            start = max(0, n - self.tail_rows)
+            header, body = ws.batch_get(['A1:ZZZ1', f'A{start + 2}:ZZZ'], **READ_OPTS)
+            header = header[0] if header else []
+            if header != state['header'] or start + len(body) < n:
+                full = True  # columns changed or rows were deleted
+        if full:
+            values = ws.batch_get(['A1:ZZZ'], **READ_OPTS)[0]
+            header, rows = (values[0] if values else []), values[1:]
+            previous = state
+            state = {
+                'header': header,
+                'rows': [self._pad(r, len(header)) for r in rows],
+                'syncs': 0,
+            }
+            state['hashes'] = [row_hash(r) for r in state['rows']]
+            self.last_report[key] = {'mode': 'full', **self._diff(previous, state)}
+        else:
+            appended = modified = 0
+            for i, raw in enumerate(body):
+                row = self._pad(raw, len(header))
+                h = row_hash(row)
+                idx = start + i
+                if idx < n:
+                    if state['hashes'][idx] != h:
+                        state['rows'][idx], state['hashes'][idx] = row, h
+                        modified += 1
+                else:
+                    state['rows'].append(row)
+                    state['hashes'].append(h)
+                    appended += 1
+            state['syncs'] = state.get('syncs', 0) + 1
+            self.last_report[key] = {'mode': 'incremental', 'appended': appended, 'modified': modified}
+
+        state['revision'] = revision
+        self._save_state(key, state)
+        return self._frame(state)
+
+    @staticmethod
+    def _diff(old, new):
+        if not old or old['header'] != new['header']:
+            return {'appended': len(new['rows']), 'modified': 0}
+        kept = min(len(old['hashes']), len(new['hashes']))
+        modified = sum(a != b for a, b in zip(old['hashes'][:kept], new['hashes'][:kept]))
+        return {'appended': max(0, len(new['hashes']) - len(old['hashes'])), 'modified': modified}
+
+    @staticmethod
+    def _pad(row, width):
+        # the Sheets API trims trailing empty cells
+        row = list(row)[:width]
+        return row + [''] * (width - len(row))
+
+    @staticmethod
+    def _frame(state):
+        return pd.DataFrame(state['rows'], columns=state['header'])
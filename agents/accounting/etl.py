@@ -14,11 +14,14 @@ import datetime as dt
 from pathlib import Path
 # from agent import *
 from send_reports import send_telegram_reports, send_whatsapp_reports
-from statements import income_statement, balance_sheet
-from pdf_render import income_statement_pdf, balance_sheet_pdf
+from statements import income_statement, balance_sheet, build_statements
+from pdf_render import income_statement_pdf, balance_sheet_pdf, income_statement_pdf_grouped, balance_sheet_pdf_grouped
 from categorizer import Categorizer
+from category_cache import CategoryCache
 from plaid_loader import load_plaid_transactions
-from file_loader import load_google_sheets, load_excel_files, load_csv_files
+from file_loader import load_google_sheets, load_excel_files, load_csv_files, load_config
+from transaction_store import load_transactions
+from ingest import load_all_sources, stream_csv_statements
 from connectors.google_sheets import fetch_google_sheets
 from connectors.excel import fetch_excel_from_url
 
@@ -90,6 +93,12 @@ log_hsa_expense(
 
 # OUTPUT_DIR = "accounting_agent/output"
 OUTPUT_DIR = Path(__file__).parent / 'output'
+CONFIG_PATH = Path(__file__).parent / 'config.yaml'
+CATEGORY_CACHE_PATH = CONFIG_PATH.with_name('categorizer_cache.sqlite3')
+
+def load_categorizer():
+    # repeated merchant strings are served from the on-disk cache across runs
+    return Categorizer(str(CONFIG_PATH), cache=CategoryCache(CATEGORY_CACHE_PATH))
 
 def is_last_day_of_month(date):
     next_day = date + dt.timedelta(days=1)
@@ -167,69 +176,70 @@ def run_etl():
 def run_reports():
     today = dt.date.today()
 
-    # Load transactions from multiple sources
-    transactions = []
-    transactions.extend(load_plaid_transactions())
-    transactions.extend(load_google_sheets())
-    transactions.extend(load_excel_files())
-    transactions = Categorizer.classify(transactions)
-
-    # Always generate a daily snapshot (optional)
-    daily_income = income_statement(transactions, period="daily")
-    daily_balance = balance_sheet(transactions)
-    income_statement_pdf(daily_income, OUTPUT_DIR, f"Income_Statement_daily_{today}.pdf")
-    balance_sheet_pdf(daily_balance, OUTPUT_DIR, f"Balance_Sheet_daily_{today}.pdf")
-
-    # Monthly report: run on 1st of each month
+    # Load transactions from all sources in parallel
+    transactions, sources = load_all_sources(load_config(str(CONFIG_PATH)))
+    for name, info in sources.items():
+        print(f"  {name}: {info['status']} in {info['seconds']}s ({info['rows']} rows)"
+              + (f" - {info['error']}" if info['error'] else ""))
+    categorizer = load_categorizer()
+    transactions = categorizer.categorize(transactions)
+    print(f"Categorizer cache: {categorizer.cache.stats()}")
+
+    cfg = load_config(str(CONFIG_PATH))
+    company = cfg.get('company', {}).get('name', 'Company')
+    currency = cfg.get('company', {}).get('currency', 'USD')
+
+    # Always generate a daily snapshot (optional); period reports on the 1st
+    requests = {'daily': {'period': 'daily', 'start': today, 'end': today}}
     if today.day == 1:
-        month_start = today.replace(day=1)
-        prev_month_end = month_start - dt.timedelta(days=1)
-        prev_month_start = prev_month_end.replace(day=1)
-
-        monthly_income = income_statement(transactions, start_date=prev_month_start, end_date=prev_month_end, period="monthly")
-        monthly_balance = balance_sheet(transactions, date=prev_month_end)
-
-        income_pdf = income_statement_pdf(monthly_income, OUTPUT_DIR, f"Income_Statement_monthly_{prev_month_start}_{prev_month_end}.pdf")
-        balance_pdf = balance_sheet_pdf(monthly_balance, OUTPUT_DIR, f"Balance_Sheet_{prev_month_end}.pdf")
-
-        send_telegram_reports(income_pdf)
-        send_telegram_reports(balance_pdf)
-
-    # Quarterly report: run on Jan 1, Apr 1, Jul 1, Oct 1
+        # Monthly report: previous calendar month
+        prev_month_end = today - dt.timedelta(days=1)
+        requests['monthly'] = {'period': 'monthly', 'start': prev_month_end.replace(day=1), 'end': prev_month_end}
     if today.month in [1, 4, 7, 10] and today.day == 1:
+        # Quarterly report: run on Jan 1, Apr 1, Jul 1, Oct 1
         quarter_start_month = {1: 10, 4: 1, 7: 4, 10: 7}[today.month]
         year = today.year if today.month != 1 else today.year - 1
-        quarter_start = dt.date(year, quarter_start_month, 1)
-        quarter_end = today - dt.timedelta(days=1)
-
-        quarterly_income = income_statement(transactions, start_date=quarter_start, end_date=quarter_end, period="quarterly")
-        quarterly_balance = balance_sheet(transactions, date=quarter_end)
-
-        income_pdf = income_statement_pdf(quarterly_income, OUTPUT_DIR, f"Income_Statement_quarterly_{quarter_start}_{quarter_end}.pdf")
-        balance_pdf = balance_sheet_pdf(quarterly_balance, OUTPUT_DIR, f"Balance_Sheet_{quarter_end}.pdf")
-
-        send_telegram_reports(income_pdf)
-        send_telegram_reports(balance_pdf)
-
-    # Annual report: run on Jan 1
+        requests['quarterly'] = {'period': 'quarterly', 'start': dt.date(year, quarter_start_month, 1),
+                                 'end': today - dt.timedelta(days=1)}
     if today.month == 1 and today.day == 1:
+        # Annual report: run on Jan 1
         last_year = today.year - 1
-        year_start = dt.date(last_year, 1, 1)
-        year_end = dt.date(last_year, 12, 31)
-
-        annual_income = income_statement(transactions, start_date=year_start, end_date=year_end, period="annual")
-        annual_balance = balance_sheet(transactions, date=year_end)
-
-        income_pdf = income_statement_pdf(annual_income, OUTPUT_DIR, f"Income_Statement_annual_{last_year}.pdf")
-        balance_pdf = balance_sheet_pdf(annual_balance, OUTPUT_DIR, f"Balance_Sheet_{last_year}.pdf")
-
-        send_telegram_reports(income_pdf)
-        send_telegram_reports(balance_pdf)
+        requests['annual'] = {'period': 'annual', 'start': dt.date(last_year, 1, 1), 'end': dt.date(last_year, 12, 31)}
+
+    # One pass over the ledger for every statement requested today
+    statements = build_statements(transactions, cfg.get('opening_balances', {}), requests)
+
+    for name, req in requests.items():
+        start, end = req['start'], req['end']
+        label = f"{today}" if name == 'daily' else f"{start}_{end}"
+        income_pdf = os.path.join(OUTPUT_DIR, f"Income_Statement_{name}_{label}.pdf")
+        balance_pdf = os.path.join(OUTPUT_DIR, f"Balance_Sheet_{name}_{end}.pdf")
+        income_statement_pdf_grouped(income_pdf, company, f"{name} {start} to {end}", statements[name]['income'], currency)
+        balance_sheet_pdf_grouped(balance_pdf, company, statements[name]['balance'], currency)
+        if name != 'daily':
+            send_telegram_reports([income_pdf, balance_pdf])
+
+def run_streaming_reports(period="monthly", chunksize=100_000):
+    """Period statements straight from the CSV exports, streamed in fixed-size chunks."""
+    today = dt.date.today()
+    cfg = load_config(str(CONFIG_PATH))
+    company = cfg.get('company', {}).get('name', 'Company')
+    currency = cfg.get('company', {}).get('currency', 'USD')
+    statements = stream_csv_statements(cfg['datasource_csv']['csv_glob'], load_categorizer(),
+                                       cfg.get('opening_balances', {}),
+                                       {period: {'period': period, 'end': today}}, chunksize=chunksize)
+    income_pdf = os.path.join(OUTPUT_DIR, f"Income_Statement_{period}_{today}.pdf")
+    balance_pdf = os.path.join(OUTPUT_DIR, f"Balance_Sheet_{today}.pdf")
+    income_statement_pdf_grouped(income_pdf, company, f"{period} to {today}", statements[period]['income'], currency)
+    balance_sheet_pdf_grouped(balance_pdf, company, statements[period]['balance'], currency)
+    return income_pdf, balance_pdf
 
 def run_local_transactions():
-    transactions = []
-    transactions.extend(load_csv_files())
-    transactions = Categorizer.classify(transactions)
+    csv_glob = load_config(str(CONFIG_PATH))['datasource_csv']['csv_glob']
+    transactions = load_transactions(csv_glob)
+    categorizer = load_categorizer()
+    transactions = categorizer.categorize(transactions)
+    print(f"Categorizer cache: {categorizer.cache.stats()}")
     inc_stmt = income_statement(transactions)
     bal_sheet = balance_sheet(transactions)
     income_statement_pdf(inc_stmt, OUTPUT_DIR, f"Income_Statement_daily_{today}.pdf")
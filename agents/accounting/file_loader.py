@@ -1,11 +1,38 @@
 import pandas as pd
-import requests
 from io import BytesIO
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
 from google.oauth2.service_account import Credentials
 import yaml
 import glob
+import os
+from connectors.sheets_sync import SheetSync
+from connectors.excel import download_conditional, http_session
+
+
+TRANSACTION_COLUMNS = ['date', 'description', 'amount', 'account', 'category', 'Source']
+
+
+def normalize_transactions(df: pd.DataFrame, source: str = None) -> pd.DataFrame:
+    """
+    Map a raw export onto the normalized transaction schema.
+    Column names are matched case-insensitively; rows without a date or amount are dropped.
+    """
+    cols = {str(c).strip().lower(): c for c in df.columns}
+
+    def pick(name, default=''):
+        col = cols.get(name.lower())
+        return df[col] if col is not None else pd.Series(default, index=df.index)
+
+    out = pd.DataFrame({
+        'date': pd.to_datetime(pick('date', None), errors='coerce'),
+        'description': pick('description').fillna('').astype(str),
+        'amount': pd.to_numeric(pick('amount', None), errors='coerce').astype('float64'),
+        'account': pick('account').fillna('').astype(str),
+        'category': pick('category').fillna('').astype(str),
+        'Source': pick('Source', source or '').fillna(source or '').astype(str),
+    })
+    return out.dropna(subset=['date', 'amount']).reset_index(drop=True)
 
 
 def load_config(config_path: str = "config.yaml"):
@@ -30,51 +57,101 @@ def load_from_sheets(spreadsheet_key, worksheet_name='Transactions', creds_path=
         df['amount'] = pd.to_numeric(df['amount'], errors='coerce')
     return df.dropna(subset=['date','description','amount','account','category'])
 
-def load_google_sheets(creds_file="service_account.json"):
-    """
-    Load multiple Google Sheets defined in config.yaml
-    Returns concatenated DataFrame
-    """
-    scopes = ["https://www.googleapis.com/auth/spreadsheets.readonly"]
+def sheets_client(creds_file="service_account.json", timeout=30):
+    # Drive read scope lets the incremental sync see each spreadsheet's revision
+    scopes = ["https://www.googleapis.com/auth/spreadsheets.readonly",
+              "https://www.googleapis.com/auth/drive.metadata.readonly"]
     creds = Credentials.from_service_account_file(creds_file, scopes=scopes)
     client = gspread.authorize(creds)
-    config = load_config()
-    frames = []
-    for entry in config.get("google_sheets", []):
-        sheet_url = entry["sheet_url"]
-        name = entry.get("name", "Sheet")
+    client.set_timeout(timeout)  # gspread waits forever by default
+    return client
+
+
+def load_google_sheet(entry, client, syncer=None):
+    """
+    Load one configured Google Sheet (first worksheet)
+    """
+    sheet_url = entry["sheet_url"]
+    name = entry.get("name", "Sheet")
+    if syncer:
+        df = syncer.sync(sheet_url)
+    else:
         sh = client.open_by_url(sheet_url)
         ws = sh.sheet1  # Default first sheet, could extend to match gid if needed
         df = pd.DataFrame(ws.get_all_records())
-        df["Source"] = f"GoogleSheet:{name}"
-        frames.append(df)
+    df["Source"] = f"GoogleSheet:{name}"
+    return df
+
+
+def load_google_sheets(creds_file="service_account.json", incremental=True, client=None):
+    """
+    Load multiple Google Sheets defined in config.yaml
+    Returns concatenated DataFrame
+    With incremental=True values are only downloaded when the spreadsheet changed (see connectors/sheets_sync.py)
+    """
+    client = client or sheets_client(creds_file)
+    config = load_config()
+    syncer = SheetSync(client) if incremental else None
+    frames = [load_google_sheet(entry, client, syncer) for entry in config.get("google_sheets", [])]
 
     return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
 
 
-def load_excel_files():
+def load_excel_file(entry, session=None, timeout=30):
+    """
+    Load one configured Excel file; re-downloads only when the server reports a change
+    """
+    url = entry["file_url"]
+    sheet_name = entry.get("sheet_name", 0)
+    name = entry.get("name", "ExcelFile")
+    content, _ = download_conditional(url, session=session, timeout=timeout)
+    df = pd.read_excel(BytesIO(content), sheet_name=sheet_name)
+    df["Source"] = f"Excel:{name}"
+    return df
+
+
+def load_excel_files(session=None, timeout=30):
     """
     Load Excel files from URLs with sheet name
     """
     config = load_config()
+    session = session or http_session()
     frames = []
     for entry in config.get("excel_files", []):
-        url = entry["file_url"]
-        sheet_name = entry.get("sheet_name", 0)
-        name = entry.get("name", "ExcelFile")
-
         try:
-            response = requests.get(url)
-            response.raise_for_status()
-            df = pd.read_excel(BytesIO(response.content), sheet_name=sheet_name)
-            df["Source"] = f"Excel:{name}"
-            frames.append(df)
+            frames.append(load_excel_file(entry, session=session, timeout=timeout))
         except Exception as e:
-            print(f"❌ Error loading Excel {name} from {url}: {e}")
+            print(f"❌ Error loading Excel {entry.get('name', 'ExcelFile')} from {entry.get('file_url')}: {e}")
 
     return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
 
 def load_csv_files():
     config = load_config()
     csv_glob = config['datasource_csv']['csv_glob']
-    return pd.concat([pd.read_csv(f) for f in glob.glob(csv_glob)], ignore_index=True)
\ No newline at end of file
+    return pd.concat([pd.read_csv(f) for f in glob.glob(csv_glob)], ignore_index=True)
+
+
+# amount is read as text: normalize_transactions coerces it, so a dirty cell drops its row
+# instead of aborting the whole stream, exactly as in the eager loaders
+CSV_DTYPES = {'description': 'string', 'amount': 'string', 'account': 'string',
+              'category': 'string', 'source': 'string'}
+
+
+def iter_csv_chunks(csv_glob=None, chunksize=100_000):
+    """
+    Stream every CSV matched by csv_glob as normalized chunks of at most chunksize rows.
+    Only the schema columns are parsed, as text, so memory stays flat
+    regardless of how much history the exports hold.
+    """
+    if csv_glob is None:
+        csv_glob = load_config()['datasource_csv']['csv_glob']
+    for path in sorted(glob.glob(csv_glob)):
+        header = pd.read_csv(path, nrows=0).columns
+        wanted = {c: CSV_DTYPES.get(str(c).strip().lower()) for c in header
+                  if str(c).strip().lower() in set(CSV_DTYPES) | {'date'}}
+        dtypes = {c: t for c, t in wanted.items() if t}
+        reader = pd.read_csv(path, usecols=list(wanted), dtype=dtypes, chunksize=chunksize)
+        name = os.path.basename(path)
+        for chunk in reader:
+            yield normalize_transactions(chunk, source=f"CSV:{name}")
+
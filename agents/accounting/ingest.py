@@ -0,0 +1,143 @@
+"""
+Concurrent ingestion for the accounting ETL.
+
+Every configured source (Plaid, each Google Sheet, each Excel URL) is loaded
+on its own worker thread, so wall time is the slowest source rather than the
+sum of all of them. Each source has its own timeout, HTTP downloads share one
+pooled session, and every source reports its own latency.
+"""
+
+import datetime as dt
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+import pandas as pd
+
+from connectors.excel import http_session
+from connectors.sheets_sync import SheetSync
+from file_loader import (iter_csv_chunks, load_config, load_excel_file, load_google_sheet,
+                         normalize_transactions, sheets_client)
+from plaid_loader import load_plaid_transactions
+from statements import StatementEngine
+
+DEFAULT_TIMEOUT = 120  # seconds per source
+
+
+def _source_key(kind, entry, index, default, taken):
+    """Report key for one configured entry; unnamed or repeated names get the list index."""
+    name = entry.get('name')
+    key = f"{kind}:{name or default}"
+    if not name or key in taken:
+        key = f"{key}#{index}"
+    return key
+
+
+def load_concurrently(sources: dict, timeouts: dict = None, default_timeout=DEFAULT_TIMEOUT, max_workers=8):
+    """
+    Run {name: zero-arg loader} in parallel.
+    Returns (frames, report): frames maps name -> DataFrame for sources that
+    succeeded; report maps every name -> {'status', 'seconds', 'rows', 'error'}.
+    """
+    timeouts = timeouts or {}
+    frames, report = {}, {}
+    if not sources:
+        return frames, report
+
+    def timed(fn):
+        t0 = time.perf_counter()
+        try:
+            return fn(), None, time.perf_counter() - t0
+        except Exception as e:
+            return None, e, time.perf_counter() - t0
+
+    # daemon threads rather than a ThreadPoolExecutor: executor workers are joined at
+    # interpreter exit, so a hung source would still hold up the run after its timeout
+    futures = {name: Future() for name in sources}
+    pending = queue.SimpleQueue()
+    for name in sources:
+        pending.put(name)
+
+    def worker():
+        while True:
+            try:
+                name = pending.get_nowait()
+            except queue.Empty:
+                return
+            if futures[name].set_running_or_notify_cancel():
+                futures[name].set_result(timed(sources[name]))
+
+    for i in range(min(max_workers, len(sources))):
+        threading.Thread(target=worker, name=f'ingest_{i}', daemon=True).start()
+
+    started = time.perf_counter()
+    for name, fut in futures.items():
+        budget = timeouts.get(name, default_timeout)
+        remaining = max(0.0, started + budget - time.perf_counter())
+        try:
+            df, err, seconds = fut.result(timeout=remaining)
+        except FutureTimeout:
+            fut.cancel()
+            report[name] = {'status': 'timeout', 'seconds': budget, 'rows': 0,
+                            'error': f"no result after {budget}s"}
+            continue
+        if err is not None:
+            report[name] = {'status': 'error', 'seconds': round(seconds, 3), 'rows': 0, 'error': str(err)}
+        else:
+            frames[name] = df
+            report[name] = {'status': 'ok', 'seconds': round(seconds, 3), 'rows': len(df), 'error': None}
+    return frames, report
+
+
+def configured_sources(cfg: dict, creds_file="service_account.json", session=None, http_timeout=30):
+    """Build one loader per configured Plaid account, Google Sheet and Excel URL."""
+    session = session or http_session()
+    sources = {}
+
+    plaid = cfg.get('plaid') or {}
+    if plaid.get('access_token'):
+        start = plaid.get('start_date') or cfg.get('company', {}).get('fiscal_year_start')
+        end = plaid.get('end_date') or str(dt.date.today())
+        sources['plaid'] = lambda: pd.DataFrame(
+            load_plaid_transactions(plaid['access_token'], str(start), str(end))).assign(Source='Plaid')
+
+    sheets = cfg.get('google_sheets') or []
+    if sheets:
+        state, lock = {}, threading.Lock()
+
+        def sheet_loader(entry):
+            def load():
+                # the gspread client is created lazily so a missing key file only fails the sheet sources
+                with lock:
+                    if 'client' not in state:
+                        state['client'] = sheets_client(creds_file, timeout=http_timeout)
+                        state['syncer'] = SheetSync(state['client'])
+                return load_google_sheet(entry, state['client'], state['syncer'])
+            return load
+
+        for i, entry in enumerate(sheets):
+            sources[_source_key('sheets', entry, i, 'Sheet', sources)] = sheet_loader(entry)
+
+    for i, entry in enumerate(cfg.get('excel_files') or []):
+        sources[_source_key('excel', entry, i, 'ExcelFile', sources)] = (
+            lambda entry=entry: load_excel_file(entry, session=session, timeout=http_timeout))
+    return sources
+
+
+def load_all_sources(cfg: dict = None, timeouts: dict = None, default_timeout=DEFAULT_TIMEOUT, **kwargs):
+    """Load every configured source in parallel into one normalized transactions frame."""
+    cfg = cfg if cfg is not None else load_config()
+    frames, report = load_concurrently(configured_sources(cfg, **kwargs), timeouts, default_timeout)
+    normalized = [normalize_transactions(df) for df in frames.values() if not df.empty]
+    df = pd.concat(normalized, ignore_index=True) if normalized else normalize_transactions(pd.DataFrame())
+    return df, report
+
+
+def stream_csv_statements(csv_glob, categorizer, opening_balances: dict, requests: dict, chunksize=100_000):
+    """
+    Build statements from very large CSV exports without materializing the ledger:
+    each chunk is read with fixed dtypes, categorized and folded into daily aggregates.
+    """
+    chunks = (categorizer.categorize(chunk) for chunk in iter_csv_chunks(csv_glob, chunksize))
+    return StatementEngine.from_chunks(chunks, opening_balances).run(requests)
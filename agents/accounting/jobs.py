@@ -0,0 +1,162 @@
+"""
+In-process background jobs for the Flask app.
+
+Report generation runs on a small bounded worker pool inside the web process
+instead of a blocking subprocess per request. Every job gets an id; identical
+requests (same kind, parameters and input fingerprint) that are still queued
+or running share one job, and finished results are kept on disk so a repeat
+request with unchanged inputs is answered without running again.
+
+Each job can be given its own output directory (results_dir/<job id>/), so
+two jobs for the same period never write to the same files. Finished jobs
+are dropped from memory after finished_ttl seconds or once more than
+max_finished are held; get() still finds them on disk.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+import traceback
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+
+class QueueFull(RuntimeError):
+    pass
+
+
+class JobQueue:
+    def __init__(self, results_dir, workers=2, max_pending=16, finished_ttl=3600, max_finished=256):
+        self.results_dir = Path(results_dir)
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        self.max_pending = max_pending
+        self.finished_ttl = finished_ttl
+        self.max_finished = max_finished
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='report-job')
+        self.lock = threading.Lock()
+        self.jobs = {}       # job id -> job record
+        self.in_flight = {}  # dedup key -> job id
+        self.finished = deque()  # (finished or reused at, job id), oldest first
+
+    @staticmethod
+    def job_key(kind, params, fingerprint=''):
+        payload = json.dumps({'kind': kind, 'params': params, 'fingerprint': fingerprint},
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def submit(self, kind, params, fn, fingerprint='', workdir_param=None):
+        """
+        Queue fn(**params). Returns (job, created): created is False when an
+        identical job is already in flight or a cached result was reused.
+        With workdir_param, fn also gets that keyword set to the job's own
+        output directory (not part of the dedup key).
+        Raises QueueFull when max_pending jobs are already waiting or running.
+        """
+        key = self.job_key(kind, params, fingerprint)
+        with self.lock:
+            self._evict()
+            if key in self.in_flight:
+                return dict(self.jobs[self.in_flight[key]]), False
+            cached = self._cached(key)
+            if cached:
+                if cached['id'] not in self.jobs:
+                    self.jobs[cached['id']] = cached
+                    self.finished.append((time.time(), cached['id']))
+                return dict(self.jobs[cached['id']]), False
+            if len(self.in_flight) >= self.max_pending:
+                raise QueueFull(f"{len(self.in_flight)} report jobs already pending")
+            job = {
+                'id': uuid.uuid4().hex,
+                'key': key,
+                'kind': kind,
+                'params': params,
+                'status': QUEUED,
+                'submitted_at': time.time(),
+                'started_at': None,
+                'finished_at': None,
+                'result': None,
+                'error': None,
+            }
+            self.jobs[job['id']] = job
+            self.in_flight[key] = job['id']
+        call = dict(params)
+        if workdir_param:
+            workdir = self.results_dir / job['id']
+            workdir.mkdir(exist_ok=True)
+            call[workdir_param] = str(workdir)
+        self.pool.submit(self._run, job['id'], fn, call)
+        return dict(job), True
+
+    def _run(self, job_id, fn, params):
+        with self.lock:
+            job = self.jobs[job_id]
+            job['status'], job['started_at'] = RUNNING, time.time()
+        try:
+            result, error, status = fn(**params), None, DONE
+        except (Exception, SystemExit) as e:
+            result, error, status = None, f"{e}\n{traceback.format_exc(limit=5)}", FAILED
+        with self.lock:
+            job.update(status=status, result=result, error=error, finished_at=time.time())
+            self.in_flight.pop(job['key'], None)
+            self._save(job)
+            self.finished.append((job['finished_at'], job_id))
+            self._evict()
+
+    def _evict(self):
+        # finished jobs stay readable through get(), which falls back to disk
+        cutoff = time.time() - self.finished_ttl
+        while self.finished and (len(self.finished) > self.max_finished or self.finished[0][0] < cutoff):
+            _, job_id = self.finished.popleft()
+            self.jobs.pop(job_id, None)
+
+    def get(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                job = self._load(self.results_dir / f"{job_id}.json")
+            return dict(job) if job else None
+
+    def _save(self, job):
+        path = self.results_dir / f"{job['id']}.json"
+        tmp = path.with_suffix('.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(job, f, default=str)
+        os.replace(tmp, path)
+        if job['status'] == DONE:
+            (self.results_dir / f"{job['key']}.key").write_text(job['id'])
+
+    @staticmethod
+    def _load(path):
+        if not path.exists():
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def _cached(self, key):
+        # a finished result is reusable while every file it produced still exists
+        marker = self.results_dir / f"{key}.key"
+        if not marker.exists():
+            return None
+        job = self._load(self.results_dir / f"{marker.read_text().strip()}.json")
+        if not job or job.get('status') != DONE:
+            return None
+        if any(not os.path.exists(p) for p in (job.get('result') or [])):
+            return None
+        return job
+
+
+def files_fingerprint(*patterns):
+    """mtime/size digest of the files a job reads, so cached results expire when inputs change."""
+    h = hashlib.sha256()
+    for pattern in patterns:
+        for path in sorted(glob.glob(str(pattern))):
+            st = os.stat(path)
+            h.update(f"{path}:{st.st_mtime_ns}:{st.st_size};".encode())
+    return h.hexdigest()
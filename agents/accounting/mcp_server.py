@@ -33,8 +33,8 @@ from mcp.types import (
 # Import our app modules
 from file_loader import load_config
 from categorizer import Categorizer
-from statements import income_statement, balance_sheet
-from pdf_render import income_statement_pdf, balance_sheet_pdf
+from statements import income_statement_grouped, balance_sheet_grouped
+from pdf_render import income_statement_pdf_grouped, balance_sheet_pdf_grouped
 from send_reports import send_telegram_reports, send_whatsapp_reports
 
 class AccountingMCPServer:
@@ -335,16 +335,8 @@ class AccountingMCPServer:
             df = pd.read_csv(file_path, parse_dates=["date"])
             df = self._classify_transactions(df)
             
-            # Generate reports
-            inc = income_statement(df)
-            bal = balance_sheet({"assets": {}, "liabilities": {}, "equity": {}}, df, df["date"].max())
-            
-            # Create PDFs
-            income_pdf = self.output_dir / "income_statement.pdf"
-            balance_pdf = self.output_dir / "balance_sheet.pdf"
-            
-            income_statement_pdf(inc, str(income_pdf))
-            balance_sheet_pdf(bal, str(balance_pdf))
+            # Generate reports and create PDFs
+            income_pdf, balance_pdf = self._render_reports(df)
             
             result = f"✅ Reports generated successfully:\n- Income Statement: {income_pdf}\n- Balance Sheet: {balance_pdf}"
             
@@ -399,16 +391,8 @@ class AccountingMCPServer:
         try:
             df = self._classify_transactions(df)
             
-            # Generate reports
-            inc = income_statement(df)
-            bal = balance_sheet({"assets": {}, "liabilities": {}, "equity": {}}, df, df["date"].max())
-            
-            # Create PDFs
-            income_pdf = self.output_dir / "income_statement.pdf"
-            balance_pdf = self.output_dir / "balance_sheet.pdf"
-            
-            income_statement_pdf(inc, str(income_pdf))
-            balance_sheet_pdf(bal, str(balance_pdf))
+            # Generate reports and create PDFs
+            income_pdf, balance_pdf = self._render_reports(df)
             
             result = f"✅ Reports generated from {source}:\n- Income Statement: {income_pdf}\n- Balance Sheet: {balance_pdf}"
             
@@ -499,9 +483,10 @@ class AccountingMCPServer:
     async def _list_reports(self, args: Dict[str, Any]) -> CallToolResult:
         """List available reports"""
         try:
-            pdf_files = list(self.output_dir.glob("*.pdf"))
+            # reports generated through the web app live under output/jobs/<job id>/
+            pdf_files = sorted(self.output_dir.rglob("*.pdf"))
             if pdf_files:
-                report_list = "\n".join([f"- {f.name}" for f in pdf_files])
+                report_list = "\n".join([f"- {f.relative_to(self.output_dir)}" for f in pdf_files])
                 return CallToolResult(
                     content=[TextContent(type="text", text=f"📊 Available reports:\n{report_list}")]
                 )
@@ -529,9 +514,25 @@ class AccountingMCPServer:
     
     def _classify_transactions(self, df: pd.DataFrame) -> pd.DataFrame:
         """Classify transactions using the categorizer"""
-        categorizer = Categorizer()
+        categorizer = Categorizer(str(self.base_dir / 'config.yaml'))
         return categorizer.categorize(df)
     
+    def _render_reports(self, df: pd.DataFrame):
+        """Monthly income statement and balance sheet PDFs for classified transactions"""
+        cfg = load_config(str(self.base_dir / 'config.yaml'))
+        company = cfg.get('company', {}).get('name', 'Company')
+        currency = cfg.get('company', {}).get('currency', 'USD')
+        df = df.assign(date=pd.to_datetime(df["date"]))
+        start, end = df["date"].min(), df["date"].max()
+        inc = income_statement_grouped(df, period='monthly')
+        bal = balance_sheet_grouped(cfg.get('opening_balances', {}), df, as_of_date=end)
+        
+        income_pdf = self.output_dir / "income_statement.pdf"
+        balance_pdf = self.output_dir / "balance_sheet.pdf"
+        income_statement_pdf_grouped(str(income_pdf), company, f"monthly {start.date()} to {end.date()}", inc, currency)
+        balance_sheet_pdf_grouped(str(balance_pdf), company, bal, currency)
+        return income_pdf, balance_pdf
+    
     async def run(self):
         """Run the MCP server"""
         async with stdio_server() as (read_stream, write_stream):
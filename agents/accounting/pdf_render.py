@@ -4,6 +4,94 @@ from reportlab.lib.pagesizes import LETTER
 from reportlab.pdfgen import canvas
 from reportlab.lib import colors
 from reportlab.lib.units import inch
+import functools
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+import pandas as pd
+
+# Bump whenever a renderer's layout changes so cached PDFs are not reused
+TEMPLATE_VERSION = 1
+RENDER_CACHE_DIR = Path(os.environ.get('PDF_RENDER_CACHE', Path(__file__).parent / 'output' / '.render_cache'))
+RENDER_CACHE_MAX_AGE = float(os.environ.get('PDF_RENDER_CACHE_MAX_AGE_DAYS', 30)) * 86400
+RENDER_CACHE_MAX_BYTES = int(os.environ.get('PDF_RENDER_CACHE_MAX_MB', 200)) * 1024 * 1024
+
+def _fingerprint(h, obj):
+    if isinstance(obj, pd.DataFrame):
+        h.update(json.dumps([str(c) for c in obj.columns]).encode())
+        h.update(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+    elif isinstance(obj, pd.Series):
+        h.update(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+    else:
+        h.update(json.dumps(obj, sort_keys=True, default=str).encode())
+    h.update(b'|')
+
+def render_key(kind, *args, **kwargs):
+    """Content hash of a statement render: data, company, labels, currency and template version."""
+    h = hashlib.sha256(f"{kind}:v{TEMPLATE_VERSION}|".encode())
+    for a in args:
+        _fingerprint(h, a)
+    for k in sorted(kwargs):
+        h.update(k.encode())
+        _fingerprint(h, kwargs[k])
+    return h.hexdigest()
+
+def evict_render_cache(cache_dir=None, max_age=None, max_bytes=None):
+    """Drop cached PDFs older than max_age seconds, then the least recently used until under max_bytes."""
+    cache_dir = Path(cache_dir or RENDER_CACHE_DIR)
+    max_age = RENDER_CACHE_MAX_AGE if max_age is None else max_age
+    max_bytes = RENDER_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    if not cache_dir.exists():
+        return
+    now = time.time()
+    entries = []
+    for p in cache_dir.glob('*.pdf'):
+        st = p.stat()
+        if now - st.st_mtime > max_age:
+            p.unlink(missing_ok=True)
+        else:
+            entries.append((st.st_mtime, st.st_size, p))
+    total = sum(size for _, size, _ in entries)
+    for _, size, p in sorted(entries):
+        if total <= max_bytes:
+            break
+        p.unlink(missing_ok=True)
+        total -= size
+
+def cached_render(kind):
+    """
+    Skip reportlab when an identical statement was rendered before: the PDF is
+    served from the content-addressed cache and copied to the requested path.
+    Returns the output path.
+    """
+    def decorator(render):
+        @functools.wraps(render)
+        def wrapper(path, *args, **kwargs):
+            RENDER_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            blob = RENDER_CACHE_DIR / f"{render_key(kind, *args, **kwargs)}.pdf"
+            if blob.exists():
+                os.utime(blob)  # mtime doubles as last-used time
+                if not (os.path.exists(path) and os.path.samefile(path, blob)):
+                    shutil.copyfile(blob, path)
+                return path
+            render(path, *args, **kwargs)
+            # unique temp name: concurrent renders of the same content must not share one
+            fd, tmp = tempfile.mkstemp(dir=blob.parent, suffix='.tmp')
+            os.close(fd)
+            try:
+                shutil.copyfile(path, tmp)
+                os.replace(tmp, blob)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+            evict_render_cache()
+            return path
+        return wrapper
+    return decorator
 
 def draw_table(c, x, y, data, col_widths=None, row_height=18, header=True):
     # data: list of lists (rows)
@@ -30,6 +118,7 @@ def draw_table(c, x, y, data, col_widths=None, row_height=18, header=True):
         curr_y -= row_height
     return curr_y
 
+@cached_render("income_grouped")
 def income_statement_pdf_grouped(path, company, period_label, df, currency="USD"):
     c = canvas.Canvas(path, pagesize=LETTER)
     width, height = LETTER
@@ -52,7 +141,8 @@ def income_statement_pdf_grouped(path, company, period_label, df, currency="USD"
     y = draw_table(c, 72, height-130, rows, col_widths=[1.4*inch, 0.9*inch, 0.8*inch, 1.0*inch, 0.8*inch, 0.9*inch])
     c.showPage()
     c.save()
-def balance_sheet_pdf(path, company, bs, currency="USD"):
+@cached_render("balance_grouped")
+def balance_sheet_pdf_grouped(path, company, bs, currency="USD"):
     c = canvas.Canvas(path, pagesize=LETTER)
     width, height = LETTER
     c.setFont("Helvetica-Bold", 16)
@@ -90,6 +180,7 @@ def balance_sheet_pdf(path, company, bs, currency="USD"):
     c.showPage()
     c.save()
 
+@cached_render("income")
 def income_statement_pdf(path, company, period_label, df, currency='USD'):
     c = canvas.Canvas(str(path), pagesize=LETTER)
     c.drawString(72, 750, f"{company} - Income Statement ({period_label})")
@@ -101,6 +192,7 @@ def income_statement_pdf(path, company, period_label, df, currency='USD'):
         y-=16
     c.showPage(); c.save()
 
+@cached_render("balance")
 def balance_sheet_pdf(path, company, bs, currency='USD'):
     c = canvas.Canvas(str(path), pagesize=LETTER)
     c.drawString(72,750,f"{company} - Balance Sheet (As of {bs['as_of']})")
@@ -1,7 +1,12 @@
 import pandas as pd
 from dateutil.relativedelta import relativedelta
 
+PERIOD_FREQ = {'daily': 'D', 'monthly': 'M', 'quarterly': 'Q', 'annual': 'Y'}
+CATEGORY_TYPES = ['revenue', 'cogs', 'expense']
+
 def to_period(df, period='monthly'):
+    if period == 'daily':
+        return df.groupby([df['date'].dt.to_period('D')])
     if period == 'monthly':
         return df.groupby([df['date'].dt.to_period('M')])
     if period == 'quarterly':
@@ -9,7 +14,7 @@ def to_period(df, period='monthly'):
         return df.groupby([df['date'].dt.to_period('Q')])
     if period == 'annual':
         return df.groupby([df['date'].dt.to_period('Y')])
-    raise ValueError("period must be monthly|quarterly|annual")
+    raise ValueError("period must be daily|monthly|quarterly|annual")
 
 def income_statement_grouped(transactions: pd.DataFrame, period='monthly'):
     # Expect columns: date, amount, category_type in {'revenue','cogs','expense'}
@@ -37,47 +42,17 @@ def balance_sheet_grouped(opening_balances: dict, transactions: pd.DataFrame, as
     # opening_balances: dict with assets/liabilities/equity dicts
     # transactions: may include movements affecting assets/liabilities/equity accounts
     # For simplicity, we compute retained earnings from net income YTD.
-    df = transactions.copy()
-    df = df[df['date'] <= pd.Timestamp(as_of_date)]
-    # Sum by category_type
-    rev = df[df['category_type']=='revenue']['amount'].sum()
-    cogs = df[df['category_type']=='cogs']['amount'].sum()
-    exp = df[df['category_type']=='expense']['amount'].sum()
-    net_income = rev + cogs + exp
-    # Start with opening balances
-    assets = opening_balances.get('assets', {}).copy()
-    liabilities = opening_balances.get('liabilities', {}).copy()
-    equity = opening_balances.get('equity', {}).copy()
-
-    # Apply any explicit asset/liability transactions if provided via 'account' column
-    # If a row has account that belongs to assets/liabilities, add amount to that account.
-    for _, row in df.iterrows():
-        acct = row.get('account') or ''
-        amt = float(row.get('amount') or 0)
-        if acct in assets:
-            assets[acct] = round(assets.get(acct,0)+amt,2)
-        elif acct in liabilities:
-            liabilities[acct] = round(liabilities.get(acct,0)+amt,2)
-        # equity accounts typically aren't directly hit except owner draws/contribs
-
-    # Update retained earnings
-    equity['RetainedEarnings'] = round(equity.get('RetainedEarnings', 0) + net_income, 2)
-
-    # Totals
-    total_assets = round(sum(assets.values()),2)
-    total_liabilities = round(sum(liabilities.values()),2)
-    total_equity = round(sum(equity.values()),2)
-    return {
-        'as_of': str(pd.Timestamp(as_of_date).date()),
-        'assets': assets,
-        'liabilities': liabilities,
-        'equity': equity,
-        'totals': {
-            'Assets': total_assets,
-            'Liabilities + Equity': round(total_liabilities + total_equity, 2)
-        },
-        'net_income_ytd': round(net_income,2),
-    }
+    return balance_sheet_trend(opening_balances, transactions, [as_of_date])[0]
+
+def balance_sheet_trend(opening_balances: dict, transactions: pd.DataFrame, as_of_dates):
+    """
+    Balance sheets at several as-of dates, in the order given.
+
+    The ledger is grouped once into StatementEngine's daily tables and every
+    sheet is read off their cumulative sums.
+    """
+    engine = StatementEngine(transactions, opening_balances)
+    return [engine.balance(d) for d in as_of_dates]
 
 def income_statement(df: pd.DataFrame, period='monthly'):
     # Group by month
@@ -129,3 +104,159 @@ def balance_sheet(opening_balances: dict, df: pd.DataFrame, as_of_date):
         'Liabilities + Equity': sum(liabilities.values()) + sum(equity.values())
     }
     return {'as_of': as_of_date, 'totals': totals}
+
+
+class DailyAggregator:
+    """
+    Folds ledger chunks into the day x category_type and day x account tables
+    StatementEngine works from. Memory is bounded by the number of distinct
+    days, not rows, so a ledger can be streamed through it chunk by chunk.
+    """
+
+    def __init__(self, accounts=()):
+        self.accounts = list(accounts)
+        self._daily = []
+        self._moves = []
+        self.rows = 0
+
+    def add(self, df: pd.DataFrame):
+        day = pd.to_datetime(df['date']).dt.normalize()
+        self._daily.append(df.groupby([day, df['category_type']])['amount'].sum().unstack(fill_value=0.0))
+        if 'account' in df and self.accounts:
+            hit = df['account'].isin(self.accounts)
+            self._moves.append(df[hit].groupby([day[hit], df.loc[hit, 'account']])['amount'].sum()
+                                 .unstack(fill_value=0.0))
+        self.rows += len(df)
+        if len(self._daily) >= 32:
+            self._compact()
+
+    def _compact(self):
+        self._daily = [pd.concat(self._daily).fillna(0.0).groupby(level=0).sum()]
+        if self._moves:
+            self._moves = [pd.concat(self._moves).fillna(0.0).groupby(level=0).sum()]
+
+    def tables(self):
+        """Return (daily totals by category_type, daily movements by account)."""
+        if self._daily:
+            self._compact()
+        # an empty ledger still needs a DatetimeIndex for the period roll-ups
+        empty = pd.DataFrame(index=pd.DatetimeIndex([], name='date'), dtype='float64')
+        daily = self._daily[0] if self._daily else empty
+        daily = daily.reindex(columns=CATEGORY_TYPES, fill_value=0.0).sort_index()
+        daily.index.name = 'date'
+        moves = self._moves[0] if self._moves else empty
+        moves = moves.reindex(columns=self.accounts, fill_value=0.0).sort_index()
+        return daily, moves
+
+
+class StatementEngine:
+    """
+    Groups the ledger once at day granularity and rolls every requested
+    statement up from those daily aggregates.
+
+    Income statements for any period/window are sums over the daily table;
+    balance sheets use its cumulative sum, so a year-end run costs about the
+    same as a daily one.
+    """
+
+    def __init__(self, transactions: pd.DataFrame = None, opening_balances: dict = None, aggregator=None):
+        ob = opening_balances or {}
+        self.assets = dict(ob.get('assets', {}) or {})
+        self.liabilities = dict(ob.get('liabilities', {}) or {})
+        self.equity = dict(ob.get('equity', {}) or {})
+
+        if aggregator is None:
+            aggregator = DailyAggregator(self.accounts())
+            aggregator.add(transactions)
+        self.daily, moves = aggregator.tables()
+        self.cumulative = self.daily.cumsum()
+        # movements on balance sheet accounts, same daily grain
+        self.account_cumulative = moves.cumsum()
+
+    def accounts(self):
+        return _accounts(self.assets, self.liabilities)
+
+    @classmethod
+    def from_chunks(cls, chunks, opening_balances: dict = None):
+        """Build the engine from an iterable of ledger chunks without concatenating them."""
+        ob = opening_balances or {}
+        agg = DailyAggregator(_accounts(ob.get('assets', {}) or {}, ob.get('liabilities', {}) or {}))
+        for chunk in chunks:
+            agg.add(chunk)
+        return cls(opening_balances=ob, aggregator=agg)
+
+    def income(self, period='monthly', start=None, end=None) -> pd.DataFrame:
+        daily = self.daily
+        if start is not None:
+            daily = daily[daily.index >= pd.Timestamp(start)]
+        if end is not None:
+            daily = daily[daily.index <= pd.Timestamp(end)]
+        if period not in PERIOD_FREQ:
+            raise ValueError("period must be daily|monthly|quarterly|annual")
+        g = daily.groupby(daily.index.to_period(PERIOD_FREQ[period])).sum()
+        gross_profit = g['revenue'] + g['cogs']  # cogs should be negative
+        net_income = gross_profit + g['expense']  # expenses negative
+        return pd.DataFrame({
+            'period': g.index.astype(str),
+            'Revenue': g['revenue'].round(2).values,
+            'COGS': g['cogs'].round(2).values,
+            'Gross Profit': gross_profit.round(2).values,
+            'Operating Expenses': g['expense'].round(2).values,
+            'Net Income': net_income.round(2).values,
+        })
+
+    @staticmethod
+    def _as_of_row(cum, as_of):
+        # last cumulative row on or before as_of (zeros before the first transaction)
+        pos = cum.index.searchsorted(pd.Timestamp(as_of), side='right')
+        if pos == 0:
+            return pd.Series(0.0, index=cum.columns)
+        return cum.iloc[pos - 1]
+
+    def balance(self, as_of_date) -> dict:
+        totals = self._as_of_row(self.cumulative, as_of_date)
+        net_income = float(totals.sum())
+        moved = self._as_of_row(self.account_cumulative, as_of_date)
+        assets = {k: round(v + float(moved.get(k, 0.0)), 2) for k, v in self.assets.items()}
+        # an account listed under both sections moves with the asset side
+        liabilities = {k: round(v + (0.0 if k in self.assets else float(moved.get(k, 0.0))), 2)
+                       for k, v in self.liabilities.items()}
+        equity = dict(self.equity)
+        equity['RetainedEarnings'] = round(equity.get('RetainedEarnings', 0) + net_income, 2)
+        total_liabilities = round(sum(liabilities.values()), 2)
+        total_equity = round(sum(equity.values()), 2)
+        return {
+            'as_of': str(pd.Timestamp(as_of_date).date()),
+            'assets': assets,
+            'liabilities': liabilities,
+            'equity': equity,
+            'totals': {
+                'Assets': round(sum(assets.values()), 2),
+                'Liabilities + Equity': round(total_liabilities + total_equity, 2)
+            },
+            'net_income_ytd': round(net_income, 2),
+        }
+
+    def run(self, requests: dict) -> dict:
+        """
+        requests: {name: {'period': 'monthly', 'start': ..., 'end': ...}}
+        Returns {name: {'income': DataFrame, 'balance': dict}}; the balance sheet
+        is as of the request's end date (or the last transaction date).
+        """
+        last = self.daily.index.max() if len(self.daily) else pd.Timestamp.today().normalize()
+        out = {}
+        for name, req in requests.items():
+            end = req.get('end')
+            out[name] = {
+                'income': self.income(req.get('period', 'monthly'), req.get('start'), end),
+                'balance': self.balance(end if end is not None else last),
+            }
+        return out
+
+
+def _accounts(assets, liabilities):
+    return list(dict.fromkeys([*assets, *liabilities]))
+
+
+def build_statements(transactions: pd.DataFrame, opening_balances: dict, requests: dict) -> dict:
+    return StatementEngine(transactions, opening_balances).run(requests)
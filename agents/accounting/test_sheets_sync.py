@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Simulation of connectors/sheets_sync.SheetSync against a fake gspread client.
+
+Runs offline: the fake spreadsheet keeps its values in memory, bumps its
+revision on every edit and counts the rows each batch_get downloads.
+"""
+
+import re
+import tempfile
+
+from connectors.sheets_sync import SheetSync
+
+
+class FakeWorksheet:
+    def __init__(self, values):
+        self.values = values
+        self.rows_read = 0
+
+    def batch_get(self, ranges, **opts):
+        out = []
+        for rng in ranges:
+            # A1:ZZZ1 (header), A{n}:ZZZ (from row n) or A1:ZZZ (everything)
+            start, end = re.fullmatch(r'A(\d+):ZZZ(\d*)', rng).groups()
+            block = self.values[int(start) - 1:int(end) if end else None]
+            self.rows_read += len(block)
+            out.append([list(r) for r in block])
+        return out
+
+
+class FakeSpreadsheet:
+    def __init__(self, values, with_revision=True):
+        self.sheet1 = FakeWorksheet(values)
+        self.with_revision = with_revision
+        self.revision = 1
+
+    @property
+    def lastUpdateTime(self):
+        return f"rev-{self.revision}" if self.with_revision else None
+
+    def worksheet(self, name):
+        return self.sheet1
+
+    def edit(self, row, col, value):
+        self.sheet1.values[row][col] = value
+        self.revision += 1
+
+    def append(self, *rows):
+        self.sheet1.values.extend(list(r) for r in rows)
+        self.revision += 1
+
+
+class FakeClient:
+    def __init__(self, spreadsheet):
+        self.spreadsheet = spreadsheet
+
+    def open(self, title):
+        return self.spreadsheet
+
+    open_by_key = open_by_url = open
+
+
+def ledger(n):
+    header = ['date', 'description', 'amount']
+    return [header] + [[f"2024-01-{i % 28 + 1:02d}", f"txn {i}", i * 1.5] for i in range(n)]
+
+
+def sync(syncer, sh):
+    before = sh.sheet1.rows_read
+    df = syncer.sync('Ledger')
+    report = syncer.last_report['Ledger::']
+    print(f"   {report['mode']:<11} appended={report['appended']:<4} modified={report['modified']:<3} "
+          f"rows downloaded={sh.sheet1.rows_read - before}")
+    return df, report
+
+
+def test_sheets_sync():
+    print("🧪 Simulating SheetSync with a fake gspread client...")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        sh = FakeSpreadsheet(ledger(500))
+        syncer = SheetSync(FakeClient(sh), cache_dir=cache_dir)
+
+        print("\n1. First sync reads the whole worksheet")
+        df, report = sync(syncer, sh)
+        assert report['mode'] == 'full' and len(df) == 500
+
+        print("\n2. Unchanged revision is served from the cache")
+        df, report = sync(syncer, sh)
+        assert report['mode'] == 'cached' and len(df) == 500
+
+        print("\n3. Edit far above the last 50 rows")
+        sh.edit(3, 2, 999.0)
+        df, report = sync(syncer, sh)
+        assert report['modified'] == 1 and df['amount'].iloc[2] == 999.0
+
+        print("\n4. Append two rows")
+        sh.append(['2024-02-01', 'new a', 1.0], ['2024-02-02', 'new b', 2.0])
+        df, report = sync(syncer, sh)
+        assert report['appended'] == 2 and len(df) == 502
+
+        print("\n5. State survives a new SheetSync (next process)")
+        df, report = sync(SheetSync(FakeClient(sh), cache_dir=cache_dir), sh)
+        assert report['mode'] == 'cached' and df['amount'].iloc[2] == 999.0
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        print("\n6. tail_rows=50 for an append-only sheet: appends read only the tail")
+        sh = FakeSpreadsheet(ledger(500))
+        syncer = SheetSync(FakeClient(sh), cache_dir=cache_dir, tail_rows=50, full_every=3)
+        sync(syncer, sh)
+        sh.append(['2024-02-01', 'new a', 1.0])
+        df, report = sync(syncer, sh)
+        assert report['mode'] == 'incremental' and report['appended'] == 1 and len(df) == 501
+
+        print("   ...and an edit above the tail waits for the periodic full read")
+        sh.edit(3, 2, 999.0)
+        df, report = sync(syncer, sh)
+        assert report['mode'] == 'incremental' and df['amount'].iloc[2] != 999.0
+        sh.append(['2024-02-02', 'new b', 2.0])
+        df, report = sync(syncer, sh)
+        assert report['mode'] == 'full' and df['amount'].iloc[2] == 999.0
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        print("\n7. No Drive scope (no revision): every sync re-reads, edits are still seen")
+        sh = FakeSpreadsheet(ledger(100), with_revision=False)
+        syncer = SheetSync(FakeClient(sh), cache_dir=cache_dir)
+        sync(syncer, sh)
+        sh.edit(1, 1, 'renamed')
+        df, report = sync(syncer, sh)
+        assert report['modified'] == 1 and df['description'].iloc[0] == 'renamed'
+
+    print("\n✅ SheetSync simulation completed!")
+
+
+if __name__ == "__main__":
+    test_sheets_sync()
@@ -0,0 +1,161 @@
+"""
+Local columnar transaction store.
+
+Every source file is normalized once into a Parquet partition under
+data/store/. A manifest records each file's mtime, size and content hash, so
+sync() only re-parses files that are new or whose content actually changed.
+Reports read the typed store instead of the raw CSV/XLSX exports.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from file_loader import TRANSACTION_COLUMNS, normalize_transactions
+
+BASE = Path(__file__).parent
+STORE_DIR = BASE / 'data' / 'store'
+
+DTYPES = {
+    'description': 'string',
+    'amount': 'float64',
+    'account': 'string',
+    'category': 'string',
+    'Source': 'string',
+}
+
+_root_locks = {}
+_root_locks_guard = threading.Lock()
+
+
+def _store_lock(root):
+    # one lock per store directory, shared by every TransactionStore instance on it
+    with _root_locks_guard:
+        return _root_locks.setdefault(str(Path(root).resolve()), threading.RLock())
+
+
+def file_digest(path, block_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def read_source_file(path, sheet_name=0):
+    """Parse one raw export (CSV or Excel) into the normalized schema."""
+    name = Path(path).name
+    if str(path).lower().endswith(('.xlsx', '.xls')):
+        raw = pd.read_excel(path, sheet_name=sheet_name)
+        return normalize_transactions(raw, source=f"Excel:{name}")
+    raw = pd.read_csv(path)
+    return normalize_transactions(raw, source=f"CSV:{name}")
+
+
+class TransactionStore:
+    def __init__(self, root=STORE_DIR):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.root / 'manifest.json'
+        self.lock = _store_lock(self.root)
+        with self.lock:
+            self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        if self.manifest_path.exists():
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        return {}
+
+    def _save_manifest(self):
+        with tempfile.NamedTemporaryFile('w', dir=self.root, suffix='.tmp', delete=False) as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(f.name, self.manifest_path)
+
+    def _partition(self, key):
+        return self.root / f"{hashlib.sha1(key.encode()).hexdigest()[:16]}.parquet"
+
+    def put_source(self, key, df, fingerprint, **meta):
+        """Replace the partition for one source with an already-normalized frame."""
+        part = self._partition(key)
+        df = df.reindex(columns=TRANSACTION_COLUMNS).astype(DTYPES)
+        df['date'] = pd.to_datetime(df['date'], errors='coerce')
+        with self.lock:
+            df.to_parquet(part, index=False)
+            self.manifest[key] = {'sha256': fingerprint, 'part': part.name, 'rows': len(df), **meta}
+            self._save_manifest()
+
+    def sync(self, pattern_or_paths, prune=True):
+        """
+        Ingest new or changed source files. Unchanged files (same mtime and size,
+        or same content hash) are skipped. Returns the list of re-ingested paths.
+        With prune=True sources no longer matched are dropped, unless nothing matched
+        at all (wrong cwd, unmounted share, typo in the glob): then the store is kept.
+        Concurrent syncs on the same store are serialized.
+        """
+        if isinstance(pattern_or_paths, (str, Path)):
+            paths = sorted(glob.glob(str(pattern_or_paths)))
+        else:
+            paths = sorted(str(p) for p in pattern_or_paths)
+        with self.lock:
+            # another instance may have synced since this one was created
+            self.manifest = self._load_manifest()
+            return self._sync(paths, prune)
+
+    def _sync(self, paths, prune):
+        ingested = []
+        for path in paths:
+            key = os.path.abspath(path)
+            st = os.stat(path)
+            seen = self.manifest.get(key)
+            if seen and seen.get('mtime') == st.st_mtime and seen.get('size') == st.st_size:
+                continue
+            digest = file_digest(path)
+            if seen and seen.get('sha256') == digest:
+                # touched but not modified
+                seen.update(mtime=st.st_mtime, size=st.st_size)
+                self._save_manifest()
+                continue
+            self.put_source(key, read_source_file(path), digest, mtime=st.st_mtime, size=st.st_size)
+            ingested.append(path)
+        if prune and not paths:
+            print("⚠️ No source files matched; keeping the existing store")
+        elif prune:
+            current = {os.path.abspath(p) for p in paths}
+            for key in [k for k in self.manifest if os.path.isabs(k) and k not in current]:
+                self.remove_source(key)
+        return ingested
+
+    def remove_source(self, key):
+        with self.lock:
+            entry = self.manifest.pop(key, None)
+            if entry:
+                (self.root / entry['part']).unlink(missing_ok=True)
+                self._save_manifest()
+
+    def read(self, start=None, end=None, columns=None) -> pd.DataFrame:
+        filters = []
+        if start is not None:
+            filters.append(('date', '>=', pd.Timestamp(start)))
+        if end is not None:
+            filters.append(('date', '<=', pd.Timestamp(end)))
+        with self.lock:
+            parts = [str(self.root / e['part']) for e in self.manifest.values()
+                     if (self.root / e['part']).exists()]
+            if not parts:
+                return pd.DataFrame(columns=columns or TRANSACTION_COLUMNS)
+            df = pd.read_parquet(parts, columns=columns, filters=filters or None)
+        return df.sort_values('date', kind='stable').reset_index(drop=True) if 'date' in df else df
+
+
+def load_transactions(csv_glob, store=None, start=None, end=None):
+    """Sync CSV/XLSX exports matched by csv_glob into the store and read them back."""
+    store = store or TransactionStore()
+    store.sync(csv_glob)
+    return store.read(start=start, end=end)
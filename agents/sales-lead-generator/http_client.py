@@ -0,0 +1,151 @@
+"""
+Shared HTTP client for the sales-lead integrations.
+
+All SerpAPI, Places, PhantomBuster, X, Notion and Telegram calls go through one
+process-wide requests.Session. That gives:
+
+- keep-alive: repeated calls to the same host reuse the TCP/TLS connection
+- at most `per_host` open connections per host; extra callers wait for a free one
+- a default timeout on every request
+- retries with jittered exponential backoff (honouring Retry-After) on
+  connection errors, 429 and 5xx. A 429 means the request was not processed,
+  so it is retried for every method. Connection errors and 5xx are retried
+  only for GET/HEAD, or for calls marked idempotent=True. A Retry-After longer
+  than MAX_RETRY_AFTER is not waited out: the response goes back to the caller.
+- call count, error count and latency per endpoint label, via latency_stats()
+- optional per-host pacing through a rate_limit.AdaptiveRateLimiter (limiter=)
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import defaultdict, deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 15  # seconds
+MAX_RETRIES = 3
+BACKOFF = 0.5
+MAX_RETRY_AFTER = 60  # seconds; longer waits would hold a pooled connection and a provider slot
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD"}
+
+_session = None
+_session_lock = threading.Lock()
+
+_metrics_lock = threading.Lock()
+_metrics = defaultdict(lambda: {"calls": 0, "errors": 0, "retries": 0, "samples": deque(maxlen=1000)})
+
+
+def http_session(per_host=8, pools=16):
+    """Process-wide pooled session, shared by every worker thread."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pools, pool_maxsize=per_host, pool_block=True)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _session = s
+        return _session
+
+
+def retry_after_seconds(response):
+    """The numeric Retry-After header of a response, or None."""
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    try:
+        return float(retry_after) if retry_after else None
+    except ValueError:
+        return None
+
+
+def _retry_delay(attempt, response=None):
+    retry_after = retry_after_seconds(response)
+    if retry_after is not None:
+        return min(retry_after, MAX_RETRY_AFTER)
+    return BACKOFF * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+
+def _record(endpoint, seconds, error=False, retry=False):
+    with _metrics_lock:
+        m = _metrics[endpoint]
+        if retry:
+            m["retries"] += 1
+            return
+        m["calls"] += 1
+        m["errors"] += int(error)
+        m["samples"].append(seconds)
+
+
+def request(method, url, endpoint=None, timeout=DEFAULT_TIMEOUT, idempotent=None, max_retries=MAX_RETRIES,
+            limiter=None, **kwargs):
+    """
+    Send one request through the shared session. endpoint labels the latency
+    metrics (default: the host). Every attempt waits for `limiter` and reports its
+    status back to it. Raises requests exceptions like requests.request.
+    """
+    method = method.upper()
+    host = requests.utils.urlparse(url).netloc
+    endpoint = endpoint or host
+    idempotent = method in IDEMPOTENT_METHODS if idempotent is None else idempotent
+    session = http_session()
+    for attempt in range(max_retries + 1):
+        if limiter:
+            limiter.wait(host)
+        started = time.perf_counter()
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            _record(endpoint, time.perf_counter() - started, error=True)
+            if not idempotent or attempt == max_retries:
+                raise
+            _record(endpoint, 0, retry=True)
+            delay = _retry_delay(attempt)
+            logger.warning("%s %s failed (%s); retrying in %.1fs.", method, endpoint, e, delay)
+            time.sleep(delay)
+            continue
+        status = response.status_code
+        retry_after = retry_after_seconds(response)
+        if limiter:
+            limiter.record(host, status, None if retry_after is None else min(retry_after, MAX_RETRY_AFTER))
+        retryable = status == 429 or (status in RETRY_STATUSES and idempotent)
+        _record(endpoint, time.perf_counter() - started, error=status >= 400)
+        if not retryable or attempt == max_retries:
+            return response
+        if retry_after is not None and retry_after > MAX_RETRY_AFTER:
+            logger.warning("%s %s returned %s with Retry-After %.0fs; not retrying.",
+                           method, endpoint, status, retry_after)
+            return response
+        _record(endpoint, 0, retry=True)
+        delay = _retry_delay(attempt, response)
+        logger.warning("%s %s returned %s; retrying in %.1fs.", method, endpoint, status, delay)
+        time.sleep(delay)
+
+
+def get(url, endpoint=None, **kwargs):
+    return request("GET", url, endpoint=endpoint, **kwargs)
+
+
+def post(url, endpoint=None, **kwargs):
+    return request("POST", url, endpoint=endpoint, **kwargs)
+
+
+def latency_stats():
+    """{endpoint: {calls, errors, retries, avg_ms, p95_ms, max_ms}} for every endpoint called so far."""
+    with _metrics_lock:
+        report = {}
+        for endpoint, m in _metrics.items():
+            samples = sorted(m["samples"])
+            report[endpoint] = {
+                "calls": m["calls"],
+                "errors": m["errors"],
+                "retries": m["retries"],
+                "avg_ms": round(1000 * sum(samples) / len(samples), 1) if samples else 0.0,
+                "p95_ms": round(1000 * samples[int(0.95 * (len(samples) - 1))], 1) if samples else 0.0,
+                "max_ms": round(1000 * samples[-1], 1) if samples else 0.0,
+            }
+        return report
@@ -0,0 +1,156 @@
+"""
+Local dedup index for queued leads.
+
+The outreach sheet is read once per run, not once per lead. The index holds an
+email hash and a normalized company+location key for every sheet row, and it
+is persisted to data/lead_index.json together with the number of sheet rows
+it has seen. The next run then reads only the rows appended since. Rows that
+this process appends are added as they are written; they only advance the
+row count once the index has synced in this process, so a failed or skipped
+sync never makes the next one jump over rows it has not read.
+
+The sheet writer adds rows from its flush timer while the main thread checks
+leads, so every read and write of the index holds its lock.
+
+Company names are normalized before comparison: case, punctuation and legal
+suffixes are dropped. Close spellings in the same location also count as the
+same business, so "Joe's Coffee" in Boston matches "Joes Coffee LLC" in
+Boston, MA.
+"""
+
+import difflib
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+
+INDEX_FILE = Path("data") / "lead_index.json"
+
+# sheet columns: Niche, Location, Company, Website, Phone, Email, ...
+HEADER_RANGE = "A1:F1"
+LOCATION_COL, COMPANY_COL, EMAIL_COL = 1, 2, 5
+
+LEGAL_SUFFIXES = {
+    "llc", "inc", "incorporated", "co", "corp", "corporation", "company",
+    "ltd", "limited", "lp", "llp", "pllc", "pc", "plc", "the",
+}
+SIMILARITY_THRESHOLD = 0.9
+
+
+def normalize_company(name):
+    name = str(name or "").lower().replace("&", " and ")
+    name = re.sub(r"['’`]", "", name)       # joe's -> joes
+    words = re.findall(r"[a-z0-9]+", name)
+    return " ".join(w for w in words if w not in LEGAL_SUFFIXES)
+
+
+def normalize_location(location):
+    words = re.findall(r"[a-z0-9]+", str(location or "").lower())
+    if len(words) > 1 and len(words[-1]) == 2:
+        words = words[:-1]  # "Boston, MA" -> "boston"
+    return " ".join(words)
+
+
+def email_hash(email):
+    return hashlib.md5(str(email).strip().lower().encode()).hexdigest()
+
+
+class LeadIndex:
+    def __init__(self, path=INDEX_FILE):
+        # path=None keeps the index in memory only
+        self.path = Path(path) if path else None
+        self.header = None
+        self.rows_seen = 0
+        self.synced = False  # rows_seen matches the sheet as read by this process
+        self.emails = set()
+        self.companies = {}  # normalized location -> set of normalized company names
+        self.lock = threading.RLock()
+        self._load()
+
+    def _load(self):
+        if self.path is None or not self.path.exists():
+            return
+        with open(self.path) as f:
+            state = json.load(f)
+        self.header = state.get("header")
+        self.rows_seen = int(state.get("rows_seen", 0))
+        self.emails = set(state.get("emails", []))
+        self.companies = {loc: set(names) for loc, names in state.get("companies", {}).items()}
+
+    def save(self):
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with self.lock:
+            state = {
+                "header": self.header,
+                "rows_seen": self.rows_seen,
+                "emails": sorted(self.emails),
+                "companies": {loc: sorted(names) for loc, names in self.companies.items()},
+            }
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        with self.lock:
+            self.header, self.rows_seen = None, 0
+            self.emails, self.companies = set(), {}
+
+    def sync(self, sheet):
+        """
+        Read the rows appended to the sheet since the last sync in one batch_get.
+        If the header changed, the index is rebuilt from the whole sheet. Rows
+        deleted from the sheet stay in the index, so those leads are not queued
+        again. Returns the number of rows read. The lock is held throughout, so
+        rows added meanwhile cannot shift the range being read.
+        """
+        with self.lock:
+            header, body = sheet.batch_get([HEADER_RANGE, f"A{self.rows_seen + 2}:F"])
+            header = list(header[0]) if header else []
+            if self.header is not None and header != self.header:
+                self.clear()
+                body = sheet.batch_get(["A2:F"])[0]
+            self.header = header
+            self.synced = True
+            for row in body:
+                row = list(row) + [""] * (EMAIL_COL + 1 - len(row))
+                self.add(row[EMAIL_COL], row[COMPANY_COL], row[LOCATION_COL])
+            return len(body)
+
+    def add(self, email=None, company=None, location=None, appended=True):
+        """
+        Record a lead; appended=True counts it as a sheet row already seen.
+        Before a successful sync the row is left for the next sync to read.
+        """
+        name = normalize_company(company)
+        with self.lock:
+            if email:
+                self.emails.add(email_hash(email))
+            if name:
+                self.companies.setdefault(normalize_location(location), set()).add(name)
+            if appended and self.synced:
+                self.rows_seen += 1
+
+    def contains(self, email=None, company=None, location=None):
+        name = normalize_company(company)
+        with self.lock:
+            if email and email_hash(email) in self.emails:
+                return True
+            if not name:
+                return False
+            known = tuple(self.companies.get(normalize_location(location), ()))
+        if name in known:
+            return True
+        # fuzzy matching runs on a snapshot, outside the lock
+        return any(_similar(name, other) for other in known)
+
+
+def _similar(a, b):
+    # "Studio 54" and "Studio 55" are different businesses however close the spelling
+    if re.findall(r"\d+", a) != re.findall(r"\d+", b):
+        return False
+    return difflib.SequenceMatcher(None, a, b).ratio() >= SIMILARITY_THRESHOLD
@@ -0,0 +1,189 @@
+"""
+Durable work queue for the staged lead pipeline.
+
+run_agent moves every lead through five stages:
+
+    scraped -> normalized -> classified -> generated -> sunk
+
+Leads that leave the pipeline early end up in "dropped" (below the score
+threshold), "duplicate" (already in the sheet or queued this run) or "failed"
+(generation kept raising). Each transition is committed to a SQLite file
+under data/ before the next stage starts. A run killed part way (for example
+by a GitHub Actions time limit) and started again with the same run id:
+
+- does not re-scrape combos whose results are already stored
+- picks each lead up at the stage it reached
+- appends generated rows that never reached the sheet
+
+Work left by a run with a different id (e.g. yesterday's date) is carried
+forward too: its generated rows are appended first (unsunk()), and leads it
+never generated, including those whose generation failed fewer than
+max_attempts times, are processed with the same combo in the new run
+(unfinished()), ahead of the combo's fresh scrape so they win the dedup.
+
+On GitHub Actions the runner starts empty, so the daily workflow restores data/
+from the previous run's cache and saves it again even when the run fails.
+
+Leads are grouped by run id and combo key. Within a combo they keep their
+scrape order, so resumed runs write rows in the same order as uninterrupted
+ones.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+QUEUE_FILE = Path("data") / "lead_queue.sqlite3"
+
+STAGES = ("scraped", "normalized", "classified", "generated", "sunk")
+FINISHED = ("sunk", "dropped", "duplicate", "failed")
+
+
+def combo_key(source, niche, location):
+    payload = json.dumps([source, niche, location])
+    return hashlib.sha1(payload.encode()).hexdigest()[:20]
+
+
+class LeadQueue:
+    def __init__(self, path=QUEUE_FILE):
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        # written from the main thread, lead workers and the sheet writer; every access holds self.lock
+        self.conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS combos (
+                run TEXT NOT NULL,
+                combo TEXT NOT NULL,
+                source TEXT NOT NULL,
+                niche TEXT NOT NULL,
+                location TEXT NOT NULL,
+                scraped REAL NOT NULL,
+                PRIMARY KEY (run, combo)
+            );
+            CREATE TABLE IF NOT EXISTS leads (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run TEXT NOT NULL,
+                combo TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                stage TEXT NOT NULL,
+                lead TEXT NOT NULL,
+                email TEXT,
+                row TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                updated REAL NOT NULL,
+                UNIQUE (run, combo, seq)
+            );
+            CREATE INDEX IF NOT EXISTS leads_stage_email ON leads(stage, email);
+        """)
+
+    def is_scraped(self, run, combo):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT 1 FROM combos WHERE run=? AND combo=?", (run, combo)).fetchone() is not None
+
+    def record_scrape(self, run, combo, source, niche, location, leads):
+        """Store a combo's scraped leads and mark the combo done, in one transaction."""
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM leads WHERE run=? AND combo=?", (run, combo))
+            self.conn.executemany(
+                "INSERT INTO leads(run, combo, seq, stage, lead, updated) VALUES (?, ?, ?, 'scraped', ?, ?)",
+                [(run, combo, seq, json.dumps(lead, default=str), now) for seq, lead in enumerate(leads)])
+            self.conn.execute(
+                "INSERT OR REPLACE INTO combos(run, combo, source, niche, location, scraped) VALUES (?, ?, ?, ?, ?, ?)",
+                (run, combo, source, niche, location, now))
+
+    def leads(self, run, combo):
+        """[{"id", "stage", "lead", "email", "row", "attempts"}] for one combo, in scrape order."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, stage, lead, email, row, attempts FROM leads WHERE run=? AND combo=? ORDER BY seq",
+                (run, combo)).fetchall()
+        return _entries(rows)
+
+    def unfinished(self, combo, exclude_run=None):
+        """Leads of `combo` other runs left before generation, oldest run first; same shape as leads()."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, stage, lead, email, row, attempts FROM leads WHERE combo=? AND run IS NOT ? "
+                "AND stage IN ('scraped', 'normalized', 'classified') ORDER BY run, seq",
+                (combo, exclude_run)).fetchall()
+        return _entries(rows)
+
+    def advance(self, updates):
+        """
+        Move leads to their next stage. updates: [(lead_id, stage, fields)] where
+        fields may set "lead", "email", "row" or "error".
+        """
+        now = time.time()
+        with self.lock, self.conn:
+            for lead_id, stage, fields in updates:
+                columns = {"stage": stage, "updated": now}
+                for name in ("email", "error"):
+                    if name in fields:
+                        columns[name] = fields[name]
+                for name in ("lead", "row"):
+                    if name in fields:
+                        columns[name] = json.dumps(fields[name], default=str)
+                assignments = ", ".join(f"{name}=?" for name in columns)
+                self.conn.execute(f"UPDATE leads SET {assignments} WHERE id=?", (*columns.values(), lead_id))
+
+    def fail(self, lead_id, error, max_attempts=3):
+        """Count a failed generation; the lead is given up on after max_attempts."""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE leads SET attempts=attempts+1, error=?, updated=?, "
+                "stage=CASE WHEN attempts+1 >= ? THEN 'failed' ELSE stage END WHERE id=?",
+                (str(error), time.time(), max_attempts, lead_id))
+
+    def mark_sunk(self, lead_ids):
+        """Generated leads whose rows have reached the sheet."""
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "UPDATE leads SET stage='sunk', updated=? WHERE stage='generated' AND id=?",
+                [(now, lead_id) for lead_id in lead_ids if lead_id is not None])
+
+    def unsunk(self, exclude_run=None):
+        """[(lead_id, row)] generated by other runs that never reached the sheet, oldest first."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, row FROM leads WHERE stage='generated' AND run IS NOT ? ORDER BY run, combo, seq",
+                (exclude_run,)).fetchall()
+        return [(lead_id, json.loads(row)) for lead_id, row in rows]
+
+    def counts(self, run):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT stage, COUNT(*) FROM leads WHERE run=? GROUP BY stage", (run,)).fetchall()
+        return dict(rows)
+
+    def prune(self, max_age_days):
+        """Forget runs whose last update is older than max_age_days, keeping unsunk rows."""
+        cutoff = time.time() - max_age_days * 86400
+        with self.lock, self.conn:
+            stale = [run for (run,) in self.conn.execute(
+                "SELECT run FROM leads GROUP BY run HAVING MAX(updated) < ? "
+                "AND SUM(stage='generated') = 0", (cutoff,))]
+            stale += [run for (run,) in self.conn.execute(
+                "SELECT run FROM combos WHERE run NOT IN (SELECT run FROM leads) GROUP BY run "
+                "HAVING MAX(scraped) < ?", (cutoff,))]
+            for run in stale:
+                self.conn.execute("DELETE FROM leads WHERE run=?", (run,))
+                self.conn.execute("DELETE FROM combos WHERE run=?", (run,))
+        return len(stale)
+
+    def close(self):
+        self.conn.close()
+
+
+def _entries(rows):
+    return [{"id": i, "stage": stage, "lead": json.loads(lead), "email": email,
+             "row": json.loads(row) if row else None, "attempts": attempts}
+            for i, stage, lead, email, row, attempts in rows]
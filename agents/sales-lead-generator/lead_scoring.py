@@ -0,0 +1,112 @@
+"""
+Vectorized lead classification and scoring.
+
+classify_lead / score_lead in tech_clients work on one lead dict at a time.
+The functions here compute the same has_website, lead_type and score columns
+for a whole DataFrame of normalized leads with boolean masks. That makes it
+cheap to triage tens of thousands of scraped businesses and drop the ones
+below tech_config.lead_score_threshold before any model call is made.
+
+Thresholds come from DEFAULT_RULES, overridden by tech_config.lead_rules.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_RULES = {
+    "social_domains": ["facebook.com", "instagram.com", "linkedin.com"],
+    "low_reviews": 10,       # fewer reviews than this is "low review"
+    "high_reviews": 15,      # at least this many is "high review"
+    "low_rating": 3,         # at or below is "low rating"
+    "high_rating": 4,        # at or above is "high rating"
+    "score_reviews": 20,     # review count that earns the review points
+    "weights": {"no_website": 40, "rating": 20, "reviews": 20},
+}
+
+
+def lead_rules(overrides=None):
+    rules = {**DEFAULT_RULES, **(overrides or {})}
+    rules["weights"] = {**DEFAULT_RULES["weights"], **(overrides or {}).get("weights", {})}
+    return rules
+
+
+def lead_frame(leads):
+    """DataFrame with the columns scoring reads, coerced to usable types."""
+    df = leads if isinstance(leads, pd.DataFrame) else pd.DataFrame(list(leads))
+    df = df.copy()
+    df["website"] = df["website"].fillna("").astype(str) if "website" in df else ""
+    for col in ("rating", "reviews"):
+        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0) if col in df else 0
+    return df
+
+
+def has_website_mask(df, rules=DEFAULT_RULES):
+    site = df["website"].str.lower()
+    domains = rules["social_domains"]
+    # an empty pattern would match every site; with no domains nothing is social, as in has_website
+    social = (site.str.contains("|".join(map(re.escape, domains)), regex=True) if domains
+              else pd.Series(False, index=df.index))
+    return (site != "") & ~social
+
+
+def classify_leads(df, rules=DEFAULT_RULES):
+    """lead_type per row, with the same precedence as classify_lead."""
+    site = has_website_mask(df, rules)
+    low_reviews = df["reviews"] < rules["low_reviews"]
+    high = (df["reviews"] >= rules["high_reviews"]) & (df["rating"] >= rules["high_rating"])
+    low_rating = df["rating"] <= rules["low_rating"]
+    conditions = [
+        ~site,
+        ~site & low_reviews,
+        ~site & low_reviews & low_rating,
+        ~site & high,
+        site & low_reviews,
+        site & low_reviews & low_rating,
+        site & high,
+        site,
+    ]
+    choices = [
+        "NO_WEBSITE",
+        "NO_WEBSITE_LOW_REVIEW",
+        "NO_WEBSITE_LOW_REVIEW_LOW_RATING",
+        "NO_WEBSITE_HIGH_REVIEW_HIGH_RATING",
+        "HAS_WEBSITE_LOW_REVIEW",
+        "HAS_WEBSITE_LOW_REVIEW_LOW_RATING",
+        "HAS_WEBSITE_HIGH_REVIEW_HIGH_RATING",
+        "HAS_WEBSITE",
+    ]
+    lead_type = np.select(conditions, choices, default="NO LEAD CLASSIFICATION")
+    return site, pd.Series(lead_type, index=df.index)
+
+
+def score_leads(leads, rules=DEFAULT_RULES):
+    """Return the frame with has_website, lead_type and score columns added."""
+    df = lead_frame(leads)
+    df["has_website"], df["lead_type"] = classify_leads(df, rules)
+    weights = rules["weights"]
+    df["score"] = (
+        (df["lead_type"] == "NO_WEBSITE") * weights["no_website"]
+        + (df["rating"] >= rules["high_rating"]) * weights["rating"]
+        + (df["reviews"] >= rules["score_reviews"]) * weights["reviews"]
+    ).astype(int)
+    return df
+
+
+def triage_leads(leads, threshold, rules=DEFAULT_RULES):
+    """
+    Score a list of lead dicts and keep those scoring at least `threshold`.
+    Kept dicts get lead_type and score set in place; input order is preserved.
+    """
+    leads = list(leads)
+    if not leads:
+        return []
+    scored = score_leads(leads, rules)
+    keep = (scored["score"] >= threshold).to_numpy()
+    kept = []
+    for lead, lead_type, score, ok in zip(leads, scored["lead_type"], scored["score"], keep):
+        if ok:
+            lead["lead_type"], lead["score"] = lead_type, int(score)
+            kept.append(lead)
+    return kept
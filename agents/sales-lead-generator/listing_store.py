@@ -0,0 +1,141 @@
+"""
+Local snapshot store for real-estate listings.
+
+Every scraped listing is recorded under a stable key (zpid, else the Zillow
+URL, else the address) in data/listings.sqlite3, along with its current price,
+status and days on market. A history row is added whenever the price or
+status moves, or when days on market goes backwards (a relist).
+
+Separately, the store remembers what was last emitted to each destination
+("scope", e.g. a spreadsheet id). observe() compares fresh listings against
+that and reports only the ones worth sending again:
+
+- "New Listing"        never emitted to this scope
+- "Price Drop -x%"     price fell by at least min_price_change since last emitted
+- "Price Increase +x%" the same upwards, only with emit_price_increases
+- "Status: X"          listing status changed (e.g. FOR_SALE -> PENDING)
+- "Relisted"           days on market reset
+
+mark_emitted() is called once rows have actually been written, so a failed
+upload is retried by the next run.
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+STORE_FILE = Path("data") / "listings.sqlite3"
+
+
+class ListingStore:
+    def __init__(self, path=STORE_FILE, min_price_change=0.02, emit_price_increases=False):
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.min_price_change = min_price_change
+        self.emit_price_increases = emit_price_increases
+        self.lock = threading.Lock()
+        # markets are evaluated on worker threads; every access holds self.lock
+        self.conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS listings (
+                key TEXT PRIMARY KEY,
+                address TEXT,
+                price REAL,
+                status TEXT,
+                days_on_market REAL,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS history (
+                key TEXT NOT NULL,
+                seen_at REAL NOT NULL,
+                price REAL,
+                status TEXT,
+                days_on_market REAL
+            );
+            CREATE INDEX IF NOT EXISTS history_key ON history(key, seen_at);
+            CREATE TABLE IF NOT EXISTS emitted (
+                scope TEXT NOT NULL,
+                key TEXT NOT NULL,
+                price REAL,
+                status TEXT,
+                days_on_market REAL,
+                emitted_at REAL NOT NULL,
+                PRIMARY KEY (scope, key)
+            );
+        """)
+
+    def observe(self, listings, scope):
+        """
+        Record listings ({"key", "address", "price", "status", "days_on_market"}) and
+        return [(listing, reason)] for those that are new or materially changed for `scope`.
+        """
+        now = time.time()
+        changed = []
+        with self.lock, self.conn:
+            for listing in listings:
+                key = listing["key"]
+                price, status, dom = listing.get("price"), listing.get("status"), listing.get("days_on_market")
+                previous = self.conn.execute(
+                    "SELECT price, status, days_on_market FROM listings WHERE key=?", (key,)).fetchone()
+                if previous is None or _moved(previous, (price, status, dom)):
+                    self.conn.execute(
+                        "INSERT INTO history(key, seen_at, price, status, days_on_market) VALUES (?, ?, ?, ?, ?)",
+                        (key, now, price, status, dom))
+                self.conn.execute(
+                    "INSERT INTO listings(key, address, price, status, days_on_market, first_seen, last_seen) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET address=excluded.address, "
+                    "price=excluded.price, status=excluded.status, days_on_market=excluded.days_on_market, "
+                    "last_seen=excluded.last_seen",
+                    (key, listing.get("address"), price, status, dom, now, now))
+
+                sent = self.conn.execute(
+                    "SELECT price, status, days_on_market FROM emitted WHERE scope=? AND key=?",
+                    (scope, key)).fetchone()
+                reason = self._reason(sent, price, status, dom)
+                if reason:
+                    changed.append((listing, reason))
+        return changed
+
+    def _reason(self, sent, price, status, dom):
+        if sent is None:
+            return "New Listing"
+        sent_price, sent_status, sent_dom = sent
+        if status and sent_status and status != sent_status:
+            return f"Status: {status}"
+        if dom is not None and sent_dom is not None and dom < sent_dom:
+            return "Relisted"
+        if price and sent_price:
+            change = (price - sent_price) / sent_price
+            if change <= -self.min_price_change:
+                return f"Price Drop {change:.1%}"
+            if self.emit_price_increases and change >= self.min_price_change:
+                return f"Price Increase +{change:.1%}"
+        return None
+
+    def mark_emitted(self, scope, keys):
+        """Remember the current snapshot of `keys` as sent to `scope`."""
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO emitted(scope, key, price, status, days_on_market, emitted_at) "
+                "SELECT ?, key, price, status, days_on_market, ? FROM listings WHERE key=?",
+                [(scope, now, key) for key in keys])
+
+    def history(self, key):
+        """[(seen_at, price, status, days_on_market)] for one listing, oldest first."""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT seen_at, price, status, days_on_market FROM history WHERE key=? ORDER BY seen_at",
+                (key,)).fetchall()
+
+    def close(self):
+        self.conn.close()
+
+
+def _moved(previous, current):
+    (old_price, old_status, old_dom), (price, status, dom) = previous, current
+    relisted = dom is not None and old_dom is not None and dom < old_dom
+    return price != old_price or status != old_status or relisted
@@ -0,0 +1,130 @@
+"""
+Persistent prompt-level cache for LLM completions.
+
+Responses are keyed on (model, temperature, normalized prompt) and stored in a
+small SQLite file under data/. Entries expire after `ttl` seconds, and the
+least recently used entries are evicted once the cache holds more than
+`max_entries`. Failed generations, and responses a `validate` predicate
+rejects, are never stored.
+
+memoize(model) wraps any fn(prompt, temperature) callable, so tests can run
+the cache against a stub model:
+
+    cache = LLMCache(":memory:")
+    generate = cache.memoize("stub")(lambda prompt, temperature=0.7: prompt.upper())
+"""
+
+import functools
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+CACHE_FILE = Path("data") / "llm_cache.sqlite3"
+DEFAULT_TTL = 7 * 24 * 3600
+
+_WS = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt):
+    # prompts are built from indented triple-quoted templates
+    return _WS.sub(" ", str(prompt or "")).strip()
+
+
+def prompt_key(model, temperature, prompt):
+    payload = json.dumps([model, temperature, normalize_prompt(prompt)])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class LLMCache:
+    def __init__(self, path=CACHE_FILE, ttl=DEFAULT_TTL, max_entries=20_000):
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        # shared by the lead worker threads; every access holds self.lock
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used);
+        """)
+
+    def get(self, model, temperature, prompt):
+        key = prompt_key(model, temperature, prompt)
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT response, created FROM responses WHERE key=?", (key,)).fetchone()
+            if row and now - row[1] <= self.ttl:
+                with self.conn:
+                    self.conn.execute("UPDATE responses SET last_used=? WHERE key=?", (now, key))
+                self.hits += 1
+                return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, model, temperature, prompt, response):
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses(key, model, response, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (prompt_key(model, temperature, prompt), model, response, now, now))
+            self._evict(now)
+
+    def _evict(self, now):
+        self.conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        (count,) = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        if count > self.max_entries:
+            self.conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,))
+
+    def memoize(self, model, skip=(), validate=None):
+        """
+        Cache fn(prompt, temperature) responses for `model`; results in `skip` are not stored.
+        With validate(response, *args, **kwargs) only responses it accepts are stored or
+        served, so a truncated or malformed reply is asked for again on the next call.
+        """
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(prompt, temperature=0.7, *args, **kwargs):
+                cached = self.get(model, temperature, prompt)
+                if cached is not None and (validate is None or validate(cached, *args, **kwargs)):
+                    return cached
+                response = fn(prompt, temperature, *args, **kwargs)
+                if (isinstance(response, str) and response and response not in skip
+                        and (validate is None or validate(response, *args, **kwargs))):
+                    self.put(model, temperature, prompt, response)
+                return response
+            wrapper.uncached = fn
+            return wrapper
+        return decorate
+
+    def stats(self):
+        with self.lock:
+            (size,) = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "entries": size,
+        }
+
+    def close(self):
+        self.conn.close()
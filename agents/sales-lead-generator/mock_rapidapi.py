@@ -0,0 +1,127 @@
+"""
+Local mock of the RapidAPI Zillow /search endpoint.
+
+Serves deterministic paginated listings for any location and enforces its own
+request rate: requests above `rate` per second get a 429 with a Retry-After
+header, like RapidAPI's per-plan limits. Point the fetcher at it with
+config["rapidapi_base_url"] to exercise pagination and throttling offline:
+
+    python mock_rapidapi.py
+
+starts a server, fetches every page for a few locations through
+real_estate.iter_zillow_pages, and prints what was throttled and retried.
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def mock_listings(location, page, per_page):
+    base = sum(map(ord, location)) * 1000 + page * per_page
+    return [
+        {
+            "zpid": base + i,
+            "address": f"{base + i} Mock St, {location}",
+            "price": 80000 + ((base + i) * 104729) % 1200000,
+            "bedrooms": 1 + (base + i) % 5,
+            "bathrooms": 1 + (base + i) % 3,
+            "homeType": ("SINGLE_FAMILY", "MULTI_FAMILY", "CONDO", "LAND")[(base + i) % 4],
+            "daysOnZillow": (base + i) % 150,
+            "description": ("motivated seller", "move-in ready", "fixer upper", "new roof")[(base + i) % 4],
+            "zestimate": None if i % 5 == 0 else 100000 + (base + i) % 900000,
+            "yearBuilt": 1960 + (base + i) % 64,
+        }
+        for i in range(per_page)
+    ]
+
+
+class MockRapidAPI(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, rate=5.0, pages=3, per_page=10, retry_after=1):
+        super().__init__(("127.0.0.1", 0), MockHandler)
+        self.rate = rate
+        self.pages = pages
+        self.per_page = per_page
+        self.retry_after = retry_after
+        self.lock = threading.Lock()
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.stats = {"served": 0, "throttled": 0}
+
+    def admit(self):
+        """Token bucket holding up to one second of requests."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                self.stats["throttled"] += 1
+                return False
+            self.tokens -= 1
+            self.stats["served"] += 1
+            return True
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/search":
+            return self._send(404, {"message": "Not found"})
+        if not self.server.admit():
+            return self._send(429, {"message": "Too many requests"},
+                              {"Retry-After": str(self.server.retry_after)})
+        query = parse_qs(url.query)
+        location = query.get("location", [""])[0]
+        page = int(query.get("page", ["1"])[0])
+        results = mock_listings(location, page, self.server.per_page) if page <= self.server.pages else []
+        self._send(200, {"results": results, "totalPages": self.server.pages,
+                         "resultsPerPage": self.server.per_page})
+
+    def _send(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@contextmanager
+def serve_mock_rapidapi(**kwargs):
+    """Run a MockRapidAPI on a free local port; yields the server (base URL in server.base_url)."""
+    server = MockRapidAPI(**kwargs)
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    import real_estate
+
+    locations = ["Miami, FL", "Austin, TX", "Orlando, FL", "Chicago, IL", "Dallas, TX", "Houston, TX"]
+    with serve_mock_rapidapi(rate=2.0, pages=4, per_page=10) as server:
+        config = {"rapidapi_key": "mock", "rapidapi_base_url": server.base_url, "zillow_workers": 6}
+        started = time.monotonic()
+        pages = [(location, page, len(results))
+                 for location, page, results in real_estate.iter_zillow_pages(locations, config)]
+        elapsed = time.monotonic() - started
+
+    complete = all(count == server.per_page for _, _, count in pages)
+    print(f"{len(pages)} of {len(locations) * server.pages} pages in {elapsed:.1f}s, all complete: {complete}")
+    print(f"Mock server: {server.stats}")
+    print(f"Rate controller: {real_estate.ZILLOW_RATE.stats()}")
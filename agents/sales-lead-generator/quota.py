@@ -0,0 +1,134 @@
+"""
+Shared token-bucket quota manager for the Google APIs.
+
+Every API ("sheets", "calendar", "drive", "maps", plus the overall "google"
+budget) can have two buckets:
+
+- per_minute  refills continuously at limit/60 tokens per second, which
+              smooths bursts instead of failing them
+- per_day     refills completely when the date changes
+
+Bucket state lives in a SQLite file. Each acquire is one BEGIN IMMEDIATE
+transaction, so threads and separate processes (parallel workers, a second
+GitHub Actions job on the same runner) all draw from the same budget.
+
+acquire() waits for per-minute tokens and gives up only when a daily bucket
+is empty or the wait would exceed `timeout`. acquire_async() is the awaitable
+form for asyncio callers.
+"""
+
+import asyncio
+import datetime
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+QUOTA_FILE = Path("data") / "quota.sqlite3"
+
+PERIODS = {"per_minute": 60.0, "per_day": 86400.0}
+
+
+class QuotaManager:
+    def __init__(self, limits, path=QUOTA_FILE):
+        """limits: {api: {"per_minute": n, "per_day": m}}; either key may be omitted."""
+        self.limits = {api: {p: float(n) for p, n in buckets.items() if p in PERIODS and n}
+                       for api, buckets in limits.items()}
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS buckets (
+                name TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL,
+                day TEXT NOT NULL
+            )
+        """)
+
+    @staticmethod
+    def _today():
+        return datetime.date.today().isoformat()
+
+    def _buckets(self, apis):
+        return [(f"{api}:{period}", period, limit)
+                for api in apis for period, limit in self.limits.get(api, {}).items()]
+
+    def _refilled(self, name, period, limit, now, today):
+        row = self.conn.execute("SELECT tokens, updated, day FROM buckets WHERE name=?", (name,)).fetchone()
+        if row is None:
+            return limit
+        tokens, updated, day = row
+        if period == "per_day":
+            return limit if day != today else min(limit, tokens)
+        return min(limit, tokens + (now - updated) * limit / PERIODS[period])
+
+    def try_acquire(self, apis, amount=1):
+        """
+        Take `amount` tokens from every bucket of every api in one transaction.
+        Returns (True, 0) on success, (False, seconds) when a per-minute bucket
+        needs time to refill, or (False, None) when a daily budget is spent.
+        """
+        if isinstance(apis, str):
+            apis = [apis]
+        now, today = time.time(), self._today()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                levels, wait = {}, 0.0
+                for name, period, limit in self._buckets(apis):
+                    tokens = self._refilled(name, period, limit, now, today)
+                    levels[name] = tokens
+                    if tokens < amount:
+                        if period == "per_day" or amount > limit:
+                            self.conn.execute("ROLLBACK")
+                            return False, None
+                        wait = max(wait, (amount - tokens) * PERIODS[period] / limit)
+                if wait:
+                    self.conn.execute("ROLLBACK")
+                    return False, wait
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO buckets(name, tokens, updated, day) VALUES (?, ?, ?, ?)",
+                    [(name, tokens - amount, now, today) for name, tokens in levels.items()])
+                self.conn.execute("COMMIT")
+                return True, 0
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def acquire(self, apis, amount=1, timeout=None):
+        """Block until the tokens are granted. False if a daily budget is spent or timeout passes."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            ok, wait = self.try_acquire(apis, amount)
+            if ok or wait is None:
+                return ok
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    async def acquire_async(self, apis, amount=1, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            ok, wait = await asyncio.to_thread(self.try_acquire, apis, amount)
+            if ok or wait is None:
+                return ok
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
+
+    def status(self):
+        """{api: {period: {"limit", "remaining"}}} for every configured bucket."""
+        now, today = time.time(), self._today()
+        report = {}
+        with self.lock:
+            for name, period, limit in self._buckets(self.limits):
+                api = name.split(":", 1)[0]
+                remaining = self._refilled(name, period, limit, now, today)
+                report.setdefault(api, {})[period] = {"limit": int(limit), "remaining": int(remaining)}
+        return report
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,66 @@
+"""
+Adaptive per-host request pacing.
+
+AdaptiveRateLimiter spaces requests to each host at its current rate and
+adjusts that rate from the responses:
+
+- every successful response raises the rate a little (additive increase,
+  up to max_rate)
+- a 429 or 503 halves it (multiplicative decrease, down to min_rate), and a
+  Retry-After header holds back every caller for that host until it passes
+
+Pass one to http_client.request(limiter=...) to share it across threads.
+"""
+
+import threading
+import time
+
+THROTTLE_STATUSES = {429, 503}
+
+
+class AdaptiveRateLimiter:
+    def __init__(self, rate=5.0, min_rate=0.2, max_rate=20.0, increase=0.5, decrease=0.5):
+        """Rates are requests per second per host."""
+        self.initial_rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.lock = threading.Lock()
+        self.hosts = {}
+
+    def _state(self, host):
+        state = self.hosts.get(host)
+        if state is None:
+            state = self.hosts[host] = {"rate": self.initial_rate, "next": 0.0, "requests": 0, "throttled": 0}
+        return state
+
+    def wait(self, host):
+        """Block until `host` may be sent the next request."""
+        with self.lock:
+            state = self._state(host)
+            now = time.monotonic()
+            slot = max(now, state["next"])
+            state["next"] = slot + 1.0 / state["rate"]
+            state["requests"] += 1
+        if slot > now:
+            time.sleep(slot - now)
+
+    def record(self, host, status, retry_after=None):
+        """Adjust `host`'s rate from a response status and optional Retry-After seconds."""
+        with self.lock:
+            state = self._state(host)
+            if status in THROTTLE_STATUSES:
+                state["throttled"] += 1
+                state["rate"] = max(self.min_rate, state["rate"] * self.decrease)
+                pause = retry_after if retry_after is not None else 1.0 / state["rate"]
+                state["next"] = max(state["next"], time.monotonic() + pause)
+            elif status is not None and status < 400:
+                # grows by about `increase` req/s for every `rate` successes
+                state["rate"] = min(self.max_rate, state["rate"] + self.increase / state["rate"])
+
+    def stats(self):
+        """{host: {rate, requests, throttled}}"""
+        with self.lock:
+            return {host: {"rate": round(s["rate"], 2), "requests": s["requests"], "throttled": s["throttled"]}
+                    for host, s in self.hosts.items()}
@@ -1,21 +1,30 @@
+import asyncio
 import json
 import requests
 import time
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Union
 import os
 from openpyxl import load_workbook, Workbook
 import os
 import json
 import datetime
 import time
+import re
+import numpy as np
 import pandas as pd
 import gspread
 from google.oauth2.service_account import Credentials
-from apify_client import ApifyClient
+from apify_client import ApifyClient, ApifyClientAsync
 from langchain_openai import ChatOpenAI
 from langchain.core.prompts import PromptTemplate
 from langchain.core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field
+from pathlib import Path
+from llm_cache import LLMCache
+from listing_store import ListingStore
+from rate_limit import AdaptiveRateLimiter
+import http_client
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 # 1. GUARDIAN RUN TRACKER
 TRACKER_FILE = "daily_quota_tracker.txt"
@@ -40,84 +49,252 @@ def load_pipeline_config(config_path="pipeline_config.json"):
     with open(config_path, "r") as f:
         return json.load(f)
 
+# AI INVESTMENT SCORING ENGINE
+# Scores are cached per listing + price snapshot; a listing is only rescored when its price changes
+SCORE_CACHE = LLMCache(path=Path("data") / "investment_scores.sqlite3", ttl=30 * 24 * 3600)
+AI_MAX_CONCURRENCY = 8
+AI_MAX_RETRIES = 2
+
+def listing_keys(raw_df):
+    """Stable id per listing: zpid, else the Zillow URL, else the address."""
+    keys = pd.Series([None] * len(raw_df), index=raw_df.index, dtype=object)
+    for col in ('address', 'url', 'zpid'):
+        if col in raw_df.columns:
+            values = raw_df[col].astype(object)
+            keys = values.where(values.notna() & (values.astype(str).str.strip() != ''), keys)
+    return pd.Series([_listing_key_text(k) for k in keys], index=raw_df.index, dtype=object)
+
+def _listing_key_text(k):
+    # keyless listings stay None (never "nan"), so they are not deduped or cached as one listing
+    if pd.api.types.is_scalar(k) and pd.isna(k):
+        return None
+    # zpids read as floats when some rows lack one
+    return str(int(k)) if isinstance(k, float) and k.is_integer() else str(k)
+
+def score_listings(ai_pipeline, records, namespace, max_concurrency=AI_MAX_CONCURRENCY,
+                   max_retries=AI_MAX_RETRIES, failed_rationale="Failed to evaluate parameters.",
+                   missing_rationale="Evaluation skipped."):
+    """
+    Scores [(listing_key, price, pipeline_inputs)] with ai_pipeline.batch, at most
+    `max_concurrency` requests in flight. Cached listings are skipped, and only the
+    calls that failed are retried. Returns [(score, rationale)] in input order.
+    """
+    results = [None] * len(records)
+    pending = []
+    for i, (key, price, inputs) in enumerate(records):
+        cached = SCORE_CACHE.get(namespace, 0, json.dumps([key, str(price), inputs["location"]])) if key else None
+        if cached:
+            results[i] = tuple(json.loads(cached))
+        else:
+            pending.append(i)
+
+    for attempt in range(max_retries + 1):
+        if not pending:
+            break
+        if attempt:
+            time.sleep(2 ** attempt)
+            print(f"🔁 Retrying {len(pending)} failed AI evaluation(s)...")
+        outputs = ai_pipeline.batch([records[i][2] for i in pending],
+                                    config={"max_concurrency": max_concurrency}, return_exceptions=True)
+        failed = []
+        for i, res in zip(pending, outputs):
+            if isinstance(res, Exception) or not isinstance(res, dict):
+                failed.append(i)
+                continue
+            results[i] = (res.get("score", 50), res.get("rationale", missing_rationale))
+            key, price, inputs = records[i]
+            if key:
+                SCORE_CACHE.put(namespace, 0, json.dumps([key, str(price), inputs["location"]]), json.dumps(results[i]))
+        pending = failed
+
+    for i in pending:
+        results[i] = (50, failed_rationale)
+    return results
+
+def score_property_frame(ai_pipeline, df, raw_df, location, namespace, max_concurrency=AI_MAX_CONCURRENCY, **rationales):
+    """Adds the 'Investment Score' and 'AI Analysis Summary' columns to df in place."""
+    keys = listing_keys(raw_df.loc[df.index])
+    records = [
+        (key, row['Price'], {
+            "category": row['Category'], "price": row['Price'],
+            "beds": row.get('Beds', 'N/A'), "baths": row.get('Baths', 'N/A'), "sqft": row.get('SqFt', 'N/A'),
+            "location": location
+        })
+        for key, row in zip(keys, df.to_dict('records'))
+    ]
+    scored = score_listings(ai_pipeline, records, namespace, max_concurrency=max_concurrency, **rationales)
+    df['Investment Score'] = [score for score, _ in scored]
+    df['AI Analysis Summary'] = [rationale for _, rationale in scored]
+    return df
+
+# LISTING SNAPSHOT STORE
+# Only listings that are new or materially changed (price drop, status change, relist) are scored and uploaded
+LISTING_STORE = ListingStore()
+STATUS_COLUMNS = ('homeStatus', 'statusType', 'status')
+
+def listing_snapshots(raw_df):
+    """ListingStore snapshot per raw listing row, in raw_df order."""
+    keys = listing_keys(raw_df)
+    status_col = next((c for c in STATUS_COLUMNS if c in raw_df.columns), None)
+    statuses = raw_df[status_col] if status_col else pd.Series([None] * len(raw_df), index=raw_df.index)
+    doms = pd.to_numeric(raw_df['daysOnZillow'], errors='coerce') if 'daysOnZillow' in raw_df.columns \
+        else pd.Series([None] * len(raw_df), index=raw_df.index)
+    prices = pd.to_numeric(raw_df['price'], errors='coerce')
+    addresses = raw_df['address'] if 'address' in raw_df.columns else keys
+    return [
+        {"key": key, "address": None if pd.isna(address) else str(address),
+         "price": None if pd.isna(price) else float(price),
+         "status": None if pd.isna(status) else str(status),
+         "days_on_market": None if pd.isna(dom) else float(dom)}
+        for key, address, price, status, dom in zip(keys, addresses, prices, statuses, doms)
+    ]
+
+def filter_changed_listings(df, raw_df, scope):
+    """
+    Records df's listings in LISTING_STORE and keeps only those new or materially changed
+    since they were last emitted to `scope`. Adds 'Listing Change' and '_listing_key' columns.
+    """
+    snapshots = listing_snapshots(raw_df.loc[df.index])
+    keys = pd.Series([snap["key"] for snap in snapshots], index=df.index, dtype=object)
+    # the same listing can come back twice in one scrape
+    first = ~keys.duplicated() | keys.isna()
+    df, keys = df[first], keys[first]
+    snapshots = [snap for snap, keep in zip(snapshots, first) if keep]
+
+    reasons = {listing["key"]: reason for listing, reason in
+               LISTING_STORE.observe([snap for snap in snapshots if snap["key"]], scope)}
+    df = df.assign(**{
+        'Listing Change': [reasons.get(key) if key else "New Listing" for key in keys],
+        '_listing_key': keys.tolist(),
+    })
+    changed = df[df['Listing Change'].notna()].copy()
+    print(f"🔎 {len(changed)} of {len(df)} listings are new or changed.")
+    return changed
+
 # 2. TARGET RUNNER FOR A SPECIFIC LOCATION
-def process_location(client, ai_pipeline, location, country, settings):
-    """Scrapes and returns an AI-evaluated dataframe for a specific market block."""
-    print(f"🌍 Processing: {location} ({country})...")
-    
-    actor_input = {
+ZILLOW_ACTOR = "scrapier/zillow-search-scraper"
+RUN_TERMINAL_STATUSES = {"SUCCEEDED", "FAILED", "TIMED-OUT", "ABORTED"}
+
+def build_actor_input(location, settings):
+    return {
       "search": location,
       "type": "FOR_SALE",
       "maxPages": settings["max_pages_per_run"],
       "resultsPerPage": settings["results_per_page"]
     }
+
+def evaluate_market_items(ai_pipeline, items, location, country, max_concurrency=AI_MAX_CONCURRENCY, store_scope=None):
+    """
+    Turns one market's scraped dataset items into an AI-evaluated dataframe. With a
+    store_scope, only listings new or changed for that destination are scored and returned.
+    """
+    if not items:
+        print(f"⚠️ No property matches found for {location}.")
+        return None
+        
+    raw_df = pd.DataFrame(items)
+    
+    # Standardize property categories
+    type_mapping = {
+        'SINGLE_FAMILY': 'Single-Family', 'CONDO': 'Condo', 'TOWNHOUSE': 'Townhome',
+        'MULTI_FAMILY': 'Multi-Tenant', 'LOT': 'Lots/Land', 'MANUFACTURED': 'Single-Family',
+        'APARTMENT': 'Multi-Tenant'
+    }
+    if 'homeType' not in raw_df.columns:
+        raw_df['homeType'] = 'SINGLE_FAMILY'
+    raw_df['Category'] = raw_df['homeType'].map(type_mapping).fillna('Single-Family')
+    
+    # Clean data structures
+    cols_to_keep = ['address', 'price', 'bedrooms', 'bathrooms', 'livingArea', 'Category', 'url']
+    existing_cols = [c for c in cols_to_keep if c in raw_df.columns]
+    df = raw_df[existing_cols].copy().dropna(subset=['price'])
+    
+    df.rename(columns={
+        'address': 'Address', 'price': 'Price', 'bedrooms': 'Beds', 
+        'bathrooms': 'Baths', 'livingArea': 'SqFt', 'url': 'Zillow Link'
+    }, inplace=True)
+
+    df['Beds'] = df['Beds'].fillna("N/A")
+    df['Baths'] = df['Baths'].fillna("N/A")
+    df['SqFt'] = df['SqFt'].fillna("N/A")
+
+    if store_scope is not None:
+        df = filter_changed_listings(df, raw_df, store_scope)
+        if df.empty:
+            print(f"💤 No new or changed listings for {location}.")
+            return None
+
+    # Batch records through AI evaluation
+    score_property_frame(ai_pipeline, df, raw_df, f"{location}, {country}", "gpt-4o:valuation",
+                         max_concurrency=max_concurrency)
+    
+    # Add tracking metadata fields
+    df['Country'] = country
+    df['Search Location'] = location
+    df['Date Discovered'] = datetime.date.today().isoformat()
+    
+    return df
+
+def process_location(client, ai_pipeline, location, country, settings, store_scope=None):
+    """Scrapes and returns an AI-evaluated dataframe for a specific market block."""
+    print(f"🌍 Processing: {location} ({country})...")
     
     try:
-        run = client.actor("scrapier/zillow-search-scraper").call(
-            run_input=actor_input, 
+        run = client.actor(ZILLOW_ACTOR).call(
+            run_input=build_actor_input(location, settings), 
             timeout_secs=settings["api_timeout_seconds"]
         )
         items = list(client.dataset(run["defaultDatasetId"]).iterate_items())
+        return evaluate_market_items(ai_pipeline, items, location, country,
+                                     settings.get("ai_max_concurrency", AI_MAX_CONCURRENCY), store_scope)
         
-        if not items:
-            print(f"⚠️ No property matches found for {location}.")
-            return None
-            
-        raw_df = pd.DataFrame(items)
-        
-        # Standardize property categories
-        type_mapping = {
-            'SINGLE_FAMILY': 'Single-Family', 'CONDO': 'Condo', 'TOWNHOUSE': 'Townhome',
-            'MULTI_FAMILY': 'Multi-Tenant', 'LOT': 'Lots/Land', 'MANUFACTURED': 'Single-Family',
-            'APARTMENT': 'Multi-Tenant'
-        }
-        if 'homeType' not in raw_df.columns:
-            raw_df['homeType'] = 'SINGLE_FAMILY'
-        raw_df['Category'] = raw_df['homeType'].map(type_mapping).fillna('Single-Family')
-        
-        # Clean data structures
-        cols_to_keep = ['address', 'price', 'bedrooms', 'bathrooms', 'livingArea', 'Category', 'url']
-        existing_cols = [c for c in cols_to_keep if c in raw_df.columns]
-        df = raw_df[existing_cols].copy().dropna(subset=['price'])
-        
-        df.rename(columns={
-            'address': 'Address', 'price': 'Price', 'bedrooms': 'Beds', 
-            'bathrooms': 'Baths', 'livingArea': 'SqFt', 'url': 'Zillow Link'
-        }, inplace=True)
+    except Exception as e:
+        print(f"❌ Error compiling data for {location}: {str(e)}")
+        return None
 
-        df['Beds'] = df['Beds'].fillna("N/A")
-        df['Baths'] = df['Baths'].fillna("N/A")
-        df['SqFt'] = df['SqFt'].fillna("N/A")
+async def process_location_async(client, ai_pipeline, location, country, settings, run_slots, store_scope=None):
+    """
+    process_location for an ApifyClientAsync: starts the actor run, polls it without
+    blocking the other markets, then evaluates the dataset as soon as it is ready.
+    """
+    async with run_slots:
+        print(f"🌍 Processing: {location} ({country})...")
+        try:
+            run = await client.actor(ZILLOW_ACTOR).start(
+                run_input=build_actor_input(location, settings),
+                timeout_secs=settings["api_timeout_seconds"]
+            )
+            while run["status"] not in RUN_TERMINAL_STATUSES:
+                await asyncio.sleep(settings.get("poll_interval_seconds", 5))
+                run = await client.run(run["id"]).get()
+            if run["status"] != "SUCCEEDED":
+                print(f"❌ Actor run for {location} ended with status {run['status']}.")
+                return None
+            items = [item async for item in client.dataset(run["defaultDatasetId"]).iterate_items()]
+        except Exception as e:
+            print(f"❌ Error compiling data for {location}: {str(e)}")
+            return None
 
-        # Run records sequentially through AI evaluation
-        ai_scores, ai_rationales = [], []
-        for _, row in df.iterrows():
-            try:
-                res = ai_pipeline.invoke({
-                    "category": row['Category'], "price": row['Price'],
-                    "beds": row['Beds'], "baths": row['Baths'], "sqft": row['SqFt'],
-                    "location": f"{location}, {country}"
-                })
-                ai_scores.append(res.get("score", 50))
-                ai_rationales.append(res.get("rationale", "Evaluation skipped."))
-            except:
-                ai_scores.append(50)
-                ai_rationales.append("Failed to evaluate parameters.")
-        
-        df['Investment Score'] = ai_scores
-        df['AI Analysis Summary'] = ai_rationales
-        
-        # Add tracking metadata fields
-        df['Country'] = country
-        df['Search Location'] = location
-        df['Date Discovered'] = datetime.date.today().isoformat()
-        
-        return df
-        
+    # AI scoring happens outside the run slot so the next market's actor run can start
+    try:
+        return await asyncio.to_thread(evaluate_market_items, ai_pipeline, items, location, country,
+                                       settings.get("ai_max_concurrency", AI_MAX_CONCURRENCY), store_scope)
     except Exception as e:
         print(f"❌ Error compiling data for {location}: {str(e)}")
         return None
 
+async def run_markets_concurrently(client, ai_pipeline, markets, settings, store_scope=None):
+    """
+    Runs every market in `markets` with at most settings["max_concurrent_runs"] actor runs
+    in flight. Returns one dataframe (or None) per location, in config order.
+    """
+    run_slots = asyncio.Semaphore(settings.get("max_concurrent_runs", 4))
+    return await asyncio.gather(*[
+        process_location_async(client, ai_pipeline, location, market["country"], settings, run_slots, store_scope)
+        for market in markets
+        for location in market["locations"]
+    ])
+
 # 3. CORE MANAGEMENT CONTROLLER
 def run_global_pipeline():
     config = load_pipeline_config()
@@ -125,7 +302,7 @@ def run_global_pipeline():
     apify_token = os.getenv("APIFY_API_TOKEN", "your_apify_token_here")
     openai_key = os.getenv("OPENAI_API_KEY", "your_openai_key_here")
     
-    client = ApifyClient(apify_token)
+    client = ApifyClientAsync(apify_token)
     
     # Initialize LangChain tools
     llm = ChatOpenAI(temperature=0, model="gpt-4o", openai_api_key=openai_key)
@@ -137,26 +314,22 @@ def run_global_pipeline():
     )
     ai_pipeline = prompt | llm | parser
 
-    all_market_dfs = []
-    
-    # Loop over everything specified in the JSON file
-    for market in config["target_markets"]:
-        country = market["country"]
-        for location in market["locations"]:
-            market_df = process_location(client, ai_pipeline, location, country, config["settings"])
-            if market_df is not None:
-                all_market_dfs.append(market_df)
-            time.sleep(2) # Brief cooldown pause to maintain connection health
+    # Every market specified in the JSON file runs concurrently, capped by max_concurrent_runs
+    # Only listings new or changed since the last upload to this spreadsheet are scored and appended
+    market_dfs = asyncio.run(run_markets_concurrently(client, ai_pipeline, config["target_markets"], config["settings"],
+                                                      store_scope=config["spreadsheet_id"]))
+    all_market_dfs = [df for df in market_dfs if df is not None]
 
     if not all_market_dfs:
-        print("❌ No items retrieved across any markets.")
+        print("❌ No new or changed listings across any markets.")
         return
 
     # Merge all scraped data together into one unified table structure
     final_combined_df = pd.concat(all_market_dfs, ignore_index=True)
     
     # Organize columns cleanly for Google Sheets
-    column_layout = ['Date Discovered', 'Country', 'Search Location', 'Address', 'Category', 'Price', 'Beds', 'Baths', 'SqFt', 'Investment Score', 'AI Analysis Summary', 'Zillow Link']
+    column_layout = ['Date Discovered', 'Country', 'Search Location', 'Address', 'Category', 'Price', 'Beds', 'Baths', 'SqFt', 'Investment Score', 'AI Analysis Summary', 'Zillow Link', 'Listing Change']
+    emitted_keys = final_combined_df['_listing_key'].dropna().tolist()
     final_combined_df = final_combined_df[column_layout].sort_values(by='Investment Score', ascending=False)
 
     # Stream results directly up to Google Sheet Workspace
@@ -168,21 +341,28 @@ def run_global_pipeline():
     try:
         worksheet = sh.worksheet("REAL_ESTATE_LEADS")
     except gspread.exceptions.WorksheetNotFound:
-        worksheet = sh.add_worksheet(title="REAL_ESTATE_LEADS", rows="1000", cols="12")
+        worksheet = sh.add_worksheet(title="REAL_ESTATE_LEADS", rows="1000", cols="13")
 
-    # Fetch existing sheet entries to check if we need to write fresh headers
-    existing_records = worksheet.get_all_values()
-    
     data_rows = final_combined_df.values.tolist()
+    append_listing_rows(worksheet, column_layout, data_rows)
+    LISTING_STORE.mark_emitted(config["spreadsheet_id"], emitted_keys)
+        
+    print(f"🎉 Success! {len(data_rows)} new or changed listings appended to your REAL_ESTATE_LEADS workspace tab.")
+
+def append_listing_rows(worksheet, header, data_rows):
+    """Appends rows under `header`, writing the header first when the tab is empty."""
+    # Only the header row is read to check if we need to write fresh headers
+    existing_header = worksheet.row_values(1)
     
-    if not existing_records:
+    if not existing_header:
         # Sheet is empty: write header + data rows together
-        worksheet.update(range_name="A1", values=[column_layout] + data_rows)
-    else:
-        # Sheet has data: append new runs cleanly to the bottom rows
-        worksheet.append_rows(data_rows)
-        
-    print(f"🎉 Success! Combined listings successfully updated in your REAL_ESTATE_LEADS workspace tab.")
+        worksheet.update(range_name="A1", values=[header] + data_rows)
+        return
+    if existing_header == header[:-1]:
+        # tab created before the 'Listing Change' column existed
+        worksheet.update(range_name="A1", values=[header])
+    # Sheet has data: append new runs cleanly to the bottom rows
+    worksheet.append_rows(data_rows)
 
 def check_and_update_daily_quota() -> bool:
     """Blocks multi-execution to preserve Apify and OpenAI credits."""
@@ -248,6 +428,12 @@ def run_zillow_google_sheets_pipeline(spreadsheet_id: str, location: str):
         df['Baths'] = df['Baths'].fillna("N/A")
         df['SqFt'] = df['SqFt'].fillna("N/A")
 
+        # Only listings new or changed since the last sync to this spreadsheet go on to scoring
+        df = filter_changed_listings(df, raw_df, spreadsheet_id)
+        if df.empty:
+            print("💤 No new or changed listings since the last sync.")
+            return
+
         # Step C: Initialize the AI Investment Evaluator
         llm = ChatOpenAI(temperature=0, model="gpt-4o", openai_api_key=openai_key)
         parser = JsonOutputParser(pydantic_object=InvestmentEvaluation)
@@ -260,26 +446,13 @@ def run_zillow_google_sheets_pipeline(spreadsheet_id: str, location: str):
         
         ai_pipeline = prompt | llm | parser
         
-        ai_scores, ai_rationales = [], []
         print("🧠 Invoking AI scoring patterns...")
-        for _, row in df.iterrows():
-            try:
-                res = ai_pipeline.invoke({
-                    "category": row['Category'], "price": row['Price'],
-                    "beds": row['Beds'], "baths": row['Baths'], "sqft": row['SqFt'],
-                    "location": location
-                })
-                ai_scores.append(res.get("score", 50))
-                ai_rationales.append(res.get("rationale", "Evaluation skipped."))
-            except:
-                ai_scores.append(50)
-                ai_rationales.append("Error parsing record analysis parameters.")
-        
-        df['Investment Score'] = ai_scores
-        df['AI Analysis Summary'] = ai_rationales
+        score_property_frame(ai_pipeline, df, raw_df, location, "gpt-4o:valuation",
+                             failed_rationale="Error parsing record analysis parameters.")
         
         # Order and sort records by investment yield probability
-        final_order = ['Address', 'Category', 'Price', 'Beds', 'Baths', 'SqFt', 'Investment Score', 'AI Analysis Summary', 'Zillow Link']
+        final_order = ['Address', 'Category', 'Price', 'Beds', 'Baths', 'SqFt', 'Investment Score', 'AI Analysis Summary', 'Zillow Link', 'Listing Change']
+        emitted_keys = df['_listing_key'].dropna().tolist()
         df = df[[c for c in final_order if c in df.columns]].sort_values(by='Investment Score', ascending=False)
 
         # Step D: Connect and stream directly into Google Sheets
@@ -301,10 +474,10 @@ def run_zillow_google_sheets_pipeline(spreadsheet_id: str, location: str):
         header = df.columns.tolist()
         data_rows = df.values.tolist()
         
-        # Clear any existing rows inside the sheet and rewrite clean data
-        worksheet.clear()
-        worksheet.update(range_name="A1", values=[header] + data_rows)
-        print("🎉 Cloud Synchronization Complete! Data is now live.")
+        # Append only the new and changed listings instead of rewriting the whole tab
+        append_listing_rows(worksheet, header, data_rows)
+        LISTING_STORE.mark_emitted(spreadsheet_id, emitted_keys)
+        print(f"🎉 Cloud Synchronization Complete! {len(data_rows)} new or changed listings are now live.")
         
     except Exception as e:
         print(f"❌ Execution failed: {str(e)}")
@@ -373,119 +546,222 @@ def load_config(config_path: str = "config.json") -> Dict[str, Any]:
         print(f"[ERROR] Failed to read config file: {e}")
         return {}
 
-def fetch_zillow_properties(location: str, config: Dict[str, Any]) -> List[Dict[str, Any]]:
-    """
-    Polls RapidAPI Zillow endpoint using search parameters.
-    Handles primary list-view retrieval.
-    """
+# Shared across locations and threads: pages to the same RapidAPI host are paced together
+ZILLOW_RATE = AdaptiveRateLimiter(rate=4.0, min_rate=0.25, max_rate=10.0)
+ZILLOW_MAX_RETRIES = 4
+
+def zillow_request_parts(config: Dict[str, Any]):
+    """(search url, headers) for the configured RapidAPI Zillow host, or None without a key."""
     api_key = config.get("rapidapi_key")
     api_host = config.get("rapidapi_host", "zillow56.p.rapidapi.com")
     
     if not api_key or api_key == "YOUR_RAPIDAPI_KEY_HERE":
         print("[ERROR] Valid RapidAPI key missing from config.json")
-        return []
+        return None
 
-    url = f"https://{api_host}/search"
+    # rapidapi_base_url points the fetcher at a local mock server (see mock_rapidapi.py)
+    url = f"{config.get('rapidapi_base_url', f'https://{api_host}')}/search"
     headers = {
         "X-RapidAPI-Key": api_key,
         "X-RapidAPI-Host": api_host
     }
-    
+    return url, headers
+
+def fetch_zillow_page(location: str, page: int, url: str, headers: Dict[str, str]):
+    """
+    One page of search results as (results, total_pages). Throttling is retried with
+    the shared per-host rate controller; a page that still fails returns ([], 0).
+    """
     # Generic parameter injection covering core location targets
     querystring = {
         "location": location, 
         "status": "FOR_SALE",
-        "page": "1"
+        "page": str(page)
     }
 
     try:
-        print(f"[INFO] Extracting Zillow raw data for location: {location}...")
-        response = requests.get(url, headers=headers, params=querystring, timeout=15)
+        response = http_client.get(url, endpoint="zillow.search", headers=headers, params=querystring,
+                                   limiter=ZILLOW_RATE, max_retries=ZILLOW_MAX_RETRIES)
         
         if response.status_code == 429:
-            print("[WARN] Rate-limited (429). Exponential backoff triggered...")
-            time.sleep(5)
-            return []
+            print(f"[WARN] Still rate-limited after {ZILLOW_MAX_RETRIES} retries: {location} page {page} skipped.")
+            return [], 0
             
         if response.status_code != 200:
             print(f"[ERROR] API failed with status {response.status_code}: {response.text}")
-            return []
+            return [], 0
             
         data = response.json()
-        return data.get("results", [])
+        return data.get("results", []), int(data.get("totalPages") or 1)
         
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, ValueError) as e:
         print(f"[CRITICAL] Network drop or timeout during API hit: {e}")
-        return []
+        return [], 0
+
+def iter_zillow_pages(locations: List[str], config: Dict[str, Any], workers: int = None):
+    """
+    Pages through search results for every location concurrently and yields
+    (location, page, results) as each page arrives. Page 1 of every location is
+    requested first; the rest are queued once page 1 reports totalPages (capped by
+    config["max_pages_per_location"]).
+    """
+    parts = zillow_request_parts(config)
+    if not parts:
+        return
+    url, headers = parts
+    max_pages = int(config.get("max_pages_per_location", 5))
+    workers = workers or int(config.get("zillow_workers", 4))
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="zillow") as pool:
+        pending = {}
+        for location in locations:
+            print(f"[INFO] Extracting Zillow raw data for location: {location}...")
+            pending[pool.submit(fetch_zillow_page, location, 1, url, headers)] = (location, 1)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                location, page = pending.pop(future)
+                results, total_pages = future.result()
+                if page == 1:
+                    for next_page in range(2, min(total_pages, max_pages) + 1):
+                        pending[pool.submit(fetch_zillow_page, location, next_page, url, headers)] = (location, next_page)
+                yield location, page, results
 
-def transform_and_evaluate(properties: List[Dict[str, Any]], re_config: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+def fetch_zillow_properties(location: str, config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Polls RapidAPI Zillow endpoint using search parameters.
+    Returns every result page for the location, in page order.
+    """
+    pages = {page: results for _, page, results in iter_zillow_pages([location], config)}
+    return [prop for page in sorted(pages) for prop in pages[page]]
+
+# Raw listing fields the strategy screen reads, with the default used when a field is missing
+SCREEN_FIELDS = {"price": 0, "bedrooms": 0, "bathrooms": 0, "daysOnZillow": -1, "yearBuilt": 0}
+SCREEN_COLUMNS = list(SCREEN_FIELDS) + ["homeType", "description", "zestimate"]
+
+def keyword_matcher(keywords):
+    """One compiled pattern matching any of `keywords` as a substring, or None without keywords."""
+    if not keywords:
+        return None
+    return re.compile("|".join(re.escape(kw) for kw in keywords))
+
+def property_frame(properties) -> pd.DataFrame:
+    """
+    Typed screening columns for a list of raw property dicts, or for a DataFrame of
+    them (e.g. a metro export loaded from CSV/parquet), built in one pass.
+    """
+    if isinstance(properties, pd.DataFrame):
+        df = properties.reindex(columns=SCREEN_COLUMNS)
+    else:
+        # object columns skip pandas' type inference, which costs more than the screen itself
+        df = pd.DataFrame({c: pd.Series([p.get(c) for p in properties], dtype=object) for c in SCREEN_COLUMNS})
+    for field, default in SCREEN_FIELDS.items():
+        try:
+            values = df[field].to_numpy(dtype=float, na_value=np.nan)
+        except (TypeError, ValueError):
+            values = pd.to_numeric(df[field], errors="coerce").to_numpy(dtype=float)
+        df[field] = np.where(np.isnan(values), default, values)
+    df["homeType"] = df["homeType"].fillna("UNKNOWN")
+    df["description"] = df["description"].fillna("")
+    df["has_zestimate"] = df["zestimate"].notna()
+    return df.reset_index(drop=True)
+
+# Raw fields copied onto each matched lead
+LEAD_FIELDS = ["zpid", "address", "price", "homeType", "bedrooms", "bathrooms", "daysOnZillow", "zestimate"]
+
+def property_records(properties, positions):
+    """Raw property dicts at `positions`; empty DataFrame cells are treated like missing keys."""
+    if not isinstance(properties, pd.DataFrame):
+        return [properties[i] for i in positions]
+    rows = properties.iloc[positions][[c for c in LEAD_FIELDS if c in properties.columns]]
+    if "zpid" in rows.columns:
+        # zpids read as floats when some rows lack one
+        rows = rows.assign(zpid=pd.to_numeric(rows["zpid"], errors="coerce").astype("Int64"))
+    columns = {c: rows[c].astype(object).where(rows[c].notna(), None).tolist() for c in rows.columns}
+    return [{k: v for k, v in zip(columns, values) if v is not None} for values in zip(*columns.values())]
+
+def strategy_masks(df: pd.DataFrame, re_config: Dict[str, Any]):
+    """
+    Boolean mask per strategy over property_frame(). Also returns the wholesaling
+    keyword mask, which decides each wholesale lead's trigger label.
+    """
+    strategies = re_config.get("strategies", {})
+    allowed_types = re_config.get("property_types", ["SINGLE_FAMILY", "MULTI_FAMILY", "LAND"])
+
+    # Global Baseline Type Constraint Check
+    allowed = df["homeType"].isin(allowed_types) if len(allowed_types) > 0 else pd.Series(True, index=df.index)
+
+    # 1. Strategy Evaluation: Investment (Buy & Hold)
+    ib_cfg = strategies.get("investment_buy_hold", {})
+    buy_hold = (allowed
+                & (df["price"] <= ib_cfg.get("max_price", 9999999))
+                & (df["bedrooms"] >= ib_cfg.get("min_bedrooms", 0))
+                & (df["bathrooms"] >= ib_cfg.get("min_bathrooms", 0)))
+    if ib_cfg.get("requires_zestimate"):
+        buy_hold &= df["has_zestimate"]
+
+    # 2. Strategy Evaluation: Wholesaling (keyword triggers or stale listings with motivated sellers)
+    ws_cfg = strategies.get("wholesaling", {})
+    in_budget = allowed & (df["price"] <= ws_cfg.get("max_price", 9999999))
+    matcher = keyword_matcher(ws_cfg.get("keywords", []))
+    has_keyword = pd.Series(False, index=df.index)
+    if matcher and in_budget.any():
+        # descriptions are the expensive column; only scan the ones within budget
+        descriptions = df.loc[in_budget, "description"].astype(str).str.lower()
+        has_keyword[in_budget] = descriptions.str.contains(matcher).to_numpy()
+    is_stale = df["daysOnZillow"] >= ws_cfg.get("max_days_on_zillow", 90)
+    wholesaling = in_budget & (has_keyword | is_stale)
+
+    # 3. Strategy Evaluation: Premium Buy Criteria
+    bp_cfg = strategies.get("buying_premium", {})
+    premium = (allowed
+               & df["price"].between(bp_cfg.get("min_price", 0), bp_cfg.get("max_price", 9999999))
+               & (df["yearBuilt"] >= bp_cfg.get("min_year_built", 0)))
+
+    masks = {"investment_buy_hold": buy_hold, "wholesaling": wholesaling, "buying_premium": premium}
+    return masks, has_keyword
+
+def transform_and_evaluate(properties: Union[List[Dict[str, Any]], pd.DataFrame], re_config: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
     """
     Runs extraction, schema transformation, and evaluates matches across 
     investment, wholesaling, and target premium buy strategies.
+
+    Every strategy is evaluated as a boolean mask over one typed frame, so whole metro
+    exports screen in a single pass; only matching properties are turned into leads.
     """
     categorized_leads = {
         "investment_buy_hold": [],
         "wholesaling": [],
         "buying_premium": []
     }
-    
-    strategies = re_config.get("strategies", {})
-    allowed_types = re_config.get("property_types", ["SINGLE_FAMILY", "MULTI_FAMILY", "LAND"])
+    if len(properties) == 0:
+        return categorized_leads
 
-    for prop in properties:
-        # Standardize properties layout safely from variable API schemas
-        home_type = prop.get("homeType", "UNKNOWN")
-        price = prop.get("price", 0)
-        beds = prop.get("bedrooms", 0)
-        baths = prop.get("bathrooms", 0)
-        days_on_zillow = prop.get("daysOnZillow", -1)
-        description = prop.get("description", "").lower()
-        zestimate = prop.get("zestimate")
-        year_built = prop.get("yearBuilt", 0)
-        zpid = prop.get("zpid")
-
-        # Global Baseline Type Constraint Check
-        if home_type not in allowed_types and len(allowed_types) > 0:
-            continue
+    df = property_frame(properties)
+    masks, has_keyword = strategy_masks(df, re_config)
+    matched = {name: mask.to_numpy() for name, mask in masks.items()}
+    keyword_hit = has_keyword.to_numpy()
 
+    positions = np.flatnonzero(np.logical_or.reduce(list(matched.values())))
+    for i, prop in zip(positions, property_records(properties, positions)):
+        zpid = prop.get("zpid")
         # Normalized Payload for clean processing down-funnel
         normalized_lead = {
             "zpid": zpid,
             "address": prop.get("address", "N/A"),
-            "price": price,
-            "property_type": home_type,
-            "beds": beds,
-            "baths": baths,
-            "days_on_market": days_on_zillow,
-            "zestimate": zestimate,
+            "price": prop.get("price", 0),
+            "property_type": prop.get("homeType", "UNKNOWN"),
+            "beds": prop.get("bedrooms", 0),
+            "baths": prop.get("bathrooms", 0),
+            "days_on_market": prop.get("daysOnZillow", -1),
+            "zestimate": prop.get("zestimate"),
             "url": f"https://www.zillow.com/homedetails/{zpid}_zpid/" if zpid else "N/A"
         }
-
-        # 1. Strategy Evaluation: Investment (Buy & Hold)
-        ib_cfg = strategies.get("investment_buy_hold", {})
-        if (price <= ib_cfg.get("max_price", 9999999) and 
-            beds >= ib_cfg.get("min_bedrooms", 0) and 
-            baths >= ib_cfg.get("min_bathrooms", 0)):
-            if not ib_cfg.get("requires_zestimate") or zestimate is not None:
-                categorized_leads["investment_buy_hold"].append(normalized_lead)
-
-        # 2. Strategy Evaluation: Wholesaling (Looking for deep distress metrics)
-        ws_cfg = strategies.get("wholesaling", {})
-        if price <= ws_cfg.get("max_price", 9999999):
-            # Keyword triggers for deep value-add properties
-            has_keyword = any(kw in description for kw in ws_cfg.get("keywords", []))
-            # Stale listings often reveal highly motivated sellers
-            is_stale = days_on_zillow >= ws_cfg.get("max_days_on_zillow", 90)
-            
-            if has_keyword or is_stale:
-                normalized_lead["wholesale_trigger"] = "Keyword Match" if has_keyword else "High Days on Market"
-                categorized_leads["wholesaling"].append(normalized_lead)
-
-        # 3. Strategy Evaluation: Premium Buy Criteria
-        bp_cfg = strategies.get("buying_premium", {})
-        if (bp_cfg.get("min_price", 0) <= price <= bp_cfg.get("max_price", 9999999) and 
-            year_built >= bp_cfg.get("min_year_built", 0)):
-            categorized_leads["buying_premium"].append(normalized_lead)
+        if matched["wholesaling"][i]:
+            normalized_lead["wholesale_trigger"] = "Keyword Match" if keyword_hit[i] else "High Days on Market"
+        for strategy, mask in matched.items():
+            if mask[i]:
+                categorized_leads[strategy].append(normalized_lead)
 
     return categorized_leads
 
@@ -504,19 +780,17 @@ def run_real_estate_pipeline():
         "buying_premium": []
     }
 
-    # Iterate structural parameters built inside current config loops
-    for location in config.get("locations", []):
-        raw_properties = fetch_zillow_properties(location, config)
-        if not raw_properties:
-            continue
-            
-        segmented = transform_and_evaluate(raw_properties, re_config)
-        
+    # Pages for every location are fetched concurrently and evaluated as they arrive;
+    # results are merged in location and page order so the export stays stable
+    locations = config.get("locations", [])
+    segmented_pages = {}
+    for location, page, raw_properties in iter_zillow_pages(locations, config):
+        if raw_properties:
+            segmented_pages[(locations.index(location), page)] = transform_and_evaluate(raw_properties, re_config)
+
+    for key in sorted(segmented_pages):
         for strategy in all_extracted_leads.keys():
-            all_extracted_leads[strategy].extend(segmented[strategy])
-            
-        # Throttling to prevent API execution blockades across rapid loops
-        time.sleep(1.5)
+            all_extracted_leads[strategy].extend(segmented_pages[key][strategy])
 
     # Output analytical matrix breakdown
     # print("\n================== PIPELINE SUMMARY ==================")
@@ -610,31 +884,11 @@ def run_zillow_investment_pipeline(location: str):
         
         ai_pipeline = prompt | llm | parser
         
-        # Storage lists for our new AI-generated columns
-        ai_scores = []
-        ai_rationales = []
-        
         print("🧠 Analyzing deals using AI Engine...")
-        for _, row in df.iterrows():
-            try:
-                # Format variables safely for the LLM
-                res = ai_pipeline.invoke({
-                    "category": row['Category'],
-                    "price": row['Price'],
-                    "beds": row.get('Beds', 'N/A'),
-                    "baths": row.get('Baths', 'N/A'),
-                    "sqft": row.get('SqFt', 'N/A'),
-                    "location": location
-                })
-                ai_scores.append(res.get("score", 50))
-                ai_rationales.append(res.get("rationale", "No analysis generated."))
-            except Exception as ai_err:
-                ai_scores.append(50)
-                ai_rationales.append("AI processing encountered an omission error.")
-        
         # Append the new scoring metrics to our spreadsheet pipeline
-        df['Investment Score'] = ai_scores
-        df['AI Analysis Summary'] = ai_rationales
+        score_property_frame(ai_pipeline, df, raw_df, location, "gpt-4o:analyst",
+                             failed_rationale="AI processing encountered an omission error.",
+                             missing_rationale="No analysis generated.")
         
         # Reorder columns so the scores are front and center
         final_order = ['Address', 'Category', 'Price', 'Beds', 'Baths', 'SqFt', 'Investment Score', 'AI Analysis Summary', 'Zillow Link']
@@ -0,0 +1,126 @@
+"""
+Local result cache for Google Maps lead scrapes.
+
+Each (api, query, location, limit) search keeps its latest normalized
+snapshot as JSON under data/scrape_cache/, with the time it was fetched and
+the business keys of the snapshot before it. From that, scrape_google_maps
+can:
+
+- skip the request while the snapshot is younger than the freshness window
+- serve a stale snapshot when the Google quota is spent or the request fails
+- in delta mode, return only businesses that were not in the previous
+  snapshot; once a delta has been returned the snapshot becomes its own
+  baseline (advance()), so later runs inside the freshness window get
+  nothing until a new snapshot brings new businesses
+
+ResponseFixtures records raw API responses (SCRAPE_FIXTURES=record) and
+replays them without network access or quota (SCRAPE_FIXTURES=replay), so
+the scrape path can be exercised offline. Fixtures live under fixtures/scrapes/;
+the one committed there is synthetic (hand-written in SerpAPI's google_maps
+response shape) and test_scrape_fixtures.py replays it.
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+from lead_index import normalize_company
+
+CACHE_DIR = Path("data") / "scrape_cache"
+FIXTURE_DIR = Path("fixtures") / "scrapes"
+
+
+def query_key(api, query, location, limit):
+    payload = json.dumps([api, query, location, int(limit)])
+    return hashlib.sha1(payload.encode()).hexdigest()[:20]
+
+
+def business_key(item):
+    # the maps profile link is stable; fall back to the normalized name
+    url = item.get("profileUrl")
+    if url and url != "N/A" and not isinstance(url, dict):
+        return str(url)
+    return normalize_company(item.get("company"))
+
+
+def _write_json(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2, default=str)
+    os.replace(tmp, path)
+
+
+class ScrapeCache:
+    def __init__(self, root=CACHE_DIR):
+        self.root = Path(root)
+
+    def _path(self, key):
+        return self.root / f"{key}.json"
+
+    def get(self, api, query, location, limit):
+        path = self._path(query_key(api, query, location, limit))
+        if not path.exists():
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    @staticmethod
+    def age_hours(entry):
+        return (time.time() - entry["fetched_at"]) / 3600
+
+    def is_fresh(self, api, query, location, limit, max_age_hours):
+        entry = self.get(api, query, location, limit)
+        return bool(entry) and self.age_hours(entry) <= max_age_hours
+
+    def put(self, api, query, location, limit, results):
+        """Store a new snapshot, remembering which businesses the previous one had."""
+        previous = self.get(api, query, location, limit)
+        entry = {
+            "api": api,
+            "query": query,
+            "location": location,
+            "limit": int(limit),
+            "fetched_at": time.time(),
+            "results": results,
+            "previous_keys": sorted({business_key(r) for r in previous["results"]}) if previous else None,
+        }
+        _write_json(self._path(query_key(api, query, location, limit)), entry)
+        return entry
+
+    @staticmethod
+    def delta(entry):
+        """Businesses in the snapshot that the one before it did not have."""
+        if entry.get("previous_keys") is None:
+            return list(entry["results"])
+        seen = set(entry["previous_keys"])
+        return [r for r in entry["results"] if business_key(r) not in seen]
+
+    def advance(self, entry):
+        """Mark the snapshot's businesses as delivered: its delta() is empty from now on."""
+        entry = dict(entry, previous_keys=sorted({business_key(r) for r in entry["results"]}))
+        _write_json(self._path(query_key(entry["api"], entry["query"], entry["location"], entry["limit"])), entry)
+        return entry
+
+
+class ResponseFixtures:
+    def __init__(self, root=FIXTURE_DIR, mode=None):
+        self.root = Path(root)
+        self.mode = mode if mode is not None else os.getenv("SCRAPE_FIXTURES", "")
+
+    def path(self, api, query, location, limit):
+        return self.root / f"{api}-{query_key(api, query, location, limit)}.json"
+
+    def load(self, api, query, location, limit):
+        path = self.path(api, query, location, limit)
+        if not path.exists():
+            raise FileNotFoundError(f"No recorded {api} response for {query!r} in {location!r} ({path})")
+        with open(path) as f:
+            return json.load(f)["response"]
+
+    def save(self, api, query, location, limit, response):
+        _write_json(self.path(api, query, location, limit), {
+            "api": api, "query": query, "location": location, "limit": int(limit), "response": response,
+        })
@@ -0,0 +1,178 @@
+"""
+Buffered Google Sheets writer.
+
+Rows are collected in memory and written with a single append_rows call once
+`max_rows` are waiting or the oldest waiting row is `max_seconds` old. A timer
+thread enforces the age limit while the producer is busy elsewhere. Each
+flush costs one API request and one unit of the daily Google quota, no matter
+how many rows it carries. Rate-limit and transient server errors are retried
+with jittered exponential backoff.
+
+If the quota is refused or the append still fails, the rows stay buffered and
+are tried again `max_seconds` later. Anything still buffered is flushed by
+close(), on leaving a `with` block, or at interpreter exit; rows that cannot
+be written even then are counted in `unsent` and left in `rows` for the
+caller (tech_clients re-queues them through the lead work queue).
+"""
+
+import atexit
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def _status_code(error):
+    # gspread.exceptions.APIError carries the requests response
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+
+class BufferedSheetWriter:
+    def __init__(self, sheet, reserve=None, max_rows=50, max_seconds=30.0,
+                 max_retries=5, base_delay=1.0, on_flush=None, operation="google_sheets_append_rows"):
+        """
+        reserve(operation, amount) -> bool is charged once per flush (e.g.
+        reserve_google_call); on_flush(rows, keys) runs after rows are written,
+        with the key each row was appended with.
+        """
+        self.sheet = sheet
+        self.reserve = reserve
+        self.max_rows = max_rows
+        self.max_seconds = max_seconds
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.on_flush = on_flush
+        self.operation = operation
+        self.rows = []
+        self.keys = []  # caller's key for each buffered row (tech_clients: the lead id)
+        self.oldest = None
+        self.retry_at = 0.0  # monotonic time before which a failed flush is not retried
+        self.written = 0
+        self.flushes = 0
+        self.unsent = 0
+        self.timer = None
+        self.closed = False
+        self.flushing = False
+        self.lock = threading.Lock()        # guards the buffer and counters
+        self.flush_lock = threading.Lock()  # one flush (quota, append, backoff) at a time
+        atexit.register(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def append(self, row, key=None):
+        """Buffer one row; flushes when the size or age threshold is reached."""
+        with self.lock:
+            if not self.rows:
+                self.oldest = time.monotonic()
+            self.rows.append(list(row))
+            self.keys.append(key)
+            due = self._due()
+            self._schedule()
+        if due:
+            self.flush(wait=False)
+
+    def _due(self):
+        now = time.monotonic()
+        if self.flushing or not self.rows or now < self.retry_at:
+            return False
+        return len(self.rows) >= self.max_rows or now - self.oldest >= self.max_seconds
+
+    def _schedule(self):
+        # one timer at a time flushes rows that are only waiting on age
+        if self.timer is not None or not self.rows or self.closed:
+            return
+        ready = self.retry_at if len(self.rows) >= self.max_rows else max(self.oldest + self.max_seconds, self.retry_at)
+        self.timer = threading.Timer(max(ready - time.monotonic(), 0.0), self._on_timer)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def _on_timer(self):
+        with self.lock:
+            self.timer = None
+            due = self._due()
+        if due:
+            self.flush(wait=False)
+        with self.lock:
+            self._schedule()
+
+    def _hold(self, reason):
+        self.retry_at = time.monotonic() + self.max_seconds
+        logger.warning("Keeping %s sheet row(s) buffered (%s); retrying in %.1fs.",
+                       len(self.rows), reason, self.max_seconds)
+
+    def flush(self, wait=True):
+        """
+        Write every buffered row in one request. Returns the number of rows written.
+        The quota reservation and retry backoff run outside the buffer lock, so
+        append() never waits on them. One flush runs at a time; with wait=False
+        the call returns 0 at once if another flush is in progress.
+        """
+        if not self.flush_lock.acquire(blocking=wait):
+            return 0
+        try:
+            with self.lock:
+                if not self.rows:
+                    return 0
+                rows, keys, oldest = self.rows, self.keys, self.oldest
+                self.rows, self.keys, self.oldest, self.flushing = [], [], None, True
+            error = None
+            if self.reserve and not self.reserve(self.operation, 1):
+                error = "daily Google quota is exhausted"
+            else:
+                try:
+                    self._append_with_retry(rows)
+                except Exception as e:
+                    error = f"append failed: {e}"
+            with self.lock:
+                self.flushing = False
+                if error:
+                    # rows appended meanwhile stay behind the ones that failed
+                    self.rows, self.keys, self.oldest = rows + self.rows, keys + self.keys, oldest
+                    self._hold(error)
+                    self._schedule()
+                    return 0
+                self.retry_at = 0.0
+                self.written += len(rows)
+                self.flushes += 1
+                self._schedule()
+            logger.info("Appended %s row(s) to Google Sheets in one request.", len(rows))
+            if self.on_flush:
+                self.on_flush(rows, keys)
+            return len(rows)
+        finally:
+            self.flush_lock.release()
+
+    def _append_with_retry(self, rows):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.sheet.append_rows(rows, value_input_option="RAW")
+            except Exception as e:
+                if _status_code(e) not in RETRY_STATUSES or attempt == self.max_retries:
+                    raise
+                delay = self.base_delay * (2 ** attempt) * random.uniform(0.5, 1.5)
+                logger.warning("Sheets append throttled (%s); retrying in %.1fs.", _status_code(e), delay)
+                time.sleep(delay)
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        try:
+            self.flush()
+        finally:
+            with self.lock:
+                self.unsent = len(self.rows)
+            if self.unsent:
+                logger.error("%s sheet row(s) could not be written before close.", self.unsent)
+            atexit.unregister(self.close)
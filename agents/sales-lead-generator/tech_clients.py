@@ -51,7 +51,19 @@ import hashlib
 import csv
 import urllib
 import logging
+import threading
+import http_client
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from real_estate import fetch_zillow_properties
+from lead_index import LeadIndex
+from sheet_writer import BufferedSheetWriter
+from llm_cache import LLMCache
+from quota import QuotaManager
+from scrape_cache import ResponseFixtures, ScrapeCache
+from lead_scoring import lead_rules, triage_leads
+from lead_queue import LeadQueue, combo_key
 from datetime import datetime as dt
 from typing import List, Dict, Any
 
@@ -116,6 +128,69 @@ if os.path.exists("config.json"):
 else:
   raise FileNotFoundError("config.json not found. Please create a config.json file with the necessary configuration.")
 
+# ---------------- PROVIDER CONCURRENCY LIMITS ---------------- #
+# Max in-flight calls per external provider, shared by every worker thread.
+# Override per provider with tech_config.concurrency, e.g. {"openai": 8}.
+PROVIDER_CONCURRENCY = {
+    "openai": 4,
+    "gemini": 4,
+    "serpapi": 2,
+    "googleapi": 2,
+    "phantombuster": 1,
+    "x": 1,
+    "google_calendar": 2,
+}
+PROVIDER_CONCURRENCY.update(CONFIG.get("tech_config", {}).get("concurrency", {}))
+SCRAPE_WORKERS = int(CONFIG.get("tech_config", {}).get("scrape_workers", 4))
+LEAD_WORKERS = int(CONFIG.get("tech_config", {}).get("lead_workers", 8))
+# Lead rows are appended in batches: one Sheets request and one quota unit per flush
+SHEET_BATCH_ROWS = int(CONFIG.get("tech_config", {}).get("sheet_batch_rows", 50))
+SHEET_FLUSH_SECONDS = float(CONFIG.get("tech_config", {}).get("sheet_flush_seconds", 30))
+
+# ---------------- LLM RESPONSE CACHE ---------------- #
+# Identical prompts (follow-ups, niche templates, reruns) are answered from data/llm_cache.sqlite3
+LLM_CACHE = LLMCache(
+    ttl=float(CONFIG.get("tech_config", {}).get("llm_cache_ttl_hours", 168)) * 3600,
+    max_entries=int(CONFIG.get("tech_config", {}).get("llm_cache_max_entries", 20000)),
+)
+GENERATION_FAILURE = "[Generation Failure Placeholder]"
+
+# ---------------- SCRAPE RESULT CACHE ---------------- #
+# Maps searches are reused for scrape_cache_hours; scrape_delta keeps only businesses new since the last snapshot
+SCRAPE_CACHE = ScrapeCache()
+SCRAPE_FIXTURES = ResponseFixtures()
+SCRAPE_CACHE_HOURS = float(CONFIG.get("tech_config", {}).get("scrape_cache_hours", 24))
+SCRAPE_DELTA = bool(CONFIG.get("tech_config", {}).get("scrape_delta", False))
+
+# ---------------- LEAD SCORING RULES ---------------- #
+# Classification thresholds and score weights (tech_config.lead_rules); leads scoring below
+# lead_score_threshold are dropped before any model call
+LEAD_RULES = lead_rules(CONFIG.get("tech_config", {}).get("lead_rules"))
+LEAD_SCORE_THRESHOLD = int(CONFIG.get("tech_config", {}).get("lead_score_threshold", 0))
+
+# ---------------- PIPELINE WORK QUEUE ---------------- #
+# Every lead's stage is checkpointed in data/lead_queue.sqlite3; rerunning with the same
+# PIPELINE_RUN_ID (default: today's date) resumes where the previous run stopped
+LEAD_QUEUE = LeadQueue()
+PIPELINE_RETENTION_DAYS = float(CONFIG.get("tech_config", {}).get("pipeline_retention_days", 14))
+MAX_GENERATION_ATTEMPTS = int(CONFIG.get("tech_config", {}).get("max_generation_attempts", 3))
+
+_provider_semaphores = {
+    name: threading.BoundedSemaphore(max(1, int(limit)))
+    for name, limit in PROVIDER_CONCURRENCY.items()
+}
+
+
+@contextmanager
+def provider_slot(provider):
+    """Hold one of the provider's concurrency slots for the duration of a call."""
+    semaphore = _provider_semaphores.get(provider)
+    if semaphore is None:
+        yield
+        return
+    with semaphore:
+        yield
+
 # ---------------- DAILY GOOGLE CLOUD QUOTA TRACKER ---------------- #
 # ---------------- Google API daily budget guard for once-daily GitHub Actions runs. ---------------- #
 GOOGLE_DAILY_QUOTA_LIMIT = max(
@@ -124,54 +199,70 @@ GOOGLE_DAILY_QUOTA_LIMIT = max(
 )
 
 
-def _load_google_quota_state():
-    today_str = datetime.date.today().isoformat()
-    if os.path.exists(STATE_FILE):
-        try:
-            with open(STATE_FILE, "r") as f:
-                state = json.load(f)
-            if state.get("date") == today_str:
-                return {"date": today_str, "used": int(state.get("used", 0))}
-        except Exception:
-            pass
-    return {"date": today_str, "used": 0}
-
-
-def _save_google_quota_state(state):
-    state["date"] = datetime.date.today().isoformat()
-    with open(STATE_FILE, "w") as f:
-        json.dump(state, f, indent=2)
-
-
-def reserve_google_call(operation_name, amount=1):
-    state = _load_google_quota_state()
-    used = int(state.get("used", 0))
-    if used + amount > GOOGLE_DAILY_QUOTA_LIMIT:
+# Per-API token buckets on top of the daily budget, shared by every worker thread and
+# process through data/quota.sqlite3. Override with tech_config.google_quota,
+# e.g. {"sheets": {"per_minute": 30}}.
+GOOGLE_QUOTA_LIMITS = {
+    "google": {"per_day": GOOGLE_DAILY_QUOTA_LIMIT},
+    "sheets": {"per_minute": 60},
+    "drive": {"per_minute": 60},
+    "calendar": {"per_minute": 60},
+    "maps": {"per_minute": 60},
+}
+for _api, _buckets in CONFIG.get("tech_config", {}).get("google_quota", {}).items():
+    GOOGLE_QUOTA_LIMITS.setdefault(_api, {}).update(_buckets)
+GOOGLE_QUOTA = QuotaManager(GOOGLE_QUOTA_LIMITS)
+GOOGLE_QUOTA_WAIT_SECONDS = 120  # longest wait for per-minute capacity before skipping
+
+
+def google_quota_apis(operation_name):
+    """Buckets an operation draws from: the shared daily budget plus its API (google_sheets_* -> sheets)."""
+    parts = operation_name.split("_")
+    api = parts[1] if len(parts) > 1 and parts[0] == "google" else None
+    return ["google"] + ([api] if api in GOOGLE_QUOTA_LIMITS else [])
+
+
+def _log_reservation(operation_name, amount, granted):
+    remaining = GOOGLE_QUOTA.status().get("google", {}).get("per_day", {}).get("remaining")
+    if not granted:
         logger.warning(
-            "Google daily quota exhausted (%s/%s). Skipping %s.",
-            used,
+            "Google quota exhausted (%s of %s left today). Skipping %s.",
+            remaining,
             GOOGLE_DAILY_QUOTA_LIMIT,
             operation_name,
         )
-        return False
-    state["used"] = used + amount
-    _save_google_quota_state(state)
+        return
     logger.info(
         "Reserved %s Google call(s) for %s. Remaining: %s",
         amount,
         operation_name,
-        GOOGLE_DAILY_QUOTA_LIMIT - state["used"],
+        remaining,
     )
-    return True
+
+
+def reserve_google_call(operation_name, amount=1):
+    """Wait for per-minute capacity and spend `amount`; False when a daily budget is spent."""
+    granted = GOOGLE_QUOTA.acquire(google_quota_apis(operation_name), amount, timeout=GOOGLE_QUOTA_WAIT_SECONDS)
+    _log_reservation(operation_name, amount, granted)
+    return granted
+
+
+async def reserve_google_call_async(operation_name, amount=1):
+    """Awaitable reserve_google_call for asyncio callers."""
+    granted = await GOOGLE_QUOTA.acquire_async(google_quota_apis(operation_name), amount,
+                                               timeout=GOOGLE_QUOTA_WAIT_SECONDS)
+    _log_reservation(operation_name, amount, granted)
+    return granted
 
 
 def get_google_quota_status():
-    state = _load_google_quota_state()
-    used = int(state.get("used", 0))
+    buckets = GOOGLE_QUOTA.status()
+    daily = buckets.get("google", {}).get("per_day", {"limit": GOOGLE_DAILY_QUOTA_LIMIT, "remaining": 0})
     return {
-        "used": used,
-        "limit": GOOGLE_DAILY_QUOTA_LIMIT,
-        "remaining": max(0, GOOGLE_DAILY_QUOTA_LIMIT - used),
+        "used": daily["limit"] - daily["remaining"],
+        "limit": daily["limit"],
+        "remaining": daily["remaining"],
+        "buckets": buckets,
     }
 
 # Google Maps API daily budget guard.
@@ -207,30 +298,44 @@ except Exception as e:
 # AI COPYWRITING & TRANSFORM OPERATIONS
 # ==========================================
 # ---------------- OPENAI MODEL CONFIG ---------------- #
+@LLM_CACHE.memoize("gpt-4o-mini", skip=(GENERATION_FAILURE,))
 def openai_generate(prompt, temperature=0.7):
 	try:
-		response = openai_client.chat.completions.create(
-			model="gpt-4o-mini",
-			messages=[{"role": "user", "content": prompt}],
-			temperature=temperature
-		)
+		with provider_slot("openai"):
+			response = openai_client.chat.completions.create(
+				model="gpt-4o-mini",
+				messages=[{"role": "user", "content": prompt}],
+				temperature=temperature
+			)
 		return response.choices[0].message.content.strip()
 	except Exception as e:
 		print(f"AI Generation error: {e}")
-		return "[Generation Failure Placeholder]"
+		return GENERATION_FAILURE
 
 
 # ---------------- GEMINI MODEL CONFIG ---------------- #
+@LLM_CACHE.memoize("gemini-2.5-flash", skip=(GENERATION_FAILURE,))
 def gemini_generate(prompt, temperature=0.7):
 	try: 
-		response = gemini_client.generate_content(
-			model="gemini-2.5-flash",
-			contents=prompt
-		)
+		with provider_slot("gemini"):
+			response = gemini_client.generate_content(
+				model="gemini-2.5-flash",
+				contents=prompt
+			)
 		return response.text
 	except Exception as e:
 		print(f"Gemini Generation error: {e}")
-		return "[Generation Failure Placeholder]"
+		return GENERATION_FAILURE
+
+# ---------------- LEGACY GPT-4 COMPLETIONS ---------------- #
+@LLM_CACHE.memoize("gpt-4")
+def gpt4_generate(prompt, temperature=None):
+    with provider_slot("openai"):
+        response = openai.ChatCompletion.create(
+            model="gpt-4",
+            messages=[{"role": "user", "content": prompt}],
+        )
+    return response.choices[0].message.content.strip()
 
 #--- switch between openai and gemini models ------- #
 def ai_model_selection(prompt, temperature=0.7, model="gemini"):
@@ -344,7 +449,7 @@ def push_to_notion(lead, artifacts):
         }
     }
 
-    requests.post(url, headers=headers, json=data)
+    http_client.post(url, endpoint="notion.pages", headers=headers, json=data)
 
 # ---------------- CALENDAR EVENT CREATION ---------------- #
 def create_calendar_event(service, lead):
@@ -369,19 +474,11 @@ def generate_email(business):
     Goal: Book a short sales call
     Tone: Professional, direct, friendly
     """
-    response = openai.ChatCompletion.create(
-        model="gpt-4",
-        messages=[{"role": "user", "content": prompt}],
-    )
-    return response.choices[0].message.content.strip()
+    return gpt4_generate(prompt)
 
 def generate_followup(business, step):
     prompt = f"Write follow-up #{step} for {business}. Keep it short."
-    res = openai.ChatCompletion.create(
-        model="gpt-4",
-        messages=[{"role": "user", "content": prompt}]
-    )
-    return res.choices[0].message.content.strip()
+    return gpt4_generate(prompt)
 
 # =========================
 # INVOICE GENERATION
@@ -469,11 +566,136 @@ def generate_x_dm(tweet_text, niche):
     Niche: {niche['name']}
     Goal: Start a conversation, NOT pitch.
     """
-    res = openai.ChatCompletion.create(
-        model="gpt-4",
-        messages=[{"role": "user", "content": prompt}]
+    return gpt4_generate(prompt)
+
+
+# ---------------- BATCHED LEAD ARTIFACTS ---------------- #
+# Every outreach artifact for a lead comes back from one structured completion;
+# the lead context is sent once instead of once per artifact.
+LEAD_ARTIFACT_TASKS = {
+    "initial_email": "A personalized cold outreach email. Goal: book a short sales call. Tone: professional, direct, friendly.",
+    "follow_up_1": "Follow-up email #1 to the initial email. Keep it short.",
+    "follow_up_2": "Follow-up email #2 to the initial email. Keep it short.",
+    "web_prompt": ("A build prompt for a high-converting web app for this business, written as a senior "
+                   "conversion-focused product designer and full-stack engineer. Structure: Hero, Success State, "
+                   "Problem-Agitate-Transition, Value Stack, Social Proof, Transformation, Secondary CTA, Footer. "
+                   "Optimize for speed, clarity, and conversions."),
+    "loom_script": "A casual Loom-style sales video script. Tone: friendly, confident, personalized. Under 90 seconds.",
+    "sms_copy": "A personalized SMS outreach message. Goal: spark curiosity and a reply. Max 2 sentences.",
+}
+LEAD_ARTIFACT_FIELDS = list(LEAD_ARTIFACT_TASKS)
+
+
+def lead_artifact_schema(fields):
+    return {
+        "type": "object",
+        "properties": {field: {"type": "string"} for field in fields},
+        "required": list(fields),
+        "additionalProperties": False,
+    }
+
+
+def build_lead_artifacts_prompt(lead, fields):
+    tasks = dict(LEAD_ARTIFACT_TASKS)
+    if lead.get("lead_type") == "NO_WEBSITE":
+        # same brief as generate_ai_no_website_message
+        tasks["initial_email"] = ("A concise, professional email to the business owner. Context: the business "
+                                  "does not have a website. Tone: helpful, non-salesy.")
+    task_lines = "\n".join(f"- {field}: {tasks[field]}" for field in fields)
+    return f"""
+You write sales outreach for a web app studio. Write every artifact below for this lead.
+
+Business: {lead['business']}
+Contact name: {lead['name']}
+Location: {lead.get('Location', '')}
+Website: {lead.get('website') or 'none'}
+Industry: {lead['industry']}
+Target Customer: {lead['avatar']}
+Offer: {lead['offer']}
+Pain Point: {lead['pain']}
+Desired Outcome: {lead['outcome']}
+
+Artifacts:
+{task_lines}
+
+Return a JSON object with exactly these string fields: {", ".join(fields)}.
+"""
+
+
+def complete_json_response(text, schema=None, schema_name=None):
+    """memoize validator: the reply parses and every required field is a usable string."""
+    required = (schema or {}).get("required", [])
+    try:
+        data = json.loads(text)
+    except (TypeError, ValueError):
+        return False
+    return isinstance(data, dict) and len(parse_lead_artifacts(text, required)) == len(required)
+
+
+@LLM_CACHE.memoize("gpt-4o-mini:json", skip=(GENERATION_FAILURE,), validate=complete_json_response)
+def openai_generate_json(prompt, temperature=0.7, schema=None, schema_name="response"):
+    """Structured completion; returns the raw JSON text so it can be cached like any other response."""
+    try:
+        with provider_slot("openai"):
+            response = openai_client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+                response_format={
+                    "type": "json_schema",
+                    "json_schema": {"name": schema_name, "strict": True, "schema": schema},
+                },
+            )
+        return response.choices[0].message.content.strip()
+    except Exception as e:
+        print(f"AI Generation error: {e}")
+        return GENERATION_FAILURE
+
+
+def parse_lead_artifacts(text, fields):
+    """Return {field: text} for every field that came back as a usable non-empty string."""
+    try:
+        data = json.loads(text)
+    except (TypeError, ValueError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    valid = {}
+    for field in fields:
+        value = data.get(field)
+        if isinstance(value, str) and value.strip() and value.strip() != GENERATION_FAILURE:
+            valid[field] = value.strip()
+    return valid
+
+
+def generate_lead_artifacts(lead, fields=LEAD_ARTIFACT_FIELDS):
+    """
+    Generate the outreach artifacts for one lead in a single JSON-schema completion.
+    Only fields missing or invalid in the response are generated again with their
+    own per-artifact call.
+    """
+    fields = list(fields)
+    artifacts = parse_lead_artifacts(
+        openai_generate_json(build_lead_artifacts_prompt(lead, fields), schema=lead_artifact_schema(fields),
+                             schema_name="lead_artifacts"),
+        fields,
     )
-    return res.choices[0].message.content.strip()
+    fallbacks = {
+        "initial_email": lambda: (generate_ai_no_website_message(lead) if lead.get("lead_type") == "NO_WEBSITE"
+                                  else generate_email({"title": lead["business"], "website": lead.get("website"),
+                                                       "address": lead.get("Location")})),
+        "follow_up_1": lambda: generate_followup(lead["business"], 1),
+        "follow_up_2": lambda: generate_followup(lead["business"], 2),
+        "web_prompt": lambda: ai_model_selection(build_web_app_prompt(lead)),
+        "loom_script": lambda: ai_model_selection(build_loom_script(lead)),
+        "sms_copy": lambda: ai_model_selection(build_sms_copy(lead)),
+    }
+    missing = [field for field in fields if field not in artifacts]
+    if missing:
+        logger.warning("Batched artifacts for %s missing %s; generating them one by one.", lead["business"], missing)
+    for field in missing:
+        artifacts[field] = fallbacks[field]()
+    return artifacts
 
 
 # =========================================
@@ -523,27 +745,33 @@ def has_website(lead):
     website = lead.get("website")
     if not website:
         return False
-    if any(s in website.lower() for s in ["facebook.com", "instagram.com", "linkedin.com"]):
+    if any(s in website.lower() for s in LEAD_RULES["social_domains"]):
         return False
     return True
 
 # ---------------- LEAD CLASSIFICATION ---------------- #
+# Single-lead versions of lead_scoring.classify_leads / score_leads (same rules and precedence)
 def classify_lead(lead):
-    if not has_website(lead):
+    site = has_website(lead)
+    reviews, rating = lead.get("reviews") or 0, lead.get("rating") or 0
+    low_reviews = reviews < LEAD_RULES["low_reviews"]
+    high = reviews >= LEAD_RULES["high_reviews"] and rating >= LEAD_RULES["high_rating"]
+    low_rating = rating <= LEAD_RULES["low_rating"]
+    if not site:
         return "NO_WEBSITE"
-    elif not has_website(lead) and lead.get("reviews", 0) < 10:
+    elif not site and low_reviews:
         return "NO_WEBSITE_LOW_REVIEW"
-    elif not has_website(lead) and lead.get("reviews", 0) < 10 and lead.get("rating", 0) <= 3:
+    elif not site and low_reviews and low_rating:
         return "NO_WEBSITE_LOW_REVIEW_LOW_RATING"
-    elif not has_website(lead) and lead.get("reviews", 0) >= 15 and lead.get("rating", 0) >= 4:
+    elif not site and high:
         return "NO_WEBSITE_HIGH_REVIEW_HIGH_RATING"
-    elif has_website(lead) and lead.get("reviews", 0) < 10:
+    elif site and low_reviews:
         return "HAS_WEBSITE_LOW_REVIEW"
-    elif has_website(lead) and (lead.get("reviews", 0) < 10 and lead.get("rating", 0) <= 3):
+    elif site and low_reviews and low_rating:
         return "HAS_WEBSITE_LOW_REVIEW_LOW_RATING"
-    elif has_website(lead) and lead.get("reviews", 0) >= 15 and lead.get("rating", 0) >= 4:
+    elif site and high:
         return "HAS_WEBSITE_HIGH_REVIEW_HIGH_RATING"
-    elif has_website(lead):
+    elif site:
         return "HAS_WEBSITE"
     else:
         return "NO LEAD CLASSIFICATION"
@@ -560,13 +788,14 @@ def process_lead(lead):
     return lead
 
 def score_lead(lead):
+    weights = LEAD_RULES["weights"]
     score = 0
     if lead.get("lead_type") == "NO_WEBSITE":
-        score += 40
-    if lead.get("rating", 0) >= 4:
-        score += 20
-    if lead.get("reviews", 0) >= 20:
-        score += 20
+        score += weights["no_website"]
+    if (lead.get("rating") or 0) >= LEAD_RULES["high_rating"]:
+        score += weights["rating"]
+    if (lead.get("reviews") or 0) >= LEAD_RULES["score_reviews"]:
+        score += weights["reviews"]
     return score
 
 # def has_website(lead, query, lead_source=None):
@@ -678,71 +907,111 @@ def fetch_metrics_from_source(source_type, client, kwargs):
     return total_count, new_count
 
 # ---------------- GOOGLE MAPS SCRAPER ---------------- #
-def scrape_google_maps(api: str, query: str, location: str, limit: int = 10) -> List[Dict[str, Any]]:
-    """Fetches local business data from SerpAPI Maps engine, normalizing keys."""
-    params = {"engine": "google_maps", "q": query, "location": location, "api_key": SERPAPI_KEY}
+def _fetch_maps_response(api, query, location, limit):
+    """One live SerpAPI / Places request (or a recorded one); returns the raw JSON response."""
+    if SCRAPE_FIXTURES.mode == "replay":
+        return SCRAPE_FIXTURES.load(api, query, location, limit)
+    logger.info(f"Initiating Google Places API search for query: '{query}'")
+    if api == "serpapi":
+        params = {"engine": "google_maps", "q": query, "location": location, "api_key": SERPAPI_KEY}
+        with provider_slot("serpapi"):
+            response = http_client.get("https://serpapi.com/search", endpoint="serpapi.search", params=params)
+    else:
+        url = "https://places.googleapis.com/v1/places:searchText"
+        headers = {
+            "Content-Type": "application/json",
+            "X-Goog-Api-Key": GOOGLE_MAPS_API_KEY,
+            "X-Goog-FieldMask": ("places.displayName,places.websiteUri,places.nationalPhoneNumber,"
+                                 "places.googleMapsUri,places.primaryType,places.rating,places.userRatingCount")
+        }
+        payload = {
+            "textQuery": f"{query} in {location}",
+            "maxResultCount": limit
+        }
+        with provider_slot("googleapi"):
+            response = http_client.post(url, endpoint="places.searchText", json=payload, headers=headers, idempotent=True)
+    response.raise_for_status()
+    res = response.json()
+    if SCRAPE_FIXTURES.mode == "record":
+        SCRAPE_FIXTURES.save(api, query, location, limit, res)
+    return res
+
+
+def _normalize_maps_response(api, res, limit):
+    normalized = []
+    if api == "serpapi":
+        for item in res.get("local_results", [])[:limit]:
+            normalized.append({
+                "company": item.get("title", "Unknown Local Business"),
+                "website": item.get("website", ""),
+                "phone": item.get("phone", ""),
+                "profileUrl": item.get("gps_coordinates", {}).get("links", "N/A"),
+                "industry": item.get("type", "Local Business"),
+                "rating": item.get("rating", 0),
+                "reviews": item.get("reviews", 0),
+                "pain": "No prominent digital presence matching search metrics",
+            })
+    else:
+        #extract all the results similar to the serpapi logic but using the google maps api response structure
+        results = res.get("places", [])
+        logger.info(f"Successfully retrieved {len(results)} raw results.")
+        for item in results:
+            normalized.append({
+                "company": item.get("displayName", {}).get("text", "Unknown Local Business"),
+                "website": item.get("websiteUri", ""),
+                "phone": item.get("nationalPhoneNumber", ""),
+                "profileUrl": item.get("googleMapsUri", "N/A"),
+                "industry": item.get("primaryType", "Local Business"),
+                "rating": item.get("rating", 0),
+                "reviews": item.get("userRatingCount", 0),
+                "pain": "No prominent digital presence matching search metrics",
+            })
+        logger.info("Data extraction and normalization complete.")
+    return normalized
+
+
+def scrape_google_maps(api: str, query: str, location: str, limit: int = 10,
+                       reserve_quota: bool = True, max_age_hours: float = None,
+                       delta: bool = None, offline: bool = False) -> List[Dict[str, Any]]:
+    """Fetches local business data from SerpAPI Maps engine, normalizing keys.
+
+    Results are cached per (api, query, location, limit): a snapshot younger than
+    max_age_hours (tech_config.scrape_cache_hours) is returned without a request,
+    and a stale one is served when the quota is spent, offline=True or the request
+    fails. With SCRAPE_FIXTURES=replay a recorded response stands in for the request,
+    even offline, and no quota is used. delta=True returns only businesses that no
+    earlier delta for this search has returned.
+    Pass reserve_quota=False when the caller already reserved the Google quota unit.
+    """
+    max_age_hours = SCRAPE_CACHE_HOURS if max_age_hours is None else max_age_hours
+    delta = SCRAPE_DELTA if delta is None else delta
+    replay = SCRAPE_FIXTURES.mode == "replay"
     try:
-        if api == "serpapi":
-            if not get_and_update_daily_count():
-                return None
-            logger.info(f"Initiating Google Places API search for query: '{query}'")
-            try:
-                res = requests.get("https://serpapi.com/search", params=params, timeout=15).json()
-                raw_results = res.get("local_results", [])[:limit]
-                normalized = []
-                for item in raw_results:
-                    normalized.append({
-                        "company": item.get("title", "Unknown Local Business"),
-                        "website": item.get("website", ""),
-                        "phone": item.get("phone", ""),
-                        "profileUrl": item.get("gps_coordinates", {}).get("links", "N/A"),
-                        "industry": item.get("type", "Local Business"),
-                        "pain": "No prominent digital presence matching search metrics",
-                    })
-                return normalized
-            except requests.exceptions.RequestException as e:
-                logger.error(f"SerpAPI Network Error: {e}")
-                print("::endgroup::")
-                return None
-        elif api == "googleapi":
-            if not get_and_update_daily_count():
+        if api not in ("serpapi", "googleapi"):
+            raise ValueError("Invalid API specified for Google Maps scraping. Use 'serpapi' or 'googleapi'.")
+        entry = SCRAPE_CACHE.get(api, query, location, limit)
+        if entry and SCRAPE_CACHE.age_hours(entry) <= max_age_hours:
+            logger.info(f"Serving cached Google Maps results for '{query}' in {location}.")
+        elif not replay and (offline or (reserve_quota and not get_and_update_daily_count())):
+            if not entry:
                 return None
-            params = {"engine": "google", "q": query, "api_key": GOOGLE_MAPS_API_KEY}
-            url = "https://googleapis.com"
-            headers = {
-                "Content-Type": "application/json",
-                "X-Goog-Api-Key": GOOGLE_MAPS_API_KEY,
-                "X-Goog-FieldMask": "places.displayName,places.websiteUri"
-            }
-            payload = {
-                "textQuery": query,
-                "maxResultCount": limit
-            }
-            logger.info(f"Initiating Google Places API search for query: '{query}'")
+            logger.warning(f"No Google quota for a fresh search; serving {SCRAPE_CACHE.age_hours(entry):.0f}h old results for '{query}' in {location}.")
+        else:
             try:
-                response = requests.post(url, json=payload, headers=headers)
-                response.raise_for_status()
-                #extract all the results similar to the serpapi logic but using the google maps api response structure and then check if they have a website listed or not and return true or false accordingly
-                results = res.get("places", [])
-                logger.info(f"Successfully retrieved {len(raw_results)} raw results.")
-                normalized = []
-                for item in results:
-                    normalized.append({
-                        "company": item.get("displayName", {}).get("text", "Unknown Local Business"),
-                        "website": item.get("websiteUri", ""),
-                        "phone": item.get("nationalPhoneNumber", ""),
-                        "profileUrl": item.get("googleMapsUri", "N/A"),
-                        "industry": item.get("primaryType", "Local Business"),
-                        "pain": "No prominent digital presence matching search metrics",
-                    })
-                logger.info("Data extraction and normalization complete.")
-                return normalized     
-            except requests.exceptions.RequestException as e:
-                logger.error(f"API Request failed: {e}")
+                res = _fetch_maps_response(api, query, location, limit)
+            except (requests.exceptions.RequestException, FileNotFoundError) as e:
+                logger.error(f"Google Maps request failed: {e}")
                 print("::endgroup::")
-                return None
-        else:
-            raise ValueError("Invalid API specified for Google Maps scraping. Use 'serpapi' or 'googleapi'.")
+                if not entry:
+                    return None
+                logger.warning(f"Serving stale results for '{query}' in {location}.")
+            else:
+                entry = SCRAPE_CACHE.put(api, query, location, limit, _normalize_maps_response(api, res, limit))
+        if delta:
+            results = ScrapeCache.delta(entry)
+            SCRAPE_CACHE.advance(entry)
+            return results
+        return list(entry["results"])
     except Exception as e:
         print(f"Google Maps scrape exception: {e}")
         return []
@@ -753,7 +1022,8 @@ def fetch_linkedin_leads(phantom_id: str, api_key: str) -> List[Dict[str, Any]]:
     headers = {"X-Phantombuster-Key": api_key}
     logger.info(f"Initiating LinkedIn lead fetch for ID: {phantom_id}")
     try:
-        res = requests.get(url, headers=headers, timeout=15).json()
+        with provider_slot("phantombuster"):
+            res = http_client.get(url, endpoint="phantombuster.fetch-output", headers=headers).json()
         raw_data = res.get("data", [])
         normalized = []
         for item in raw_data:
@@ -779,7 +1049,8 @@ def scrape_x_leads(query: str) -> List[Dict[str, Any]]:
     params = {"query": query, "max_results": 10, "tweet.fields": "author_id,id"}
     logger.info(f"Initiating X (Twitter) scrape for query: '{query}'")
     try:
-        res = requests.get("https://api.twitter.com/2/tweets/search/recent", headers=headers, params=params, timeout=15).json()
+        with provider_slot("x"):
+            res = http_client.get("https://api.twitter.com/2/tweets/search/recent", endpoint="x.search", headers=headers, params=params).json()
         raw_data = res.get("data", [])
         normalized = []
         for item in raw_data:
@@ -903,7 +1174,7 @@ def notify_telegram(lead, source_type="google_sheets", db_client=None, **kwargs)
     }
 
     try:
-        requests.post(url, json=payload)
+        http_client.post(url, endpoint="telegram.sendMessage", json=payload)
         print(f"Dispatched Telegram Notification Payload [{source_type.upper()}]. Total repository count: {total_count}")
     except Exception as e:
         logger.error(f"❌ Failed to send Telegram notification: {e}")
@@ -962,15 +1233,27 @@ def get_google_sheet_row_count():
         print(f"Error reading Google Sheet row count: {e}")
         return 0
 
-def already_queued(email):
-    if not sheet or not reserve_google_call("google_sheets_read_dedup", amount=1):
-        return False
-    try:
-        records = sheet.get_all_records()
-        hashes = [lead_hash(r["Email"]) for r in records if r.get("Email")]
-        return lead_hash(email) in hashes
-    except Exception:
-        return False
+# ---------------- LEAD DEDUP INDEX ---------------- #
+_lead_index = None
+_lead_index_lock = threading.Lock()
+
+def get_lead_index():
+    """Load the local dedup index once per process and catch it up with the sheet (one quota unit)."""
+    global _lead_index
+    with _lead_index_lock:
+        if _lead_index is None:
+            _lead_index = LeadIndex()
+            if sheet and reserve_google_call("google_sheets_read_dedup", amount=1):
+                try:
+                    read = _lead_index.sync(sheet)
+                    _lead_index.save()
+                    logger.info("Lead dedup index synced: %s new sheet rows, %s rows total.", read, _lead_index.rows_seen)
+                except Exception as e:
+                    logger.error(f"Lead dedup index sync failed, using the local copy: {e}")
+        return _lead_index
+
+def already_queued(email, company=None, location=None):
+    return get_lead_index().contains(email, company, location)
 
 # ---------------- EXCEL NEW-LEAD DETECTOR ---------------- #
 def load_last_row_count():
@@ -1043,11 +1326,11 @@ def send_email(to_email, subject, content):
     sg.send(message)
 
 # ---------------- CREATE CALENDAR EVENT ---------------- #
-def book_call(business_name: str, email: str) -> str:
+def book_call(business_name: str, email: str, reserve_quota: bool = True) -> str:
     if not calendar_service:
         return "https://cal.com/fallback-booking"
     try:
-        if not reserve_google_call("google_calendar_event_create", amount=1):
+        if reserve_quota and not reserve_google_call("google_calendar_event_create", amount=1):
             return "https://calendar.google.com"
         start_time = (dt.now(datetime.timezone.utc) + datetime.timedelta(days=2)).isoformat() + "Z"
         end_time = (dt.now(datetime.timezone.utc) + datetime.timedelta(days=2, minutes=30)).isoformat() + "Z"
@@ -1057,7 +1340,8 @@ def book_call(business_name: str, email: str) -> str:
             "end": {"dateTime": end_time},
             "attendees": [{"email": email}]
         }
-        res = calendar_service.events().insert(calendarId=GOOGLE_CALENDAR_ID, body=event).execute()
+        with provider_slot("google_calendar"):
+            res = calendar_service.events().insert(calendarId=GOOGLE_CALENDAR_ID, body=event).execute()
         return res.get("htmlLink", "https://calendar.google.com")
     except Exception:
         return "https://calendar.google.com"
@@ -1068,11 +1352,7 @@ def generate_follow_up(business_name, step):
     Write follow-up email #{step} for {business_name}.
     Keep it short and polite.
     """
-    response = openai.ChatCompletion.create(
-        model="gpt-4",
-        messages=[{"role": "user", "content": prompt}],
-    )
-    return response.choices[0].message.content.strip()
+    return gpt4_generate(prompt)
 
 def generate_proposal_pdf(lead, price):
     file_name = f"proposal_{lead['business']}.pdf"
@@ -1097,92 +1377,288 @@ def generate_proposal_pdf(lead, price):
 # MAIN PIPELINE
 # =========================
 
+# ---------------- LEAD FAN-OUT ---------------- #
+SOURCE_LABELS = {"google_maps": "Google Maps", "linkedin": "LinkedIn", "x": "X"}
+
+
+def maps_search(niche):
+    tech_cfg = CONFIG.get("tech_config", {})
+    return tech_cfg.get("maps_api", "serpapi"), niche["search_query"], tech_cfg.get("daily_limit_per_combo", 10)
+
+
+def fetch_source_leads(source, niche, location, offline=False):
+    """
+    Scrape one source × niche × location combo. Google quota is reserved by the caller.
+    Returns None when Google Maps could not be searched and had nothing cached.
+    """
+    if source == "google_maps":
+        api, query, limit = maps_search(niche)
+        leads = scrape_google_maps(api, query, location, limit, reserve_quota=False, offline=offline)
+        if leads is None:
+            return None  # no quota or request failed, and nothing cached: not scraped
+    elif source == "linkedin":
+        leads = fetch_linkedin_leads(os.getenv("PHANTOM_ID", ""), os.getenv("PHANTOMBUSTER_API_KEY", ""))
+    elif source == "x":
+        query = niche.get("x_query", f"{niche['search_query']} {location}")
+        leads = scrape_x_leads(query)
+    else:
+        raise ValueError(f"Invalid lead source: {source}")
+    return leads or []
+
+
+def generate_lead_row(lead, niche, location, email, source_label, today, calendar_reserved):
+    """All model calls and the calendar insert for one lead; runs on a lead worker thread."""
+    lead_type = lead.get("lead_type", "WEBSITE_CHECK_FAILED")
+    # one structured completion covers the email, both follow-ups, web prompt, Loom script and SMS
+    artifacts = generate_lead_artifacts(lead)
+    if calendar_reserved:
+        calendar_link = book_call(lead["Company"], email, reserve_quota=False)
+    else:
+        calendar_link = "https://calendar.google.com"
+
+    return [
+        niche["name"],
+        location,
+        lead["Company"],
+        lead.get("website", ""),
+        lead.get("phone", ""),
+        email,
+        artifacts["initial_email"],
+        artifacts["follow_up_1"],
+        artifacts["follow_up_2"],
+        calendar_link,
+        "Queued",
+        today,
+        source_label,
+        lead.get("profileUrl", "N/A"),
+        artifacts["web_prompt"],
+        artifacts["loom_script"],
+        artifacts["sms_copy"],
+        lead_type,         # Added classification column data
+        lead["score"]      # Added prioritization scoring data
+    ]
+
+
+def normalize_lead(lead, niche, location):
+    """Fill the keys the prompts and the sheet row read. Returns the lead's contact email."""
+    # Ensure location and business names carry safely into classification frameworks
+    lead["Location"] = location
+    lead["Company"] = lead.get("company", "Unknown Business")
+    lead["Business Name"] = lead["Company"]
+    lead.setdefault("business", lead["Company"])
+    lead.setdefault("name", lead["Company"])
+    lead.setdefault("industry", niche["name"])
+    lead.setdefault("offer", niche.get("value_prop", ""))
+    lead.setdefault("avatar", f"{niche['name']} customers in {location}")
+    lead.setdefault("outcome", "More booked customers")
+    lead.setdefault("pain", "No prominent digital presence")
+    return lead.get("email") or f"info@{lead['Company'].lower().replace(' ','')}.com"
+
+
+def generate_lead_stage(lead_id, lead, niche, location, email, source_label, today, calendar_reserved):
+    """generate_lead_row, checkpointed in the work queue as soon as the row exists."""
+    row_payload = generate_lead_row(lead, niche, location, email, source_label, today, calendar_reserved)
+    LEAD_QUEUE.advance([(lead_id, "generated", {"row": row_payload})])
+    return row_payload
+
+
+def _completed(row_payload):
+    future = Future()
+    future.set_result(row_payload)
+    return future
+
+
+def index_written_rows(rows):
+    """Add rows the sheet writer has flushed to the dedup index."""
+    index = get_lead_index()
+    for row in rows:
+        index.add(row[5], row[2], row[1])
+
+
+def sink_written_rows(rows, lead_ids):
+    """Sheet writer on_flush: index the rows and mark their leads sunk in the work queue."""
+    index_written_rows(rows)
+    LEAD_QUEUE.mark_sunk(lead_ids)
+
+
+def append_lead_rows(pending, writer):
+    """Wait for each lead's row in submission order and hand it to the sheet writer."""
+    for lead_id, lead, niche, future in pending:
+        try:
+            row_payload = future.result()
+        except Exception as e:
+            logger.error("Artifact generation failed for %s: %s", lead["Company"], e)
+            LEAD_QUEUE.fail(lead_id, e, MAX_GENERATION_ATTEMPTS)
+            continue
+        if writer is None:
+            continue
+        writer.append(row_payload, key=lead_id)
+        print(f"✅  Lead: {lead['Company']} - {lead['Location']} - {niche['name']} | Score: {lead['score']}] lead row from {row_payload[12]} that {row_payload[17]}")
+
+
 # ---------------- MAIN AGENT ---------------- #
-def run_agent():
+def run_agent(scrape_workers=None, lead_workers=None, run_id=None):
+    """
+    Scrape every source × niche × location combo and queue one sheet row per new lead.
+
+    Each lead moves through scrape → normalize → classify → generate → sink, and every
+    stage is checkpointed in LEAD_QUEUE under `run_id` (default: PIPELINE_RUN_ID, else
+    today's date). Rerunning with the same run id skips combos that were already scraped,
+    continues each lead from the stage it reached, and appends generated rows that never
+    reached the sheet. Runs with other ids are carried forward as well: their unsunk rows
+    are appended first, and leads they never generated (including generations that failed
+    fewer than MAX_GENERATION_ATTEMPTS times) go through this run with their combo.
+
+    Scrapes run up to `scrape_workers` combos ahead of the combo being processed, and
+    each lead's model calls and calendar insert run on `lead_workers` threads, capped
+    per provider by PROVIDER_CONCURRENCY. Normalize and classify run on this thread, one
+    combo at a time. Every Google quota reservation (maps search, dedup read, calendar
+    insert, sheet flush) is made on this thread, and a combo's rows go to the sheet writer
+    once the next combo has been queued. Row order never depends on thread timing; quota
+    usage depends only on the config, the queue state and `scrape_workers` (the
+    look-ahead), apart from when the writer's `sheet_flush_seconds` age limit fires.
+    """
     today = str(datetime.date.today())
+    run_id = run_id or os.getenv("PIPELINE_RUN_ID") or today
+    tech_cfg = CONFIG.get("tech_config", {})
+    scrape_workers = scrape_workers or SCRAPE_WORKERS
+    lead_workers = lead_workers or LEAD_WORKERS
 
     sources = ["google_maps",
             #    "linkedin", 
             #    "x"
                ]
-
-    for source in sources:
-        for niche in CONFIG.get("tech config", {}).get("niches", []):
-            for location in CONFIG.get("locations", []):
-                # Fetch routing phase
-                if source == "google_maps":
-                    leads = scrape_google_maps("googleapis",niche["search_query"], location, CONFIG.get("daily_limit_per_combo", 10))
-                    source_label = "Google Maps"
-                elif source == "linkedin":
-                    leads = fetch_linkedin_leads(os.getenv("PHANTOM_ID", ""), os.getenv("PHANTOMBUSTER_API_KEY", ""))
-                    source_label = "LinkedIn"
-                elif source == "x":
-                    query = niche.get("x_query", f"{niche['search_query']} {location}")
-                    leads = scrape_x_leads(query)
-                    source_label = "X"
-
-                # Transformation matrix processing phase
-                for lead in leads:
-                    # Clean the lead key-structure slightly to match your layout checks
-                    # Ensure location and business names carry safely into classification frameworks
-                    lead["Location"] = location
-                    lead["Company"] = lead.get("company", "Unknown Business")
-
-                    # --- Step 1: Execute Website Check, Classification & Scoring ---
-                    lead = process_lead(lead)
-                    lead_score = score_lead(lead)
-                    lead_type = lead.get("lead_type", "WEBSITE_CHECK_FAILED")
-            
-                    # Deduplication filtering logic               
-                    email = lead.get("email") or f"info@{lead.get('Company').lower().replace(' ','')}.com"
-                    if already_queued(email):
-                        continue
-
-                    # High level copy synthesis generation routines
-                    # initial = generate_email(lead["Company"], niche, location)
-                    # --- Step 2: High level copy synthesis generation routines ---
-                    # Use the specific tailored message if it was generated by the classifier
-                    if lead_type == "NO_WEBSITE" and "tailored_message" in lead:
-                        initial = lead["tailored_message"]
+    combos = [(source, niche, location)
+              for source in sources
+              for niche in tech_cfg.get("niches", [])
+              for location in tech_cfg.get("locations", [])]
+
+    pruned = LEAD_QUEUE.prune(PIPELINE_RETENTION_DAYS)
+    if pruned:
+        logger.info("Pruned %s finished pipeline run(s) older than %s days.", pruned, PIPELINE_RETENTION_DAYS)
+
+    scrape_pool = ThreadPoolExecutor(max_workers=scrape_workers, thread_name_prefix="scrape")
+    lead_pool = ThreadPoolExecutor(max_workers=lead_workers, thread_name_prefix="lead")
+
+    def submit_scrape(combo):
+        source, niche, location = combo
+        if LEAD_QUEUE.is_scraped(run_id, combo_key(source, niche["name"], location)):
+            return None
+        offline = False
+        if source == "google_maps":
+            api, query, limit = maps_search(niche)
+            # a fresh snapshot or a recorded response costs no quota; without quota only cached results are served
+            offline = (SCRAPE_FIXTURES.mode == "replay"
+                       or SCRAPE_CACHE.is_fresh(api, query, location, limit, SCRAPE_CACHE_HOURS)
+                       or not get_and_update_daily_count())
+        return scrape_pool.submit(fetch_source_leads, source, niche, location, offline)
+
+    # leads queued earlier in this run whose rows are not appended yet
+    this_run = LeadIndex(path=None)
+    writer = None
+    if sheet:
+        writer = BufferedSheetWriter(sheet, reserve=reserve_google_call, max_rows=SHEET_BATCH_ROWS,
+                                     max_seconds=SHEET_FLUSH_SECONDS, on_flush=sink_written_rows)
+
+    # rows earlier runs generated but never got into the sheet
+    recovered = LEAD_QUEUE.unsunk(exclude_run=run_id)
+    for lead_id, row_payload in recovered:
+        this_run.add(row_payload[5], row_payload[2], row_payload[1])
+        if writer:
+            writer.append(row_payload, key=lead_id)
+    if recovered:
+        logger.info("Recovered %s generated row(s) from earlier runs.", len(recovered))
+
+    scrapes = deque((combo, submit_scrape(combo)) for combo in combos[:scrape_workers])
+    next_combo = len(scrapes)
+    previous = []
+    try:
+        while scrapes:
+            (source, niche, location), scrape = scrapes.popleft()
+            # keep the look-ahead window full; reservations stay in combo order
+            if next_combo < len(combos):
+                scrapes.append((combos[next_combo], submit_scrape(combos[next_combo])))
+                next_combo += 1
+
+            # scrape: checkpoint the raw results; a failed or refused scrape is retried by the next run
+            key = combo_key(source, niche["name"], location)
+            if scrape is not None:
+                try:
+                    leads = scrape.result()
+                    if leads is None:
+                        logger.warning("No quota and no cached results for %s / %s / %s; retried by the next run.",
+                                       source, niche["name"], location)
                     else:
-                        initial = generate_email(lead["Company"], niche, location)
-                    follow1 = generate_followup(lead["Company"], 1)
-                    follow2 = generate_followup(lead["Company"], 2)
-                    
-                    web_prompt = ai_model_selection(build_web_app_prompt(lead))
-                    loom_script = ai_model_selection(build_loom_script(lead))
-                    sms_copy = ai_model_selection(build_sms_copy(lead))
-                    calendar_link = book_call(lead["Company"], email)
-
-                    row_payload = [
-                        niche["name"],
-                        location,
-                        lead["company"],
-                        lead.get("website", ""),
-                        lead.get("phone", ""),
-                        email,
-                        initial,
-                        follow1,
-                        follow2,
-                        calendar_link,
-                        "Queued",
-                        today,
-                        source_label,
-                        lead.get("profileUrl", "N/A"),
-                        web_prompt,
-                        loom_script,
-                        sms_copy,
-                        lead_type,     # Added classification column data
-                        lead_score     # Added prioritization scoring data
-                    ]
-
-                    if sheet:
-                        if reserve_google_call("google_sheets_append_row", amount=1):
-                            sheet.append_row(row_payload)
-                            print(f"✅  Lead: {lead["company"]} - {lead["location"]} - {niche["name"]} | Score: {lead_score}] lead row: {lead['Company']} from {source_label} that {lead_type}") 
-                        else:
-                            logger.warning("Skipping Google Sheets append for %s because the daily Google quota is exhausted.", lead["Company"])
-
+                        LEAD_QUEUE.record_scrape(run_id, key, source, niche["name"], location, leads)
+                except Exception as e:
+                    logger.error("Lead scrape failed for %s / %s / %s: %s", source, niche["name"], location, e)
+            # leads earlier runs never generated go first, so a fresh copy of the same business is the duplicate
+            entries = LEAD_QUEUE.unfinished(key, exclude_run=run_id) + LEAD_QUEUE.leads(run_id, key)
+
+            # normalize
+            updates = []
+            for entry in entries:
+                if entry["stage"] == "scraped":
+                    entry["email"] = normalize_lead(entry["lead"], niche, location)
+                    entry["stage"] = "normalized"
+                    updates.append((entry["id"], "normalized", {"lead": entry["lead"], "email": entry["email"]}))
+            LEAD_QUEUE.advance(updates)
+
+            # classify: scoring for the whole combo at once, so low scorers never reach a model; then dedup
+            normalized = [entry for entry in entries if entry["stage"] == "normalized"]
+            kept = {id(lead) for lead in triage_leads([entry["lead"] for entry in normalized], LEAD_SCORE_THRESHOLD, LEAD_RULES)}
+            if len(kept) < len(normalized):
+                logger.info("Dropped %s of %s %s leads in %s below score %s.", len(normalized) - len(kept),
+                            len(normalized), niche["name"], location, LEAD_SCORE_THRESHOLD)
+            updates = []
+            for entry in entries:
+                lead, email = entry["lead"], entry["email"]
+                if entry["stage"] in ("classified", "generated"):
+                    # passed dedup before the restart
+                    this_run.add(email, lead["Company"], location)
+                    continue
+                if entry["stage"] != "normalized":
+                    continue
+                if id(lead) not in kept:
+                    entry["stage"] = "dropped"
+                elif already_queued(email, lead["Company"], location) or this_run.contains(email, lead["Company"], location):
+                    entry["stage"] = "duplicate"
+                else:
+                    entry["stage"] = "classified"
+                    this_run.add(email, lead["Company"], location)
+                updates.append((entry["id"], entry["stage"], {"lead": lead}))
+            LEAD_QUEUE.advance(updates)
+
+            # generate on the lead pool; rows generated before a restart are reused as they are
+            current = []
+            for entry in entries:
+                lead = entry["lead"]
+                if entry["stage"] == "generated":
+                    future = _completed(entry["row"])
+                elif entry["stage"] == "classified":
+                    # without Calendar configured book_call returns the cal.com link and spends no quota
+                    calendar_reserved = not calendar_service or reserve_google_call("google_calendar_event_create", amount=1)
+                    future = lead_pool.submit(generate_lead_stage, entry["id"], lead, niche, location, entry["email"],
+                                              SOURCE_LABELS[source], today, calendar_reserved)
+                else:
+                    continue
+                current.append((entry["id"], lead, niche, future))
+
+            # sink: the sheet writer marks leads sunk as their rows are flushed
+            append_lead_rows(previous, writer)
+            previous = current
+        append_lead_rows(previous, writer)
+    finally:
+        scrape_pool.shutdown(wait=False, cancel_futures=True)
+        lead_pool.shutdown(wait=True, cancel_futures=True)
+        if writer:
+            writer.close()
+            logger.info("Sheet writer: %s row(s) in %s request(s), %s unsent (recovered by the next run).",
+                        writer.written, writer.flushes, writer.unsent)
+        get_lead_index().save()
+        logger.info("Pipeline run %s: %s", run_id, LEAD_QUEUE.counts(run_id))
+        logger.info("LLM cache: %s", LLM_CACHE.stats())
+        logger.info("HTTP latency: %s", http_client.latency_stats())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,72 @@
+"""
+Simulation of llm_cache.LLMCache.memoize against a stub model.
+
+Runs offline with an in-memory cache and counts how often the stub model is
+actually called:
+
+    python test_llm_cache.py
+"""
+
+import logging
+
+from llm_cache import LLMCache
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+GENERATION_FAILURE = "Generation failed"
+
+
+def tst_memoize():
+    cache = LLMCache(":memory:")
+    calls = []
+
+    def stub_model(name):
+        def complete(prompt, temperature=0.7):
+            calls.append((name, temperature, prompt))
+            return GENERATION_FAILURE if "fail" in prompt else f"[{name} @ {temperature}] {prompt.upper()}"
+        return complete
+
+    mini = cache.memoize("stub-mini", skip=(GENERATION_FAILURE,))(stub_model("stub-mini"))
+    large = cache.memoize("stub-large", skip=(GENERATION_FAILURE,))(stub_model("stub-large"))
+    prompt = """
+        Write a cold email for Boston Care Telemedicine Clinic.
+    """
+
+    first = mini(prompt, 0.7)
+    second = mini(prompt, 0.7)
+    assert second == first and len(calls) == 1, "identical call reached the model"
+    logger.info("✅ Identical prompt and temperature served from cache (model calls: %s)", len(calls))
+
+    mini("Write a cold email for   Boston Care Telemedicine Clinic.", 0.7)
+    assert len(calls) == 1, "whitespace-only prompt change missed the cache"
+    logger.info("✅ Whitespace-only prompt change is a hit (model calls: %s)", len(calls))
+
+    mini(prompt, 0.2)
+    assert len(calls) == 2, "different temperature was served from cache"
+    logger.info("✅ Different temperature misses (model calls: %s)", len(calls))
+
+    large(prompt, 0.7)
+    assert len(calls) == 3, "different model was served from cache"
+    logger.info("✅ Different model misses (model calls: %s)", len(calls))
+
+    mini("please fail", 0.7)
+    mini("please fail", 0.7)
+    assert len(calls) == 5, "failed generation was cached"
+    logger.info("✅ Failed generations are not stored (model calls: %s)", len(calls))
+
+    mini.uncached(prompt, 0.7)
+    assert len(calls) == 6
+
+    replies = iter(['{"email": "Hi', '{"email": "Hi there"}'])
+    complete_json = cache.memoize("stub-json", validate=lambda text: text.endswith("}"))(
+        lambda prompt, temperature=0.7: next(replies))
+    assert complete_json(prompt) == '{"email": "Hi'
+    assert complete_json(prompt) == '{"email": "Hi there"}', "truncated reply was cached"
+    assert complete_json(prompt) == '{"email": "Hi there"}', "valid reply was not cached"
+    logger.info("✅ Replies the validator rejects are not stored")
+    logger.info("LLM cache stats: %s", cache.stats())
+
+
+if __name__ == "__main__":
+    tst_memoize()
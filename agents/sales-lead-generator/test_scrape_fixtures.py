@@ -0,0 +1,57 @@
+"""
+Offline replay of a Google Maps search through tech_clients.scrape_google_maps.
+
+fixtures/scrapes/ holds SerpAPI responses in the format SCRAPE_FIXTURES=record
+writes. The "Dental Clinic" / "New York, NY" one is synthetic, not a live
+capture: hand-written businesses (placeholder place_ids, Example Ave addresses,
+555 phone numbers) in the shape of SerpAPI's google_maps response. It checks
+that the replay and normalization path parses that shape, not that the shape
+still matches what SerpAPI returns today. This script replays it with offline=True
+(no network, no Google quota) against a throwaway snapshot cache, then shows
+that delta mode hands each business out only once:
+
+    python test_scrape_fixtures.py
+"""
+
+import logging
+import os
+import tempfile
+
+os.environ["SCRAPE_FIXTURES"] = "replay"
+
+import tech_clients  # noqa: E402  (reads SCRAPE_FIXTURES at import)
+from scrape_cache import ScrapeCache  # noqa: E402
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+API, QUERY, LOCATION, LIMIT = "serpapi", "Dental Clinic", "New York, NY", 10
+
+
+def tst_replay_google_maps():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        tech_clients.SCRAPE_CACHE = ScrapeCache(cache_dir)
+        quota_calls = []
+        tech_clients.get_and_update_daily_count = lambda: quota_calls.append(1) or True
+
+        leads = tech_clients.scrape_google_maps(API, QUERY, LOCATION, LIMIT, offline=True, delta=False)
+        assert leads, "fixture response was not replayed"
+        assert all(set(lead) >= {"company", "website", "phone", "rating", "reviews"} for lead in leads)
+        assert not quota_calls, "replay reserved Google quota"
+        logger.info("✅ Replayed %s normalized leads offline: %s", len(leads), [lead["company"] for lead in leads])
+        no_website = [lead["company"] for lead in leads if not lead["website"]]
+        logger.info("   No-website leads: %s", no_website)
+
+        first = tech_clients.scrape_google_maps(API, QUERY, LOCATION, LIMIT, offline=True, delta=True)
+        again = tech_clients.scrape_google_maps(API, QUERY, LOCATION, LIMIT, offline=True, delta=True)
+        assert len(first) == len(leads) and again == [], "delta was returned twice"
+        logger.info("✅ Delta mode: %s new on the first run, %s on the next", len(first), len(again))
+
+        refreshed = tech_clients.scrape_google_maps(API, QUERY, LOCATION, LIMIT, offline=True,
+                                                    delta=True, max_age_hours=0)
+        assert refreshed == [], "an unchanged new snapshot produced a delta"
+        logger.info("✅ A new snapshot with the same businesses adds nothing")
+
+
+if __name__ == "__main__":
+    tst_replay_google_maps()